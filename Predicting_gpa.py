@@ -1,162 +1,422 @@
-#########################################################################
-# Title  : Predicting GPA of students using the best model
-# Author : Kevin Ryan Noronha
-# Editor : Disha Khurana – Updated 4 June 2025 – Using only HGBR model, Added download for failing students and bar chart
-#########################################################################
-
-# Importing necessary libraries 
-import os
-import io
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
-import base64
-import joblib
-from flask import (
-    Blueprint, render_template,
-    request, redirect, flash,
-    send_file
-)
-
-ml_bp = Blueprint('ml', __name__, template_folder='templates')
-
-# ─── Path to the best model ───
-BASE_DIR  = os.path.dirname(__file__)
-MODEL_DIR = os.path.join(BASE_DIR, 'Machine Learning')
-HIST_PATH = os.path.join(MODEL_DIR, 'gpa_hist_model_cp.pkl')
-
-# ─── Loading model and metadata ───
-hist_store   = joblib.load(HIST_PATH)
-model_hist   = hist_store['model']
-subject_cols = [c for c in hist_store['subject_cols'] if c != 'GPA']
-
-# ─── GPA Range Formatter ───
-def gpa_range(val):
-    if val < 1.5:
-        return "0.0 – 1.5"
-    elif val < 2.0:
-        return "1.5 – 2.0"
-    elif val < 2.5:
-        return "2.0 – 2.5"
-    elif val < 3.0:
-        return "2.5 – 3.0"
-    elif val < 3.5:
-        return "3.0 – 3.5"
-    else:
-        return "3.5 – 4.0"
-
-# ─── Preprocessing  uploaded student data ───
-def preprocess_input(df: pd.DataFrame) -> pd.DataFrame:
-    df = df[['Emplid', 'Name', 'Course', 'Mark']].drop_duplicates()
-    df['Emplid'] = df['Emplid'].astype(str)
-    df['Mark'] = pd.to_numeric(df['Mark'], errors='coerce')
-    df['Mark'].fillna(df['Mark'].median(), inplace=True)
-
-    pivot = (
-        df
-        .pivot_table(
-            index=['Emplid', 'Name'],
-            columns='Course',
-            values='Mark',
-            aggfunc='first'
-        )
-        .reset_index()
-    )
-
-    # Normalizing each subject column based on its column mean
-    data = pivot.copy()
-    for col in subject_cols:
-        mu = data[col].dropna().mean()
-        data[col].fillna(mu, inplace=True)
-        data[col] = (data[col] - mu) / mu
-
-    return data
-
-# ─── Flask Route for GPA Prediction ───
-@ml_bp.route('/', methods=['GET', 'POST'])
-def home():
-    table_html = None
-    results = None
-    chart_base64 = None
-
-    if request.method == 'POST':
-        f = request.files.get('datafile')
-        if not f or not f.filename:
-            flash("Please upload a CSV or Excel file.")
-            return redirect(request.url)
-
-        ext = f.filename.rsplit('.', 1)[1].lower()
-        try:
-            df_raw = pd.read_excel(f) if ext in ('xls', 'xlsx') else pd.read_csv(f)
-        except Exception:
-            flash("Could not read file. Make sure it's valid CSV/XLS/XLSX.")
-            return redirect(request.url)
-
-        # Preprocessing input
-        data = preprocess_input(df_raw)
-
-        # Removing empty 'Course' column 
-        data = data.drop(columns=[col for col in data.columns if col.lower() == 'course'], errors='ignore')
-
-        X_new = data[subject_cols]
-
-        # Predicting GPA using the best model
-        pred_hist = model_hist.predict(X_new)
-
-        # Formatting predictions
-        results = data[['Emplid', 'Name']].copy()
-        results['Estimated GPA Range'] = [gpa_range(p) for p in pred_hist]
-        results['Predicted GPA'] = [round(p, 3) for p in pred_hist]
-
-        # Generating bar chart of pass vs fail
-        try:
-            count_pass = sum(pred_hist >= 2.0)
-            count_fail = sum(pred_hist < 2.0)
-            labels = ['Eligible GPA', 'At-Risk GPA']
-            counts = [count_pass, count_fail]
-
-            fig, ax = plt.subplots()
-            ax.bar(labels, counts, color=['#161E87', '#A61C30'])
-            ax.set_ylabel('Number of Students')
-            ax.set_title('Students by GPA Category')
-
-            img_buf = io.BytesIO()
-            plt.tight_layout()
-            plt.savefig(img_buf, format='png', dpi=150)
-            img_buf.seek(0)
-            chart_base64 = base64.b64encode(img_buf.getvalue()).decode('utf-8')
-            plt.close(fig)
-        except Exception as e:
-            print("Chart generation failed:", e)
-
-        # Converting to HTML table
-        table_html = results.to_html(
-            index=False,
-            classes='table table-bordered data-table',
-            table_id='ml-table',
-            escape=False
-        )
-
-    return render_template('machine_learning.html', table_html=table_html, results=results, chart_base64=chart_base64)
-
-# ─── Route for Downloading Failing Students ───
-@ml_bp.route('/download-failures', methods=['POST'])
-def download_failures():
-    try:
-        failing_json = request.form.get("failing_data")
-        df = pd.read_json(failing_json)
-
-        output = io.BytesIO()
-        df.to_excel(output, index=False, sheet_name="Failing Students")
-        output.seek(0)
-
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name="failing_students.xlsx"
-        )
-    except Exception as e:
-        flash(f"Download failed: {str(e)}")
-        return redirect('/')
+#########################################################################
+# Title  : Predicting GPA of students using the best model
+# Author : Kevin Ryan Noronha
+# Editor : Disha Khurana – Updated 4 June 2025 – Using only HGBR model, Added download for failing students and bar chart
+#########################################################################
+
+# Importing necessary libraries 
+# (numpy/pandas-backed helpers are imported on first use so the app starts without them)
+import os
+import io
+import bisect
+import shutil
+import tempfile
+from flask import (
+    Blueprint, render_template,
+    request, redirect, flash,
+    send_file, jsonify, current_app, url_for
+)
+from charts import render_chart
+from exports import export_response, send_and_remove
+from inference import prediction_executor
+from metrics import metrics, stage
+from model_registry import registry, bundle_subject_cols
+from prediction_memo import memo
+from result_store import results as result_store
+
+ml_bp = Blueprint('ml', __name__, template_folder='templates')
+
+# ─── Path to the best model ───
+BASE_DIR  = os.path.dirname(__file__)
+MODEL_DIR = os.path.join(BASE_DIR, 'Machine Learning')
+HIST_PATH = os.path.join(MODEL_DIR, 'gpa_hist_model_cp.pkl')
+HIST_NPZ_PATH = os.path.join(MODEL_DIR, 'gpa_hist_model.npz')
+KNN_PATH  = os.path.join(MODEL_DIR, 'gpa_knnreg_model.pkl')
+
+# ─── Registering models (loaded on first use, or by preload_models) ───
+# The exported tree arrays (see tree_model.py) serve the HGBR model without
+# scikit-learn; the export records the pickle's digest and is redone when the pickle changes
+registry.register('hist', HIST_PATH, compiled=HIST_NPZ_PATH)
+registry.register('knn',  KNN_PATH, required=False)
+
+# ─── Applying the app's GPA_TREE_EVALUATOR switch (False serves the pickle itself) ───
+def init_models(app):
+    registry.register('hist', HIST_PATH, compiled=HIST_NPZ_PATH if app.config['GPA_TREE_EVALUATOR'] else None)
+
+# ─── Loading every model up front, e.g. before gunicorn forks its workers ───
+def preload_models():
+    registry.preload()
+
+# ─── Model used by requests: sharded by the executor, and memoised per student so
+# re-uploaded students are answered without the model (see prediction_memo.py).
+# Background jobs, which run outside the app, pass their worker's own executor ───
+def serving_model(name='hist', executor=None):
+    model = (executor or prediction_executor()).bind(name)
+    if not memo.enabled:
+        return model
+    return memo.wrap(model, registry.digest(name))
+
+def memo_report(model, label):
+    if not hasattr(model, 'report'):
+        return None
+    report = model.report()
+    memo.record(label, **report)
+    return report
+
+# ─── GPA bands: a prediction falls in the first band whose upper edge it is below ───
+GPA_BAND_EDGES = (1.5, 2.0, 2.5, 3.0, 3.5)
+GPA_SCALE = (0.0, 4.0)
+
+def band_labels(edges=GPA_BAND_EDGES):
+    bounds = [GPA_SCALE[0], *edges, GPA_SCALE[1]]
+    return [f"{lo:.1f} – {hi:.1f}" for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+# Labels of the default bands (also offered as downloads)
+GPA_BANDS = band_labels()
+
+# ─── GPA Range Formatter (single value) ───
+def gpa_range(val):
+    return GPA_BANDS[bisect.bisect_right(GPA_BAND_EDGES, val)]
+
+# ─── Banding a whole prediction array at once, with the count per band ───
+# NaN lands in the top band, as it did in the original if/elif chain
+def gpa_bands(pred, edges=GPA_BAND_EDGES):
+    import numpy as np
+    import pandas as pd
+
+    codes = np.digitize(pred, edges)
+    counts = np.bincount(codes, minlength=len(edges) + 1)
+    return pd.Categorical.from_codes(codes, categories=band_labels(edges)), counts
+
+# Students densified and predicted per block
+PREDICT_BLOCK_ROWS = 100_000
+
+# ─── Columns and dtypes read from an uploaded mark file ───
+INPUT_COLUMNS = ['Emplid', 'Name', 'Course', 'Mark']
+INPUT_DTYPES  = {'Emplid': str, 'Name': str, 'Course': str}
+
+def read_marks(source):
+    from ingest import read_upload
+
+    return read_upload(source, usecols=INPUT_COLUMNS, dtype=INPUT_DTYPES, label='gpa_marks')
+
+# ─── Preprocessing  uploaded student data ───
+# Uses the training-time subject means and mark median stored in the bundle.
+# Passing means=None falls back to the old batch-relative normalisation.
+# Marks stay as sparse (student, subject) coordinates; see SparseMarks.
+def sparse_input(df: 'pd.DataFrame', subject_cols, means=None, mark_median=None):
+    from gpa_features import clean_marks, sparse_marks
+
+    df = clean_marks(df, mark_median=mark_median if means is not None else None)
+    marks = sparse_marks(df, subject_cols)
+    return marks, marks.means() if means is None else means
+
+def preprocess_input(df: 'pd.DataFrame', subject_cols, means=None, mark_median=None):
+    import pandas as pd
+
+    marks, means = sparse_input(df, subject_cols, means=means, mark_median=mark_median)
+    return marks.ids, pd.DataFrame(marks.dense(means), columns=subject_cols, copy=False)
+
+# ─── Normalisation statistics to use for a bundle (None = batch-relative) ───
+def bundle_means(bundle, batch_relative=None):
+    if batch_relative is None:
+        batch_relative = current_app.config.get('GPA_BATCH_RELATIVE', False)
+    if batch_relative or 'subject_means' not in bundle:
+        return None, None
+    return bundle['subject_means'], bundle.get('mark_median')
+
+# ─── Predicting GPAs for an uploaded frame and formatting the results ───
+# Returns the result frame, the raw predictions and the number of students per band
+# model overrides bundle['model'], e.g. with a sharded model from the prediction executor
+def predict_results(df_raw, bundle, means=None, mark_median=None, band_edges=GPA_BAND_EDGES, model=None):
+    import numpy as np
+    import pandas as pd
+
+    subject_cols = bundle_subject_cols(bundle)
+    with stage('ml', 'pivot'):
+        marks, means = sparse_input(df_raw, subject_cols, means=means, mark_median=mark_median)
+    ids, model = marks.ids, model or bundle['model']
+
+    # Predicting GPA using the best model, densifying one block of students at a time
+    with stage('ml', 'predict'):
+        pred_hist = np.concatenate([
+            model.predict(pd.DataFrame(X, columns=subject_cols, copy=False))
+            for X in marks.blocks(means, PREDICT_BLOCK_ROWS)
+        ] or [np.empty(0)])
+
+    # Formatting predictions (categorical bands and float32 GPAs keep large batches compact)
+    with stage('ml', 'assemble'):
+        bands, band_counts = gpa_bands(pred_hist, band_edges)
+        results = ids[['Emplid', 'Name']].copy()
+        results['Estimated GPA Range'] = bands
+        results['Predicted GPA'] = np.round(pred_hist, 3).astype(np.float32)
+    return results, pred_hist, band_counts
+
+# ─── Bar chart of pass vs fail (SVG markup, or a base64 PNG when fmt='png') ───
+def render_gpa_chart(pred_hist, fmt='svg'):
+    import numpy as np
+
+    pred_hist = np.asarray(pred_hist)
+    count_pass = np.count_nonzero(pred_hist >= 2.0)
+    count_fail = np.count_nonzero(pred_hist < 2.0)
+    return render_chart('gpa', (count_pass, count_fail), fmt)
+
+# ─── Converting results to an HTML table ───
+def render_results_table(results):
+    return results.to_html(
+        index=False,
+        classes='table table-bordered data-table',
+        table_id='ml-table',
+        escape=False
+    )
+
+# ─── Rows of a stored result to download: 'all', 'failing' or one GPA band label ───
+def select_results(df, subset='failing'):
+    if subset == 'all':
+        return df
+    if subset != 'failing':
+        return df[df['Estimated GPA Range'] == subset]
+    return df[df['Predicted GPA'] < 2.0]
+
+# ─── Writing the failing students to an in-memory workbook ───
+def failures_workbook(df):
+    from table_render import widen_floats
+
+    output = io.BytesIO()
+    widen_floats(df).to_excel(output, index=False, sheet_name="Failing Students")
+    output.seek(0)
+    return output
+
+# ─── Flask Route for GPA Prediction ───
+@ml_bp.route('/', methods=['GET', 'POST'])
+def home():
+    chart_format = current_app.config.get('CHART_FORMAT', 'svg')
+
+    if request.method == 'POST':
+        f = request.files.get('datafile')
+        if not f or not f.filename:
+            flash("Please upload a CSV or Excel file.")
+            return redirect(request.url)
+
+        try:
+            with stage('ml', 'parse'):
+                df_raw = read_marks(f)
+        except Exception:
+            flash("Could not read file. Make sure it's valid CSV/XLS/XLSX.")
+            return redirect(request.url)
+
+        # Fetching the current model bundle (hot-reloaded if the .pkl changed)
+        try:
+            hist_store = registry.get('hist')
+        except Exception as e:
+            flash(f"GPA model unavailable: {e}")
+            return redirect(request.url)
+        # Preprocessing input and predicting GPA using the best model
+        means, mark_median = bundle_means(hist_store)
+        band_edges = current_app.config.get('GPA_BAND_EDGES', GPA_BAND_EDGES)
+        model = serving_model()
+        results, pred_hist, band_counts = predict_results(df_raw, hist_store, means=means, mark_median=mark_median,
+                                                          band_edges=band_edges, model=model)
+        memo_counts = memo_report(model, 'gpa_marks')
+        band_summary = list(zip(band_labels(band_edges), band_counts.tolist()))
+
+        # Generating bar chart of pass vs fail
+        chart = None
+        try:
+            with stage('ml', 'chart'):
+                chart = render_gpa_chart(pred_hist, chart_format)
+        except Exception as e:
+            print("Chart generation failed:", e)
+
+        # Keeping the result server-side for downloads
+        result_id = result_store.put('ml', results)
+        return render_results_page(results, band_summary, chart_format, chart, result_id, memo_counts=memo_counts)
+
+    return render_template('machine_learning.html', table_html=None, results=None, band_summary=[])
+
+# ─── Results page; large results are paged as JSON instead of rendered as rows ───
+def render_results_page(results, band_summary, chart_format, chart, result_id, memo_counts=None, failures_url=None):
+    table_html = None
+    data_url = None
+    if len(results) > current_app.config.get('SERVER_SIDE_ROWS', 2000):
+        data_url = url_for('ml.table_data', result_id=result_id)
+    else:
+        with stage('ml', 'table'):
+            table_html = render_results_table(results)
+
+    return render_template('machine_learning.html', table_html=table_html, results=results, band_summary=band_summary,
+                           memo_counts=memo_counts,
+                           chart_svg=chart if chart_format == 'svg' else None,
+                           chart_base64=chart if chart_format == 'png' else None,
+                           result_id=result_id, data_url=data_url, failures_url=failures_url)
+
+# ─── Result page of a prediction run as a background job (the upload form submits to /jobs/ml) ───
+@ml_bp.route('/jobs/<job_id>')
+def job_result(job_id):
+    from jobs import finished_job, job_chart, job_json
+
+    found = finished_job(job_id, 'ml')
+    if found is None:
+        flash("Prediction result expired. Please upload the file again.")
+        return redirect(url_for('ml.home'))
+
+    job, result_id, view = found
+    chart_format, chart = job_chart(job)
+    band_summary = list((job_json(job, 'bands') or {}).items())
+    memo_counts = job_json(job, 'memo')
+
+    # The job already wrote the failing students' workbook
+    failures_url = url_for('jobs.result', job_id=job_id, name='failures') if 'failures' in job['results'] else None
+    return render_results_page(view.df, band_summary, chart_format, chart, result_id,
+                               memo_counts=memo_counts, failures_url=failures_url)
+
+# ─── Server-side DataTables endpoint for a stored prediction result ───
+@ml_bp.route('/data/<result_id>')
+def table_data(result_id):
+    from datatables import datatables_response
+
+    view = result_store.get(result_id, kind='ml')
+    if view is None:
+        return jsonify({'error': 'Result expired. Please upload the file again.'}), 404
+    return datatables_response(view, request.args)
+
+# ─── Streaming prediction for very large mark files (result returned as a download) ───
+@ml_bp.route('/stream', methods=['POST'])
+def stream_download():
+    from gpa_stream import stream_predict
+
+    f = request.files.get('datafile')
+    if not f or not f.filename:
+        flash("Please upload a CSV or Excel file.")
+        return redirect(url_for('ml.home'))
+
+    fmt = request.form.get('format', 'csv')
+    if fmt not in ('csv', 'xlsx'):
+        fmt = 'csv'
+
+    try:
+        hist_store = registry.get('hist')
+    except Exception as e:
+        flash(f"GPA model unavailable: {e}")
+        return redirect(url_for('ml.home'))
+
+    # Spooling the upload to disk and spilling partitions next to it
+    work_dir = tempfile.mkdtemp(prefix='gpa_stream_', dir=current_app.config.get('UPLOAD_FOLDER'))
+    try:
+        src_path = os.path.join(work_dir, 'upload')
+        out_path = os.path.join(work_dir, f'gpa_predictions.{fmt}')
+        f.save(src_path)
+
+        means, mark_median = bundle_means(hist_store)
+        model = serving_model()
+        stream_predict(
+            src_path, out_path, model, bundle_subject_cols(hist_store),
+            lambda pred: gpa_bands(pred, current_app.config.get('GPA_BAND_EDGES', GPA_BAND_EDGES))[0],
+            means=means, mark_median=mark_median, fmt=fmt,
+            assume_sorted=request.form.get('sorted') == '1', work_dir=work_dir
+        )
+        memo_report(model, 'gpa_stream')
+    except Exception as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        flash(f"Streaming prediction failed: {e}")
+        return redirect(url_for('ml.home'))
+
+    mimetype = ('text/csv' if fmt == 'csv'
+                else 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    return send_and_remove(out_path, work_dir, mimetype, f'gpa_predictions.{fmt}')
+
+# ─── Route for Downloading Failing Students ───
+@ml_bp.route('/download-failures', methods=['POST'])
+def download_failures():
+    import pandas as pd
+
+    try:
+        # Failing rows are taken from the stored result; API clients may still post them as JSON
+        result_id = request.form.get("result_id")
+        if result_id:
+            view = result_store.get(result_id, kind='ml')
+            if view is None:
+                flash("Prediction result expired. Please upload the file again.")
+                return redirect(url_for('ml.home'))
+            return export_response(select_results(view.df, 'failing'), 'xlsx', 'failing_students', 'Failing Students')
+
+        failing_json = request.form.get("failing_data")
+        df = pd.read_json(failing_json)
+        output = failures_workbook(df)
+
+        return send_file(
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name="failing_students.xlsx"
+        )
+    except Exception as e:
+        flash(f"Download failed: {str(e)}")
+        return redirect('/')
+
+# ─── Downloading a stored result: all rows, failing rows or one GPA band, as XLSX or CSV ───
+@ml_bp.route('/results/<result_id>/download')
+def download_results(result_id):
+    view = result_store.get(result_id, kind='ml')
+    if view is None:
+        flash("Prediction result expired. Please upload the file again.")
+        return redirect(url_for('ml.home'))
+
+    subset = request.args.get('subset', 'all')
+    fmt = request.args.get('format', 'xlsx')
+    if fmt not in ('csv', 'xlsx'):
+        fmt = 'xlsx'
+
+    df = select_results(view.df, subset)
+    name = {'all': 'gpa_predictions', 'failing': 'failing_students'}.get(subset, 'gpa_predictions_band')
+    return export_response(df, fmt, name, 'Predictions')
+
+# ─── Bulk prediction API: long (Emplid, Course, Mark) records in, one row per student out ───
+# Bodies may be JSON Lines, JSON, CSV, Arrow or Parquet (see payloads.py), gzip-compressed
+# with Content-Encoding; the answer uses the same format unless ?format= or Accept says otherwise
+@ml_bp.route('/api/predict', methods=['POST'])
+def api_predict():
+    import payloads
+
+    try:
+        fmt = payloads.request_format(request.mimetype)
+        out_fmt = payloads.response_format(request, fmt)
+        data = payloads.decompress(request.get_data(cache=False), request.headers.get('Content-Encoding'),
+                                   current_app.config.get('API_MAX_BODY_BYTES', 512 * 1024 * 1024))
+        with stage('api', 'parse'):
+            df_raw = payloads.read_records(data, fmt)
+    except payloads.PayloadError as e:
+        return jsonify({'error': str(e)}), e.status
+    metrics.observe_upload('gpa_api', len(data), len(df_raw))
+
+    try:
+        hist_store = registry.get('hist')
+    except Exception as e:
+        return jsonify({'error': f"GPA model unavailable: {e}"}), 503
+
+    means, mark_median = bundle_means(hist_store)
+    band_edges = current_app.config.get('GPA_BAND_EDGES', GPA_BAND_EDGES)
+    model = serving_model()
+    results, _, _ = predict_results(df_raw, hist_store, means=means, mark_median=mark_median,
+                                    band_edges=band_edges, model=model)
+    memo_counts = memo_report(model, 'gpa_api')
+
+    with stage('api', 'encode'):
+        body = payloads.write_records(results, out_fmt)
+        gzipped = request.accept_encodings['gzip'] > 0
+        if gzipped:
+            body = payloads.compress(body)
+
+    response = current_app.response_class(body, mimetype=payloads.FORMATS[out_fmt])
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    if memo_counts is not None:
+        response.headers['X-Prediction-Memo-Hits'] = str(memo_counts['hits'])
+        response.headers['X-Prediction-Memo-Misses'] = str(memo_counts['misses'])
+    return response
+
+# ─── Load time, memory footprint and reload count for each model ───
+@ml_bp.route('/models')
+def model_stats():
+    return jsonify({**registry.stats(), 'executor': prediction_executor().stats(), 'memo': memo.stats()})
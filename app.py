@@ -1,41 +1,166 @@
-#########################################################################
-# Title  : Application main
-# Author : Kevin Ryan Noronha
-# Editor : Disha Khurana – 1 June 2025 – Integrated all three features:
-#          Continuing Students, Pathway Overview, and GPA Prediction
-##########################################################################
-
-from flask import Flask, redirect, url_for
-import os
-
-# Importing Blueprints
-from continuing_students import continuing_bp
-from pathway_overview import pathway_bp
-from Predicting_gpa import ml_bp 
-
-def create_app():
-    app = Flask(__name__, static_folder='static', template_folder='templates')
-
-    # File upload configuration
-    upload_dir = os.path.join(app.root_path, 'uploads')
-    os.makedirs(upload_dir, exist_ok=True)
-    app.config['UPLOAD_FOLDER'] = upload_dir
-    app.config['SECRET_KEY'] = 'change_this_to_something_secret'
-
-    # Register feature Blueprints
-    app.register_blueprint(continuing_bp, url_prefix='/continuing')
-    app.register_blueprint(pathway_bp,    url_prefix='/pathway')
-    app.register_blueprint(ml_bp,         url_prefix='/ml')
-
-    # Home redirects to continuing students
-    @app.route('/')
-    def index():
-        return redirect(url_for('continuing.home'))
-
-    return app
-
-
-# Entry point for running the app
-if __name__ == '__main__':
-    app = create_app()
-    app.run(debug=True)
+#########################################################################
+# Title  : Application main
+# Author : Kevin Ryan Noronha
+# Editor : Disha Khurana – 1 June 2025 – Integrated all three features:
+#          Continuing Students, Pathway Overview, and GPA Prediction
+##########################################################################
+
+from flask import Flask, redirect, url_for
+import importlib
+import os
+
+# Importing Blueprints
+from continuing_students import continuing_bp
+from pathway_overview import pathway_bp
+from Predicting_gpa import ml_bp, init_models, preload_models, GPA_BAND_EDGES
+from jobs import jobs_bp, init_jobs
+from inference import init_predictor, prediction_executor
+from result_store import results
+from prediction_memo import memo
+from metrics import metrics, init_metrics
+from uploads import spooler, init_uploads
+from http_cache import responses, init_http_cache
+from model_registry import registry
+import charts
+
+# Modules the blueprints import on first use (pandas, NumPy, openpyxl behind them)
+HEAVY_MODULES = ('ingest', 'datatables', 'table_render', 'student_matching',
+                 'course_data', 'gpa_features', 'gpa_stream')
+
+# ─── Paying the import and model load costs up front instead of on the first request ───
+# With `gunicorn --preload` this runs before the fork so workers share the pages
+# copy-on-write; CLI tools, tests and autoscaled workers skip it and start light
+def preload():
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    preload_models()
+
+def create_app():
+    app = Flask(__name__, static_folder='static', template_folder='templates')
+
+    # File upload configuration
+    upload_dir = os.path.join(app.root_path, 'uploads')
+    os.makedirs(upload_dir, exist_ok=True)
+    app.config['UPLOAD_FOLDER'] = upload_dir
+    app.config['SECRET_KEY'] = 'change_this_to_something_secret'
+
+    # Upload limits: whole requests over MAX_CONTENT_LENGTH are refused from the
+    # header, single files over UPLOAD_MAX_FILE_BYTES while they stream in. Files
+    # above UPLOAD_SPOOL_BYTES spool to anonymous temp files in UPLOAD_SPOOL_FOLDER
+    # (deleted when the request ends); at most UPLOAD_PARSE_CONCURRENCY are parsed at once
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 512 * 1024 * 1024))
+    app.config['UPLOAD_MAX_FILE_BYTES'] = int(os.environ.get('UPLOAD_MAX_FILE_BYTES', 256 * 1024 * 1024))
+    app.config['UPLOAD_SPOOL_BYTES'] = int(os.environ.get('UPLOAD_SPOOL_BYTES', 1024 * 1024))
+    app.config['UPLOAD_SPOOL_FOLDER'] = os.path.join(upload_dir, 'spool')
+    app.config['UPLOAD_PARSE_CONCURRENCY'] = int(os.environ.get('UPLOAD_PARSE_CONCURRENCY', 2))
+    init_uploads(app)
+
+    # Course workbook behind the pathway pages
+    app.config['COURSE_DETAILS_PATH'] = os.path.join(app.root_path, 'data', 'CourseDetails.xlsx')
+
+    # Pickle snapshot of CourseDetails.xlsx so cold workers skip openpyxl (None disables)
+    app.config['COURSE_SNAPSHOT_DIR'] = os.path.join(app.root_path, 'data', '.cache')
+
+    # The HGBR model is served from its NumPy tree export (see tree_model.py);
+    # GPA_TREE_EVALUATOR=0 serves the scikit-learn pickle instead
+    app.config['GPA_TREE_EVALUATOR'] = os.environ.get('GPA_TREE_EVALUATOR', '1') == '1'
+    init_models(app)
+
+    # Heavy modules and GPA models load on first use; PRELOAD_MODELS=1 loads them
+    # here instead (see preload above)
+    app.config['PRELOAD_MODELS'] = os.environ.get('PRELOAD_MODELS', '0') == '1'
+    if app.config['PRELOAD_MODELS']:
+        preload()
+
+    # Normalising uploads with the training-time subject means stored in the model
+    # bundle; True restores the old per-upload (batch-relative) means
+    app.config['GPA_BATCH_RELATIVE'] = False
+
+    # Upper edges of the GPA bands shown as 'Estimated GPA Range'
+    app.config['GPA_BAND_EDGES'] = GPA_BAND_EDGES
+
+    # Charts are drawn as cached inline SVG; 'png' restores the matplotlib images
+    app.config['CHART_FORMAT'] = os.environ.get('CHART_FORMAT', 'svg')
+
+    # Largest bulk prediction API body once gzip is inflated
+    app.config['API_MAX_BODY_BYTES'] = int(os.environ.get('API_MAX_BODY_BYTES', 512 * 1024 * 1024))
+
+    # Result tables longer than this are paged, sorted and searched server-side
+    app.config['SERVER_SIDE_ROWS'] = int(os.environ.get('SERVER_SIDE_ROWS', 2000))
+
+    # Stored results (for paging and downloads) are written to RESULT_FOLDER, shared by
+    # every worker process, and expire after the TTL
+    app.config['RESULT_FOLDER'] = os.path.join(app.root_path, 'results')
+    app.config['RESULT_TTL_SECONDS'] = 3600
+    results.configure(app.config['RESULT_FOLDER'], ttl=app.config['RESULT_TTL_SECONDS'])
+
+    # Per-student prediction memo (LRU; 0 disables it). PREDICTION_MEMO_PATH keeps it on
+    # disk across restarts, saved at most every PREDICTION_MEMO_SAVE_SECONDS and at exit
+    app.config['PREDICTION_MEMO_ENTRIES'] = int(os.environ.get('PREDICTION_MEMO_ENTRIES', 250_000))
+    app.config['PREDICTION_MEMO_PATH'] = os.environ.get('PREDICTION_MEMO_PATH') or None
+    app.config['PREDICTION_MEMO_SAVE_SECONDS'] = 60
+    memo.configure(app.config['PREDICTION_MEMO_ENTRIES'], app.config['PREDICTION_MEMO_PATH'],
+                   app.config['PREDICTION_MEMO_SAVE_SECONDS'])
+
+    # Sharded prediction for large cohorts: 1 worker keeps a single predict call
+    # (HGBR still uses its own OpenMP threads); with more workers each one is
+    # capped to PREDICT_THREADS_PER_WORKER OpenMP threads
+    app.config['PREDICT_WORKERS'] = int(os.environ.get('PREDICT_WORKERS', 1))
+    app.config['PREDICT_BACKEND'] = os.environ.get('PREDICT_BACKEND', 'thread')
+    app.config['PREDICT_THREADS_PER_WORKER'] = int(os.environ.get('PREDICT_THREADS_PER_WORKER', 1))
+    app.config['PREDICT_MIN_SHARD_ROWS'] = 10_000
+    init_predictor(app)
+
+    # Background job queue (local process pool, SQLite job store, results expire after the TTL;
+    # a job with no progress for the TTL is failed and gives up its slot)
+    app.config['JOB_FOLDER'] = os.path.join(app.root_path, 'jobs')
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    app.config['JOB_MAX_PENDING'] = 16
+    app.config['JOB_TTL_SECONDS'] = 3600
+    init_jobs(app)
+
+    # Prometheus metrics at /metrics. PROFILE_SAMPLE_RATE > 0 profiles that share of
+    # requests and dumps the ones slower than PROFILE_SLOW_SECONDS to PROFILE_FOLDER
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_SLOW_SECONDS'] = float(os.environ.get('PROFILE_SLOW_SECONDS', 1.0))
+    app.config['PROFILE_BACKEND'] = os.environ.get('PROFILE_BACKEND', 'cprofile')
+    app.config['PROFILE_FOLDER'] = os.path.join(app.root_path, 'profiles')
+    init_metrics(app)
+
+    # HTTP caching for the read-only pathway pages: weak ETags from the workbook version,
+    # the templates and the URL, 304s for matching conditional requests, and rendered
+    # bodies kept in an LRU of HTTP_CACHE_ENTRIES (0 keeps only the ETags). Text bodies
+    # of HTTP_COMPRESS_MIN_BYTES or more are gzipped (brotli when installed)
+    app.config['HTTP_CACHE_ENTRIES'] = int(os.environ.get('HTTP_CACHE_ENTRIES', 256))
+    app.config['HTTP_CACHE_MAX_BODY_BYTES'] = 8 * 1024 * 1024
+    app.config['HTTP_COMPRESS_MIN_BYTES'] = int(os.environ.get('HTTP_COMPRESS_MIN_BYTES', 1024))
+    init_http_cache(app)
+
+    # Cache and store counters reported on every scrape (the ingest and pathway
+    # modules register their own once they are imported)
+    metrics.register_collector('charts', charts.stats)
+    metrics.register_collector('uploads', lambda: {'uploads': spooler.stats()})
+    metrics.register_collector('http', responses.stats)
+    metrics.register_collector('results', lambda: {'result_store': results.stats()})
+    metrics.register_collector('predictions', lambda: {'memo': memo.stats()})
+    metrics.register_collector('models', registry.stats)
+    metrics.register_collector('predictor', lambda: {'executor': prediction_executor().stats()})
+
+    # Register feature Blueprints
+    app.register_blueprint(continuing_bp, url_prefix='/continuing')
+    app.register_blueprint(pathway_bp,    url_prefix='/pathway')
+    app.register_blueprint(ml_bp,         url_prefix='/ml')
+    app.register_blueprint(jobs_bp,       url_prefix='/jobs')
+
+    # Home redirects to continuing students
+    @app.route('/')
+    def index():
+        return redirect(url_for('continuing.home'))
+
+    return app
+
+
+# Entry point for running the app
+if __name__ == '__main__':
+    app = create_app()
+    app.run(debug=True)
@@ -0,0 +1,229 @@
+#########################################################################
+# Title  : Benchmark - Request paths end to end
+# Purpose: Drives create_app() through the Flask test client for the
+#          continuing, GPA prediction, failing-students download and pathway
+#          routes on generated data. Reports latency percentiles, peak RSS
+#          and per-stage GPA timings, and saves each run as JSON so runs can
+#          be compared.
+# Usage  : python benchmarks/bench_app.py --rows 1000 100000 --repeat 5
+#          python benchmarks/bench_app.py --compare benchmarks/results/<run>.json
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate_all
+
+
+# ─── Peak resident set size of this process so far (MB) ───
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarise(timings):
+    ms = np.asarray(timings) * 1000
+    return {
+        'runs': len(ms),
+        'first_ms': round(float(ms[0]), 2),
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(ms, 99)), 2),
+        'max_ms': round(float(ms.max()), 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def timed(call, repeat, cold=False):
+    from ingest import clear_cache
+
+    timings, response = [], None
+    for _ in range(repeat):
+        if cold:
+            clear_cache()
+        start = time.perf_counter()
+        response = call()
+        response.get_data()
+        timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{response.status_code} from benchmark request')
+        response.close()
+    return timings, response
+
+
+# ─── Request scenarios ───
+def bench_continuing(client, files, repeat, cold):
+    def call():
+        with open(files['current_students'], 'rb') as f1, open(files['future_students'], 'rb') as f2:
+            return client.post('/continuing/', data={
+                'file1': (f1, 'current_students.xlsx'), 'file2': (f2, 'future_students.xlsx')
+            }, content_type='multipart/form-data')
+    return summarise(timed(call, repeat, cold)[0])
+
+
+def bench_ml(client, files, repeat, cold):
+    def call():
+        with open(files['student_records'], 'rb') as fh:
+            name = os.path.basename(files['student_records'])
+            return client.post('/ml/', data={'datafile': (fh, name)}, content_type='multipart/form-data')
+    timings, response = timed(call, repeat, cold)
+    match = re.search(r'name="result_id" value="(\w+)"', response.get_data(as_text=True))
+    return summarise(timings), match.group(1) if match else None
+
+
+def bench_failures(client, result_id, repeat):
+    call = lambda: client.post('/ml/download-failures', data={'result_id': result_id})
+    return summarise(timed(call, repeat)[0])
+
+
+def bench_pathway(client, code, repeat):
+    return {
+        url: summarise(timed(lambda: client.get(url), repeat)[0])
+        for url in ('/pathway/', f'/pathway/course/{code}', f'/pathway/course/{code}/subjects')
+    }
+
+
+# ─── Per-stage GPA timings (parse, pivot, predict, assemble, render) outside the route ───
+def gpa_stages(app, path, repeat):
+    from flask import render_template
+    from model_registry import registry, bundle_subject_cols
+    from Predicting_gpa import read_marks, preprocess_input, bundle_means, gpa_bands
+    from ingest import clear_cache
+
+    stages = {'parse': [], 'pivot': [], 'predict': [], 'assemble': [], 'render': []}
+    with app.test_request_context('/ml/'):
+        bundle = registry.get('hist')
+        means, mark_median = bundle_means(bundle)
+        for _ in range(repeat):
+            clear_cache()
+            start = time.perf_counter()
+            df_raw = read_marks(path)
+            parsed = time.perf_counter()
+            ids, X = preprocess_input(df_raw, bundle_subject_cols(bundle), means=means, mark_median=mark_median)
+            pivoted = time.perf_counter()
+            pred = bundle['model'].predict(X)
+            predicted = time.perf_counter()
+            bands, _ = gpa_bands(pred)
+            results = ids[['Emplid', 'Name']].assign(**{
+                'Estimated GPA Range': bands, 'Predicted GPA': np.round(pred, 3).astype(np.float32)
+            })
+            assembled = time.perf_counter()
+            data_url = '/' if len(results) > app.config['SERVER_SIDE_ROWS'] else None
+            render_template('machine_learning.html', results=results, result_id='bench', band_summary=[],
+                            data_url=data_url)
+            rendered = time.perf_counter()
+
+            for name, a, b in (('parse', start, parsed), ('pivot', parsed, pivoted), ('predict', pivoted, predicted),
+                               ('assemble', predicted, assembled), ('render', assembled, rendered)):
+                stages[name].append(b - a)
+
+    return {name: round(float(np.median(t)) * 1000, 2) for name, t in stages.items()}
+
+
+def run(args):
+    from app import create_app
+
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'cold': args.cold,
+        'scales': {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix='bench_data_') as data_dir:
+        for n_rows in args.rows:
+            files = generate_all(os.path.join(data_dir, str(n_rows)), n_rows, args.programs, args.format)
+
+            app = create_app()
+            app.config['COURSE_DETAILS_PATH'] = files['course_details']
+            app.config['COURSE_SNAPSHOT_DIR'] = None
+            client = app.test_client()
+
+            scale = {}
+            scale['continuing'] = bench_continuing(client, files, args.repeat, args.cold)
+            scale['ml'], result_id = bench_ml(client, files, args.repeat, args.cold)
+            if result_id:
+                scale['ml_download_failures'] = bench_failures(client, result_id, args.repeat)
+            scale['pathway'] = bench_pathway(client, 'BP00000', args.repeat)
+            scale['gpa_stages_ms'] = gpa_stages(app, files['student_records'], args.repeat)
+            report['scales'][str(n_rows)] = scale
+            print_scale(n_rows, scale)
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"bench_{report['timestamp'].replace(':', '')}.json")
+    with open(path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f'\nSaved {path}')
+    return path
+
+
+def _rows(scale):
+    for name, value in scale.items():
+        if name == 'gpa_stages_ms':
+            continue
+        if name == 'pathway':
+            for url, stats in value.items():
+                yield url, stats
+        else:
+            yield name, value
+
+
+def print_scale(n_rows, scale):
+    print(f'\n── {n_rows} rows ──')
+    print(f"{'path':<36} {'first':>9} {'p50':>9} {'p95':>9} {'rss MB':>8}")
+    for name, stats in _rows(scale):
+        print(f"{name:<36} {stats['first_ms']:>9.1f} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['peak_rss_mb']:>8.0f}")
+    print('GPA stages (ms): ' + ', '.join(f'{k} {v:.1f}' for k, v in scale['gpa_stages_ms'].items()))
+
+
+# ─── Comparing p50 latencies of two saved runs ───
+def compare(old_path, new_path):
+    with open(old_path) as fh:
+        old = json.load(fh)
+    with open(new_path) as fh:
+        new = json.load(fh)
+
+    print(f"\n{'rows':>8} {'path':<36} {'old p50':>9} {'new p50':>9} {'change':>8}")
+    for n_rows, scale in new['scales'].items():
+        before = dict(_rows(old['scales'].get(n_rows, {})))
+        for name, stats in _rows(scale):
+            if name in before:
+                a, b = before[name]['p50_ms'], stats['p50_ms']
+                print(f'{n_rows:>8} {name:<36} {a:>9.1f} {b:>9.1f} {(b - a) / a * 100:>+7.0f}%')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end request benchmarks')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--programs', type=int, default=1000)
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cold', action='store_true', help='clear the upload parse cache before every request')
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results'))
+    parser.add_argument('--compare', help='earlier JSON run to compare this run against')
+    parser.add_argument('--against', help='compare --compare with this saved run instead of running again')
+    args = parser.parse_args()
+
+    if args.compare and args.against:
+        compare(args.compare, args.against)
+        return
+    path = run(args)
+    if args.compare:
+        compare(args.compare, path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#########################################################################
+# Title  : Benchmark - streamed continuing-students export
+# Purpose: Compares building a whole export in memory (to_csv into one
+#          string, to_excel into a BytesIO) with the streamed exports in
+#          exports.py (CSV blocks, constant-memory XLSX): time to the first
+#          byte, total time and peak traced memory on a merged result with
+#          the continuing table's sixteen columns.
+# Usage  : python benchmarks/bench_continuing_export.py --rows 50000 200000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from continuing_students import RESULT_COLUMNS, beautify_column
+from exports import csv_chunks, write_xlsx
+
+
+def make_result(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in RESULT_COLUMNS:
+        if col in ('application_id', 'applicant_id', 'rmit_student_id', 'admit_term'):
+            columns[col] = rng.integers(1_000, 9_999_999, n_rows)
+        elif col == 'commencement_date':
+            columns[col] = pd.Timestamp('2025-03-03') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+        else:
+            columns[col] = pd.Series(rng.integers(0, 500, n_rows)).map(f'{col} {{}}'.format)
+    df = pd.DataFrame(columns)
+    df.columns = [beautify_column(c) for c in df.columns]
+    return df
+
+
+# ─── Timing the first chunk and the whole export, then the traced peak in a second pass ───
+def measure(export):
+    start = time.perf_counter()
+    chunks = iter(export())
+    next(chunks)
+    first = time.perf_counter() - start
+    for _ in chunks:
+        pass
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in export():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak / 2**20
+
+
+def in_memory_csv(df):
+    yield df.to_csv(index=False)
+
+
+def in_memory_xlsx(df):
+    output = io.BytesIO()
+    df.to_excel(output, index=False, sheet_name='Continuing Students')
+    yield output.getvalue()
+
+
+def streamed_xlsx(df, work_dir):
+    path = os.path.join(work_dir, 'continuing_students.xlsx')
+    write_xlsx(df, path, 'Continuing Students')
+    with open(path, 'rb') as fh:
+        while chunk := fh.read(256 * 1024):
+            yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Continuing export benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[50_000, 200_000])
+    parser.add_argument('--skip-in-memory-xlsx', action='store_true', help='openpyxl is slow on large frames')
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'export':<16} {'first byte s':>12} {'total s':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_rows in args.rows:
+            df = make_result(n_rows)
+            cases = [('csv in memory', lambda: in_memory_csv(df)),
+                     ('csv streamed', lambda: csv_chunks(df)),
+                     ('xlsx streamed', lambda: streamed_xlsx(df, work_dir))]
+            if not args.skip_in_memory_xlsx:
+                cases.insert(2, ('xlsx in memory', lambda: in_memory_xlsx(df)))
+            for name, export in cases:
+                first, total, peak = measure(export)
+                print(f'{n_rows:>8} {name:<16} {first:>12.3f} {total:>8.2f} {peak:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#########################################################################
+# Title  : Benchmark - pathway graph search, reverse lookups and totals
+# Purpose: Builds the course graph from a generated CourseDetails workbook
+#          of each size and times search, autocomplete, "which programs
+#          include this subject" and per-program totals against the same
+#          answers computed by scanning the sheets with pandas.
+# Usage  : python benchmarks/bench_course_graph.py --programs 100 1000 5000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import make_course_details
+
+
+def per_call_us(call, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+# ─── Sheets as the workbook store holds them (blank cells as '', codes as text) ───
+def load_frames(n_programs):
+    from course_data import CODE_COLUMNS
+
+    frames = {}
+    for name, df in make_course_details(n_programs).items():
+        df = df.fillna('')
+        for col in CODE_COLUMNS.get(name, []):
+            df[col] = df[col].astype(str)
+        frames[name] = df
+    return frames
+
+
+# ─── The same questions answered by scanning the sheets ───
+def scan_search(frames, query):
+    names = pd.concat([frames['Courses']['Program_Code'] + ' ' + frames['Courses']['Course_Name'],
+                       frames['Subjects']['Subject_Code'] + ' ' + frames['Subjects']['Subject_Title']])
+    return names[names.str.lower().str.contains(query, regex=False)].head(10).tolist()
+
+
+def scan_reverse(frames, code):
+    links = frames['CourseSubjects']
+    return links.loc[links['Subject_Code'] == code, 'Program_Code'].tolist()
+
+
+def scan_summary(frames, code):
+    links = frames['CourseSubjects']
+    rows = links[links['Program_Code'] == code].merge(frames['Subjects'], on='Subject_Code', how='left')
+    return rows['CreditPoints'].sum(), (rows['Core_YN'] == 'Y').sum(), (rows['Elective_YN'] == 'Y').sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pathway graph benchmark')
+    parser.add_argument('--programs', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    from course_graph import CourseGraph
+
+    print(f"{'programs':>8} {'query':<14} {'graph us':>9} {'scan us':>9}")
+    for n_programs in args.programs:
+        frames = load_frames(n_programs)
+        start = time.perf_counter()
+        graph = CourseGraph(frames)
+        print(f"{n_programs:>8} {'build':<14} {(time.perf_counter() - start) * 1e6:>9.0f} {'':>9}")
+
+        program, subject = 'C00042', 'SUBJ00007'
+        cases = [
+            ('search', lambda: graph.search('se c0004'), lambda: scan_search(frames, 'se c0004')),
+            ('autocomplete', lambda: graph.autocomplete('cours c0004'), lambda: scan_search(frames, 'course c0004')),
+            ('reverse', lambda: graph.programs_with_subject(subject), lambda: scan_reverse(frames, subject)),
+            ('reverse, cold', lambda: graph._reverse.clear() or graph.programs_with_subject(subject),
+             lambda: scan_reverse(frames, subject)),
+            ('broad prefix', lambda: graph.autocomplete('course'), lambda: scan_search(frames, 'course')),
+            ('summary', lambda: graph.program_summary(program), lambda: scan_summary(frames, program)),
+        ]
+        for label, fast, scan in cases:
+            assert fast(), label
+            repeat = max(args.repeat // 100, 5)
+            print(f'{n_programs:>8} {label:<14} {per_call_us(fast, args.repeat):>9.1f} {per_call_us(scan, repeat):>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
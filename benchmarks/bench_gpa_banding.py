@@ -0,0 +1,75 @@
+#########################################################################
+# Title  : Benchmark - GPA banding and result assembly
+# Purpose: Compares the old per-row gpa_range/round list comprehensions with
+#          the vectorised np.digitize banding and compact result dtypes.
+# Usage  : python benchmarks/bench_gpa_banding.py --rows 1000 100000 1000000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Predicting_gpa import gpa_range, gpa_bands
+
+
+def make_batch(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = pd.DataFrame({
+        'Emplid': np.arange(n_rows).astype(str),
+        'Name': pd.Series(np.arange(n_rows)).map('Student {}'.format),
+    })
+    return ids, rng.uniform(0.5, 4.0, n_rows)
+
+
+# ─── Result assembly as it was before vectorising ───
+def assemble_rowwise(ids, pred):
+    results = ids[['Emplid', 'Name']].copy()
+    results['Estimated GPA Range'] = [gpa_range(p) for p in pred]
+    results['Predicted GPA'] = [round(p, 3) for p in pred]
+    counts = (sum(pred >= 2.0), sum(pred < 2.0))
+    return results, counts
+
+
+def assemble_vectorised(ids, pred):
+    bands, band_counts = gpa_bands(pred)
+    results = ids[['Emplid', 'Name']].copy()
+    results['Estimated GPA Range'] = bands
+    results['Predicted GPA'] = np.round(pred, 3).astype(np.float32)
+    return results, band_counts
+
+
+def best_of(func, ids, pred, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ids, pred)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GPA banding benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'row-wise (ms)':>14} {'vectorised (ms)':>16} {'speed-up':>9} {'MB before':>10} {'MB after':>9}")
+    for n_rows in args.rows:
+        ids, pred = make_batch(n_rows)
+        old = best_of(assemble_rowwise, ids, pred, args.repeat)
+        new = best_of(assemble_vectorised, ids, pred, args.repeat)
+
+        # Comparing the memory held by the two result columns
+        old_mb = assemble_rowwise(ids, pred)[0].iloc[:, 2:].memory_usage(deep=True).sum() / 1e6
+        new_mb = assemble_vectorised(ids, pred)[0].iloc[:, 2:].memory_usage(deep=True).sum() / 1e6
+        print(f'{n_rows:>8} {old * 1000:>14.1f} {new * 1000:>16.1f} {old / new:>8.1f}x {old_mb:>10.1f} {new_mb:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
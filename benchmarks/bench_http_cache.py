@@ -0,0 +1,56 @@
+#########################################################################
+# Title  : Benchmark - HTTP caching and compression of the pathway pages
+# Purpose: Requests each pathway page repeatedly through the test client
+#          with the response cache off, from the response cache, and as a
+#          conditional request answered with 304, and reports the time per
+#          request and the bytes sent with and without gzip.
+# Usage  : python benchmarks/bench_http_cache.py --repeat 200
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAGES = ['/pathway/', '/pathway/course/BP309', '/pathway/course/C6173/subjects', '/pathway/autocomplete?q=bach']
+
+
+def per_request_ms(client, path, repeat, headers=None):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        client.get(path, headers=headers or {})
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP caching benchmark')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    from app import create_app
+    from http_cache import responses
+
+    app = create_app()
+    client = app.test_client()
+    gzip_header = {'Accept-Encoding': 'gzip'}
+
+    print(f"{'page':<32} {'bytes':>7} {'gzip':>6} {'no cache ms':>11} {'cached ms':>9} {'304 ms':>7}")
+    for path in PAGES:
+        first = client.get(path)
+        size, etag = len(first.data), first.headers.get('ETag')
+        gzipped = len(client.get(path, headers=gzip_header).data)
+
+        responses.configure(0)
+        uncached = per_request_ms(client, path, args.repeat)
+        responses.configure(app.config['HTTP_CACHE_ENTRIES'], app.config['HTTP_CACHE_MAX_BODY_BYTES'])
+        client.get(path)
+        cached = per_request_ms(client, path, args.repeat)
+        revalidated = per_request_ms(client, path, args.repeat, {'If-None-Match': etag})
+        print(f'{path:<32} {size:>7} {gzipped:>6} {uncached:>11.2f} {cached:>9.2f} {revalidated:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#########################################################################
+# Title  : Benchmark - Parallel sharded prediction
+# Purpose: Measures how the prediction executor scales from 1 to N workers
+#          (thread and process pools, one OpenMP thread per worker) against
+#          a single model.predict call, and checks results match in order.
+# Usage  : python benchmarks/bench_parallel_predict.py --rows 1000000 --model hist
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Predicting_gpa  # registers the models
+from inference import PredictionExecutor
+from model_registry import registry, bundle_subject_cols
+
+
+def make_features(bundle, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = bundle_subject_cols(bundle)
+    X = rng.normal(0, 0.3, size=(n_rows, len(cols))).astype(np.float32)
+    X[rng.random(X.shape) < 0.7] = 0.0  # most subjects missing per student
+    return pd.DataFrame(X, columns=cols)
+
+
+def best_of(func, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Parallel prediction benchmark')
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--model', default='hist', choices=registry.names())
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))) or [1])
+    parser.add_argument('--backends', nargs='+', default=['thread', 'process'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bundle = registry.get(args.model)
+    X = make_features(bundle, args.rows)
+    base, expected = best_of(lambda: bundle['model'].predict(X), args.repeat)
+
+    print(f'{args.rows} rows, model {args.model!r}, {cores} cores')
+    print(f"{'backend':<8} {'workers':>7} {'ms':>9} {'speed-up':>9} {'match':>6}")
+    print(f"{'single':<8} {'-':>7} {base * 1000:>9.1f} {1.0:>8.2f}x {'-':>6}")
+    for backend in args.backends:
+        for workers in args.workers:
+            executor = PredictionExecutor(workers=workers, backend=backend, threads_per_worker=1,
+                                          min_shard_rows=1000)
+            executor.predict(args.model, X.iloc[:10_000])  # starting the pool outside the timing
+            elapsed, pred = best_of(lambda: executor.predict(args.model, X), args.repeat)
+            executor.shutdown()
+            match = np.allclose(pred, expected, rtol=0, atol=1e-9)
+            print(f'{backend:<8} {workers:>7} {elapsed * 1000:>9.1f} {base / elapsed:>8.2f}x {str(match):>6}')
+
+
+if __name__ == '__main__':
+    main()
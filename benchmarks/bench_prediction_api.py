@@ -0,0 +1,80 @@
+#########################################################################
+# Title  : Benchmark - bulk prediction API
+# Purpose: Posts generated (Emplid, Course, Mark) records to /ml/api/predict
+#          in each body format, with and without gzip, and to the HTML form
+#          at /ml/ for comparison. Reports latency and request / response
+#          sizes per call and checks every format returns one row per student.
+# Usage  : python benchmarks/bench_prediction_api.py --students 10000 50000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import gzip
+import io
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import COURSES_PER_STUDENT, make_student_records
+
+
+def best_of(call, repeat):
+    timings, response = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = call()
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data[:200]
+    return min(timings), response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk prediction API benchmark')
+    parser.add_argument('--students', type=int, nargs='+', default=[10_000, 50_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from app import create_app
+    import ingest
+    import payloads
+
+    app = create_app()
+    client = app.test_client()
+    formats = [fmt for fmt in payloads.FORMATS if fmt not in payloads.PYARROW_FORMATS or payloads.HAS_PYARROW]
+
+    print(f"{'students':>8} {'request':<22} {'ms':>8} {'sent MB':>8} {'received MB':>12}")
+    for n_students in args.students:
+        records = make_student_records(n_students * COURSES_PER_STUDENT)[['Emplid', 'Name', 'Course', 'Mark']]
+        expected = records['Emplid'].nunique()
+
+        # The HTML form: a rendered page, large results paged server-side (parse cache
+        # cleared so repeats are not served from it; the API does not cache)
+        upload = records.to_csv(index=False).encode()
+        seconds, response = best_of(lambda: ingest.clear_cache() or client.post(
+            '/ml/', data={'datafile': (io.BytesIO(upload), 'marks.csv')}, content_type='multipart/form-data'
+        ), args.repeat)
+        print(f"{n_students:>8} {'form /ml/':<22} {seconds * 1000:>8.0f} {len(upload) / 2**20:>8.2f} "
+              f"{len(response.data) / 2**20:>12.2f}")
+
+        for fmt in formats:
+            body = payloads.write_records(records, fmt)
+            for gzipped in (False, True):
+                data = gzip.compress(body) if gzipped else body
+                headers = {'Content-Encoding': 'gzip', 'Accept-Encoding': 'gzip'} if gzipped else {}
+                seconds, response = best_of(lambda: client.post(
+                    '/ml/api/predict', data=data, content_type=payloads.FORMATS[fmt], headers=headers
+                ), args.repeat)
+                out = gzip.decompress(response.data) if gzipped else response.data
+                rows = len(payloads.read_frame(out, fmt))
+                assert rows == expected, (fmt, rows, expected)
+                label = f"api {fmt}{' + gzip' if gzipped else ''}"
+                print(f"{n_students:>8} {label:<22} {seconds * 1000:>8.0f} {len(data) / 2**20:>8.2f} "
+                      f"{len(response.data) / 2**20:>12.2f}")
+
+
+if __name__ == '__main__':
+    np.seterr(all='ignore')
+    main()
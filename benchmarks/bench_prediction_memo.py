@@ -0,0 +1,72 @@
+#########################################################################
+# Title  : Benchmark - per-student prediction memo on re-uploads
+# Purpose: Predicts a generated cohort, then the same cohort with a share of
+#          students given a new mark, with and without the prediction memo,
+#          for both the .npz tree evaluator and the pickled estimator.
+#          Uses training-style subject means, so unchanged students keep
+#          identical feature rows. Checks memoised and direct predictions
+#          agree.
+# Usage  : python benchmarks/bench_prediction_memo.py --students 100000 --changed 0.02
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import COURSES_PER_STUDENT, make_student_records
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prediction memo benchmark')
+    parser.add_argument('--students', type=int, default=100_000)
+    parser.add_argument('--changed', type=float, nargs='+', default=[0.0, 0.02, 0.2])
+    args = parser.parse_args()
+
+    import joblib
+    from gpa_features import clean_marks, sparse_marks
+    from model_registry import file_digest
+    from prediction_memo import PredictionMemo
+    from tree_model import load_bundle
+    from Predicting_gpa import HIST_NPZ_PATH, HIST_PATH, predict_results
+
+    records = make_student_records(args.students * COURSES_PER_STUDENT)[['Emplid', 'Name', 'Course', 'Mark']]
+    rng = np.random.default_rng(1)
+
+    print(f"{'model':<8} {'changed':>8} {'direct s':>9} {'memo s':>8} {'hits':>8} {'misses':>8} {'max |diff|':>11}")
+    for label, path, loader in (('npz', HIST_NPZ_PATH, load_bundle), ('pickle', HIST_PATH, joblib.load)):
+        bundle = loader(path)
+        cols = [c for c in bundle['subject_cols'] if c != 'GPA']
+        means = sparse_marks(clean_marks(records), cols).means()
+        memo = PredictionMemo(max_entries=4 * args.students)
+
+        # First upload fills the memo
+        model = memo.wrap(bundle['model'], file_digest(path))
+        predict_results(records, bundle, means=means, model=model)
+
+        for share in args.changed:
+            df = records.copy()
+            students = df['Emplid'].unique()
+            picked = rng.choice(students, int(len(students) * share), replace=False)
+            first_mark = df['Emplid'].isin(picked) & ~df['Emplid'].duplicated()
+            df.loc[first_mark, 'Mark'] = (df.loc[first_mark, 'Mark'] + 7) % 101
+
+            direct, (expected, _, _) = timed(lambda: predict_results(df, bundle, means=means))
+            model = memo.wrap(bundle['model'], file_digest(path))
+            memoised, (got, _, _) = timed(lambda: predict_results(df, bundle, means=means, model=model))
+            diff = np.abs(expected['Predicted GPA'].to_numpy() - got['Predicted GPA'].to_numpy()).max()
+            print(f'{label:<8} {share:>8.0%} {direct:>9.2f} {memoised:>8.2f} {model.hits:>8} {model.misses:>8} {diff:>11.1e}')
+
+
+if __name__ == '__main__':
+    main()
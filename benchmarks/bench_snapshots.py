@@ -0,0 +1,140 @@
+#########################################################################
+# Title  : Benchmark - retention across many term snapshots
+# Purpose: Generates a chain of term snapshots with churn, then compares
+#          them pairwise the way the two-file page does (every adjacent
+#          pair plus the first term against each later one) and with the
+#          multi-snapshot store in one pass, cold and with one new term
+#          added to cached ones. Checks both give the same counts, and that
+#          batches overflowing the shared ID dictionary (alone, or with
+#          concurrent batches starting it over) finish instead of looping.
+# Usage  : python benchmarks/bench_snapshots.py --terms 12 --students 100000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ─── Term snapshots as CSV bytes: each term drops a share of students and enrols new ones ───
+def make_terms(n_terms, n_students, churn=0.15, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(3_000_000, 3_000_000 + n_students)
+    next_id = ids[-1] + 1
+    bodies = []
+    for _ in range(n_terms):
+        bodies.append(pd.DataFrame({'Student No': rng.permutation(ids), 'Program': 'BP309'}).to_csv(index=False).encode())
+        kept = ids[rng.random(len(ids)) > churn]
+        n_new = len(ids) - len(kept)
+        ids = np.concatenate([kept, np.arange(next_id, next_id + n_new)])
+        next_id += n_new
+    return bodies
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+# ─── The two-file route's path, once per pair: read both sheets, then match ───
+def pairwise(bodies):
+    from ingest import read_upload
+    from student_matching import match_students
+
+    def pair(a, b):
+        df1 = read_upload(a, usecols=['Student No'])
+        df2 = read_upload(b, usecols=['Student No'])
+        return match_students(df1, df2, key='Student No').continuing
+
+    adjacent = [pair(bodies[i], bodies[i + 1]) for i in range(len(bodies) - 1)]
+    cohort = [pair(bodies[0], body) for body in bodies[1:]]
+    return adjacent, cohort
+
+
+# ─── Regression: batches larger than the dictionary are refused, and resets never livelock ───
+def check_overflow(timeout=30):
+    from snapshots import SnapshotError, SnapshotStore
+
+    def term(first, n=100):
+        return pd.DataFrame({'Student No': np.arange(first, first + n)}).to_csv(index=False).encode()
+
+    def finishes(func):
+        worker = threading.Thread(target=func, daemon=True)
+        worker.start()
+        worker.join(timeout)
+        assert not worker.is_alive(), 'load_many did not finish'
+
+    # Three disjoint 100-ID terms can never fit a 250-ID dictionary
+    store = SnapshotStore(max_ids=250)
+    errors = []
+
+    def overflow():
+        try:
+            store.load_many([(term(i * 100), f'term {i}') for i in range(3)])
+        except SnapshotError as e:
+            errors.append(e)
+
+    finishes(overflow)
+    assert errors, 'an oversized batch should raise SnapshotError'
+
+    # Two terms fit after one reset; concurrent batches keep starting each other over
+    store = SnapshotStore(max_ids=250)
+    batches = [[(term(b * 1000 + i * 100), f'term {i}') for i in range(2)] for b in range(4)]
+    counts = []
+
+    def alternate(batch):
+        for _ in range(20):
+            counts.append(len(store.load_many(batch)))
+
+    workers = [threading.Thread(target=alternate, args=(batch,), daemon=True) for batch in batches]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout)
+        assert not worker.is_alive(), 'concurrent load_many did not finish'
+    assert counts == [2] * 80 and store.size <= store.max_ids
+    print(f'overflow checks passed ({store.generation} dictionary generations)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-snapshot retention benchmark')
+    parser.add_argument('--terms', type=int, default=12)
+    parser.add_argument('--students', type=int, nargs='+', default=[20_000, 100_000])
+    args = parser.parse_args()
+
+    import ingest
+    from snapshots import SnapshotStore, compare_snapshots
+
+    check_overflow()
+    print(f"{'students':>8} {'terms':>5} {'approach':<26} {'seconds':>8}")
+    for n_students in args.students:
+        bodies = make_terms(args.terms, n_students)
+
+        ingest.clear_cache()
+        seconds, (adjacent, cohort) = timed(lambda: pairwise(bodies))
+        print(f"{n_students:>8} {args.terms:>5} {'pairwise (parse cache on)':<26} {seconds:>8.2f}")
+
+        # Cold: every term read and encoded once
+        ingest.clear_cache()
+        store = SnapshotStore()
+        labelled = [(body, f'term {i}') for i, body in enumerate(bodies)]
+        seconds, result = timed(lambda: compare_snapshots(store.load_many(labelled)))
+        print(f"{n_students:>8} {args.terms:>5} {'one pass, cold':<26} {seconds:>8.2f}")
+        assert result.continuing.tolist() == adjacent and result.cohort_retained[1:].tolist() == cohort
+
+        # A new term on top of the cached ones: only that term is read and encoded
+        extra = make_terms(args.terms + 1, n_students)[-1]
+        ingest.clear_cache()
+        seconds, _ = timed(lambda: compare_snapshots(store.load_many(labelled + [(extra, 'new term')])))
+        print(f"{n_students:>8} {args.terms + 1:>5} {'one pass, one new term':<26} {seconds:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#########################################################################
+# Title  : Benchmark - Sparse vs pivot_table feature building
+# Purpose: Compares the old pivot_table + dense normalise feature builder with
+#          the sparse (student, subject) coordinate builder at several
+#          catalogue widths: build time, peak traced memory, and peak memory
+#          when only one block of students is densified at a time.
+# Usage  : python benchmarks/bench_sparse_pivot.py --students 100000 --courses 50 500 2000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gpa_features import FEATURE_DTYPE, sparse_marks, subject_means, normalise
+
+
+def make_marks(n_students, n_courses, per_student, seed=0):
+    rng = np.random.default_rng(seed)
+    n_rows = n_students * per_student
+    return pd.DataFrame({
+        'Emplid': np.repeat(np.arange(n_students), per_student).astype(str),
+        'Name': np.repeat([f'Student {i}' for i in range(n_students)], per_student),
+        'Course': pd.Series(rng.integers(0, n_courses, n_rows)).map('C{:04d}'.format),
+        'Mark': rng.integers(0, 101, n_rows).astype(float),
+    })
+
+
+# ─── The feature builder as it was: dense pivot, then batch mean-fill ───
+def pivot_dense(df):
+    pivot = df.pivot_table(index=['Emplid', 'Name'], columns='Course', values='Mark', aggfunc='first')
+    X = pivot.to_numpy(dtype=FEATURE_DTYPE)
+    return normalise(X, subject_means(X))
+
+
+def sparse_dense(df):
+    marks = sparse_marks(df)
+    return marks.dense(marks.means())
+
+
+def sparse_blocked(df, block_rows):
+    marks = sparse_marks(df)
+    means = marks.means()
+    checksum = 0.0
+    for X in marks.blocks(means, block_rows):
+        checksum += float(np.nansum(X))
+    return checksum
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sparse feature builder benchmark')
+    parser.add_argument('--students', type=int, default=100_000)
+    parser.add_argument('--courses', type=int, nargs='+', default=[50, 500, 2000])
+    parser.add_argument('--per-student', type=int, default=8)
+    parser.add_argument('--block-rows', type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f'{args.students} students, {args.per_student} courses each, blocks of {args.block_rows}')
+    print(f"{'courses':>8} {'pivot ms':>9} {'pivot MB':>9} {'sparse ms':>10} {'sparse MB':>10} "
+          f"{'blocked ms':>11} {'blocked MB':>11} {'match':>6}")
+    for n_courses in args.courses:
+        df = make_marks(args.students, n_courses, args.per_student)
+        old_s, old_mb, old = measure(pivot_dense, df)
+        new_s, new_mb, new = measure(sparse_dense, df)
+        blk_s, blk_mb, _ = measure(sparse_blocked, df, args.block_rows)
+        match = np.array_equal(old, new, equal_nan=True)
+        print(f'{n_courses:>8} {old_s * 1000:>9.0f} {old_mb:>9.0f} {new_s * 1000:>10.0f} {new_mb:>10.0f} '
+              f'{blk_s * 1000:>11.0f} {blk_mb:>11.0f} {str(match):>6}')
+
+
+if __name__ == '__main__':
+    main()
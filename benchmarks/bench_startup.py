@@ -0,0 +1,97 @@
+#########################################################################
+# Title  : Benchmark - application startup budget
+# Purpose: Measures `import app; create_app()` in a fresh interpreter (wall
+#          time, peak RSS and which heavy libraries got imported), then the
+#          first request to each blueprint. Exits non-zero when startup is
+#          over the given time / memory budget or a heavy library was
+#          imported before the first request, so it can gate CI.
+# Usage  : python benchmarks/bench_startup.py --max-seconds 0.5 --max-rss-mb 60
+#          PRELOAD_MODELS=1 python benchmarks/bench_startup.py --allow-heavy
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries whose import alone costs noticeable time or memory
+HEAVY = ('pandas', 'numpy', 'joblib', 'sklearn', 'scipy', 'matplotlib', 'openpyxl', 'pyarrow')
+
+# First request to each blueprint, after startup
+FIRST_REQUESTS = ('/continuing/', '/pathway/', '/ml/', '/metrics')
+
+# ─── Fresh interpreter: create the app, then hit each blueprint once ───
+PROBE = '''
+import json, os, re, sys, time
+os.chdir({root!r})
+sys.path.insert(0, {root!r})
+
+def hwm_mb():
+    # VmHWM belongs to this exec'd image; ru_maxrss would include the parent's peak
+    with open('/proc/self/status') as fh:
+        return int(re.search(r'VmHWM:\\s+(\\d+)', fh.read()).group(1)) / 1024
+
+def heavy():
+    return [m for m in {heavy!r} if m in sys.modules]
+
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+application = app.create_app()
+report = {{'import_seconds': imported, 'startup_seconds': time.perf_counter() - start,
+           'rss_mb': hwm_mb(), 'heavy': heavy(), 'requests': []}}
+
+client = application.test_client()
+for path in {paths!r}:
+    start = time.perf_counter()
+    status = client.get(path).status_code
+    report['requests'].append({{'path': path, 'status': status, 'seconds': time.perf_counter() - start,
+                                'rss_mb': hwm_mb(), 'heavy': heavy()}})
+print(json.dumps(report))
+'''
+
+
+def probe():
+    code = PROBE.format(root=ROOT, heavy=HEAVY, paths=FIRST_REQUESTS)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Application startup benchmark')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=None, help='budget for import + create_app()')
+    parser.add_argument('--max-rss-mb', type=float, default=None, help='budget for peak RSS after create_app()')
+    parser.add_argument('--allow-heavy', action='store_true', help='do not fail when create_app() imports pandas etc.')
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: r['startup_seconds'])
+
+    print(f"PRELOAD_MODELS={os.environ.get('PRELOAD_MODELS', '0')}")
+    print(f"{'stage':<16} {'status':>6} {'seconds':>8} {'peak RSS MB':>12}  heavy modules loaded")
+    print(f"{'import app':<16} {'':>6} {best['import_seconds']:>8.3f} {'':>12}")
+    print(f"{'create_app()':<16} {'':>6} {best['startup_seconds']:>8.3f} {best['rss_mb']:>12.0f}  "
+          f"{', '.join(best['heavy']) or '-'}")
+    for req in best['requests']:
+        print(f"{req['path']:<16} {req['status']:>6} {req['seconds']:>8.3f} {req['rss_mb']:>12.0f}  "
+              f"{', '.join(req['heavy']) or '-'}")
+
+    failures = []
+    if args.max_seconds is not None and best['startup_seconds'] > args.max_seconds:
+        failures.append(f"startup took {best['startup_seconds']:.3f}s (budget {args.max_seconds}s)")
+    if args.max_rss_mb is not None and best['rss_mb'] > args.max_rss_mb:
+        failures.append(f"peak RSS {best['rss_mb']:.0f} MB (budget {args.max_rss_mb} MB)")
+    if best['heavy'] and not args.allow_heavy:
+        failures.append(f"create_app() imported {', '.join(best['heavy'])}")
+    for failure in failures:
+        print('OVER BUDGET:', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
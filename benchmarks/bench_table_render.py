@@ -0,0 +1,87 @@
+#########################################################################
+# Title  : Benchmark - Pathway table rendering
+# Purpose: Compares the old row-wise apply/url_for + to_html path with the
+#          vectorised table_render helper on synthetic PathwayOverview rows.
+# Usage  : python benchmarks/bench_table_render.py --rows 1000 10000 50000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import url_for
+from app import create_app
+from table_render import build_links, render_table
+
+
+# ─── Synthetic PathwayOverview sheet ───
+def make_overview(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = pd.Series([f'BP{i:05d}' for i in range(n_rows)])
+    names = pd.Series([f'Bachelor of Studies & Practice {i}' for i in range(n_rows)])
+    names[rng.random(n_rows) < 0.1] = ''
+    return pd.DataFrame({'Course_Code': codes, 'Final_Course': names})
+
+
+# ─── Rendering path used before the helper existed ───
+def render_apply(df):
+    df = df.copy()
+    df['code_raw'] = df['Course_Code'].astype(str)
+    df['name_raw'] = df['Final_Course'].astype(str)
+    df['Course_Code'] = df['code_raw'].apply(
+        lambda code: f'<a href="{url_for("pathway.course_details", code=code)}">{code}</a>'
+    )
+
+    def build_name_link(row):
+        if row['name_raw'].strip():
+            return f'<a href="{url_for("pathway.course_details", code=row["code_raw"])}">{row["name_raw"]}</a>'
+        return ''
+
+    df['Final_Course'] = df.apply(build_name_link, axis=1)
+    display_df = df[['Course_Code', 'Final_Course']]
+    display_df.columns = display_df.columns.str.replace('_', ' ')
+    return display_df.to_html(index=False, classes='table table-bordered data-table', escape=False)
+
+
+# ─── Rendering path through table_render ───
+def render_vectorised(df):
+    display_df = pd.DataFrame({
+        'Course Code': build_links(df['Course_Code'], 'pathway.course_details'),
+        'Final Course': build_links(df['Course_Code'], 'pathway.course_details', text=df['Final_Course']),
+    })
+    return render_table(display_df, raw_columns=display_df.columns)
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pathway table rendering benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.test_request_context('/pathway/'):
+        print(f"{'rows':>8} {'apply+to_html (ms)':>20} {'vectorised (ms)':>16} {'speed-up':>9}")
+        for n_rows in args.rows:
+            df = make_overview(n_rows)
+            old = best_of(render_apply, df, args.repeat)
+            new = best_of(render_vectorised, df, args.repeat)
+            print(f'{n_rows:>8} {old * 1000:>20.1f} {new * 1000:>16.1f} {old / new:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#########################################################################
+# Title  : Benchmark - NumPy tree evaluator vs the pickled estimator
+# Purpose: Compares serving the GPA model from the .npz tree export with
+#          unpickling the HistGradientBoostingRegressor: cold start (import +
+#          load + first prediction in a fresh process), resident memory,
+#          single-student latency and batch throughput, and checks that the
+#          predictions agree.
+# Usage  : python benchmarks/bench_tree_model.py --rows 1000 100000 1000000
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODEL_DIR = os.path.join(ROOT, 'Machine Learning')
+PKL_PATH = os.path.join(MODEL_DIR, 'gpa_hist_model_cp.pkl')
+NPZ_PATH = os.path.join(MODEL_DIR, 'gpa_hist_model.npz')
+
+# ─── Fresh interpreter: import, load and predict one row, then report time and RSS ───
+COLD_START = '''
+import json, re, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import numpy as np, pandas as pd
+if {npz!r}:
+    from tree_model import load_bundle
+    bundle = load_bundle({path!r})
+else:
+    import joblib
+    bundle = joblib.load({path!r})
+cols = [c for c in bundle['subject_cols'] if c != 'GPA']
+bundle['model'].predict(pd.DataFrame(np.zeros((1, len(cols)), dtype=np.float32), columns=cols))
+seconds = time.perf_counter() - start
+# VmHWM belongs to this exec'd image; ru_maxrss would include the parent's peak
+with open('/proc/self/status') as fh:
+    hwm_kb = int(re.search(r'VmHWM:\s+(\d+)', fh.read()).group(1))
+print(json.dumps({{'seconds': seconds, 'rss_mb': hwm_kb / 1024,
+                   'sklearn': 'sklearn' in sys.modules}}))
+'''
+
+
+def cold_start(path, npz, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', COLD_START.format(root=ROOT, npz=npz, path=path)],
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(r['seconds'] for r in runs), min(r['rss_mb'] for r in runs), runs[0]['sklearn']
+
+
+def make_features(cols, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0, 0.3, size=(n_rows, len(cols))).astype(np.float32)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return pd.DataFrame(X, columns=cols)
+
+
+def best_of(func, X, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tree evaluator benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import joblib
+    from tree_model import export_hgbr, load_bundle
+
+    # Exporting the current pickle when no .npz has been written yet
+    bundle = joblib.load(PKL_PATH)
+    cols = [c for c in bundle['subject_cols'] if c != 'GPA']
+    if not os.path.exists(NPZ_PATH):
+        export_hgbr(bundle['model'], NPZ_PATH, cols, bundle.get('subject_means'), bundle.get('mark_median'))
+    model, evaluator = bundle['model'], load_bundle(NPZ_PATH)['model']
+
+    print(f"{'cold start':<12} {'seconds':>8} {'peak RSS MB':>12} {'sklearn imported':>17}")
+    for name, path, npz in (('pickle', PKL_PATH, False), ('npz', NPZ_PATH, True)):
+        seconds, rss, sk = cold_start(path, npz, args.repeat)
+        print(f'{name:<12} {seconds:>8.2f} {rss:>12.0f} {str(sk):>17}')
+
+    print(f"\n{'rows':>8} {'sklearn ms':>11} {'numpy ms':>9} {'speed-up':>9} {'max |diff|':>11}")
+    single = make_features(cols, 1)
+    old, expected = best_of(model.predict, single, args.repeat * 10)
+    new, got = best_of(evaluator.predict, single, args.repeat * 10)
+    print(f'{1:>8} {old * 1000:>11.3f} {new * 1000:>9.3f} {old / new:>8.1f}x {np.abs(expected - got).max():>11.1e}')
+    for n_rows in args.rows:
+        X = make_features(cols, n_rows)
+        old, expected = best_of(model.predict, X, args.repeat)
+        new, got = best_of(evaluator.predict, X, args.repeat)
+        print(f'{n_rows:>8} {old * 1000:>11.1f} {new * 1000:>9.1f} {old / new:>8.1f}x {np.abs(expected - got).max():>11.1e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#########################################################################
+# Title  : Benchmark - many large uploads at once
+# Purpose: Starts the app under a threaded WSGI server in a child process,
+#          then has several clients stream a different generated mark file
+#          each to /ml/ at the same time. Reports wall time, the statuses
+#          returned and the server's peak RSS above its warmed-up baseline.
+#          --root points at another checkout to compare before and after.
+# Usage  : python benchmarks/bench_uploads.py --clients 8 --students 60000
+#          UPLOAD_PARSE_CONCURRENCY=0 python benchmarks/bench_uploads.py
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import http.client
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.datagen import COURSES_PER_STUDENT, make_student_records
+
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+CHUNK_BYTES = 1024 * 1024
+
+# ─── The app under werkzeug's threaded server; prints its port once listening ───
+SERVER = '''
+import os, sys, warnings
+warnings.filterwarnings('ignore')
+os.chdir({root!r})
+sys.path.insert(0, {root!r})
+from werkzeug.serving import make_server
+from app import create_app
+server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+print(server.server_port, flush=True)
+server.serve_forever()
+'''
+
+
+def hwm_mb(pid):
+    with open(f'/proc/{pid}/status') as fh:
+        return int(re.search(r'VmHWM:\s+(\d+)', fh.read()).group(1)) / 1024
+
+
+def reset_hwm(pid):
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux)
+    with open(f'/proc/{pid}/clear_refs', 'w') as fh:
+        fh.write('5')
+
+
+# ─── Streaming a multipart upload from disk, never holding the file in memory ───
+def post_file(port, path, results, index):
+    boundary = uuid.uuid4().hex
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="datafile"; '
+            f'filename="{os.path.basename(path)}"\r\nContent-Type: text/csv\r\n\r\n').encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+
+    def body():
+        yield head
+        with open(path, 'rb') as fh:
+            while chunk := fh.read(CHUNK_BYTES):
+                yield chunk
+        yield tail
+
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    conn.request('POST', '/ml/', body=body(), headers={
+        'Content-Type': f'multipart/form-data; boundary={boundary}',
+        'Content-Length': str(len(head) + os.path.getsize(path) + len(tail)),
+    })
+    response = conn.getresponse()
+    response.read()
+    results[index] = response.status
+    conn.close()
+
+
+def make_files(n_files, n_students):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    paths = []
+    for i in range(n_files):
+        path = os.path.join(DATA_DIR, f'upload_{n_students}_{i}.csv')
+        if not os.path.exists(path):
+            # A different seed per client so no upload is served from the parse cache
+            make_student_records(n_students * COURSES_PER_STUDENT, seed=i)[['Emplid', 'Name', 'Course', 'Mark']] \
+                .to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent upload memory benchmark')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--students', type=int, default=60_000)
+    parser.add_argument('--root', default=ROOT, help='checkout to serve (defaults to this one)')
+    args = parser.parse_args()
+
+    paths = make_files(args.clients + 1, args.students)
+    server = subprocess.Popen([sys.executable, '-c', SERVER.format(root=os.path.abspath(args.root))],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        port = int(server.stdout.readline())
+
+        # Warm-up upload loads pandas and the model, so the peak below is the uploads alone
+        post_file(port, paths[-1], [None], 0)
+        reset_hwm(server.pid)
+        baseline = hwm_mb(server.pid)
+
+        results = [None] * args.clients
+        threads = [threading.Thread(target=post_file, args=(port, paths[i], results, i)) for i in range(args.clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        peak = hwm_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    size = os.path.getsize(paths[0]) / 2**20
+    print(f"{'clients':>7} {'file MB':>8} {'seconds':>8} {'baseline MB':>12} {'peak MB':>8} {'growth MB':>10}  statuses")
+    print(f'{args.clients:>7} {size:>8.1f} {seconds:>8.2f} {baseline:>12.0f} {peak:>8.0f} {peak - baseline:>10.0f}  '
+          f'{sorted(set(results))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#########################################################################
+# Title  : Benchmark - Synthetic data generators
+# Purpose: Writes mock student-record, current/future-student and
+#          CourseDetails workbooks at a chosen scale, replacing the manual
+#          GenerateData notebooks for benchmarking.
+# Usage  : python benchmarks/datagen.py --rows 100000 --out /tmp/bench-data
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Marks recorded per student in the generated student records
+COURSES_PER_STUDENT = 8
+
+# Share of current students that also appear in the future-students sheet
+CONTINUING_SHARE = 0.6
+
+PROGRAMS = ['BP309', 'BP214', 'BH068', 'BH012', 'AD006', 'AD013', 'C6173', 'C5413']
+CAMPUSES = ['City Campus', 'Brunswick', 'Bundoora']
+
+
+# ─── Writing a frame by extension (XLSX via XlsxWriter's constant-memory mode) ───
+def write_frame(df, path, sheet_name='Sheet1'):
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False, sheet_name=sheet_name, engine='xlsxwriter',
+                    engine_kwargs={'options': {'constant_memory': True}})
+    return path
+
+
+# ─── Subject codes the GPA model was trained on (synthetic codes if it cannot load) ───
+def model_subjects():
+    try:
+        from Predicting_gpa import HIST_PATH
+        import joblib
+        from model_registry import bundle_subject_cols
+        return list(bundle_subject_cols(joblib.load(HIST_PATH)))
+    except Exception:
+        return [f'COMM{2700 + i}' for i in range(40)]
+
+
+# ─── Student records: one row per (student, course) mark ───
+def make_student_records(n_rows, subjects=None, seed=0):
+    rng = np.random.default_rng(seed)
+    subjects = np.asarray(subjects if subjects is not None else model_subjects())
+    n_students = max(n_rows // COURSES_PER_STUDENT, 1)
+
+    emplid = np.repeat(np.arange(10001, 10001 + n_students), COURSES_PER_STUDENT)[:n_rows]
+    course = subjects[rng.integers(0, len(subjects), size=len(emplid))]
+    mark = np.clip(rng.normal(62, 15, size=len(emplid)), 0, 100).round().astype(int)
+    program = np.asarray(PROGRAMS)[emplid % len(PROGRAMS)]
+
+    return pd.DataFrame({
+        'Emplid': emplid.astype(str),
+        'Name': pd.Series(emplid).map('Student {}'.format),
+        'Career': 'Undergraduate',
+        'Acad Program': program,
+        'Course': course,
+        'Mark': mark,
+        'Grade': np.where(mark >= 50, 'PA', 'NN'),
+        'Unit Value': 12,
+        'Program Status': 'Pending',
+    })
+
+
+# ─── Current and future student sheets with a known overlap ───
+def make_continuing_pair(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    current_ids = rng.choice(np.arange(1_000_000, 9_999_999), size=n_rows, replace=False)
+
+    current = pd.DataFrame({
+        'Student No': current_ids,
+        'Family Name': [f'Family{i}' for i in range(n_rows)],
+        'Given Names': [f'Given{i}' for i in range(n_rows)],
+        'Program': np.asarray(PROGRAMS)[rng.integers(0, len(PROGRAMS), n_rows)],
+        'Campus': 'AUSCY',
+        'Status': 'AC',
+    })
+
+    # Future sheet: a share of the current students plus new applicants
+    n_cont = int(n_rows * CONTINUING_SHARE)
+    new_ids = np.arange(10_000_000, 10_000_000 + (n_rows - n_cont))
+    future_ids = np.concatenate([rng.choice(current_ids, size=n_cont, replace=False), new_ids])
+    future = pd.DataFrame({
+        'application id': np.arange(100000, 100000 + n_rows),
+        'applicant_id': rng.integers(1000, 99999, n_rows),
+        'rmit_student_id': future_ids,
+        'forename': [f'Fore{i}' for i in range(n_rows)],
+        'surname': [f'Sur{i}' for i in range(n_rows)],
+        'Currently enrolled program plan': np.asarray(PROGRAMS)[rng.integers(0, len(PROGRAMS), n_rows)],
+        'Currently enrolled program name': [f'Program {i % 50}' for i in range(n_rows)],
+        'College': 'STEM',
+        'change_of_program': rng.choice(['Y', None], size=n_rows),
+        'admit_term': 2510,
+        'plan_code': 'BP032P24D2',
+        'plan_name': 'Bachelor of Nursing',
+        'campus': 'AUSBU',
+        'commencement_date': '2025-03-03',
+        'application_status': 'Waiting for Progression',
+        'fund_source': 'BY',
+    })
+    return current, future
+
+
+# ─── CourseDetails workbook: overview, child courses and their subjects ───
+def make_course_details(n_programs, subjects_per_program=8, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = [f'BP{i:05d}' for i in range(n_programs)]
+
+    overview = pd.DataFrame({
+        'Course_Code': codes,
+        'Final_Course': [f'Bachelor of Studies {i}' for i in range(n_programs)],
+        'Study_Level': 'Higher Education',
+        'Pathway_Options': 2,
+        'Interest_Area': 'Design',
+        'Guaranteed_YN': 'N',
+    })
+
+    # Each program has itself and one diploma as pathway courses
+    children = [(code, child) for code in codes for child in (code, 'C' + code[2:])]
+    courses = pd.DataFrame({
+        'Pathway_Code': np.nan,
+        'Parent_Program_Code': [p for p, _ in children],
+        'Program_Code': [c for _, c in children],
+        'Previous_Program_Code': '',
+        'Course_Name': [f'Course {c}' for _, c in children],
+        'Years': 1.5,
+        'Credits_Transferred': 96.0,
+        'Credits_Needed': 288.0,
+    })
+
+    n_subjects = max(subjects_per_program * 4, 50)
+    subject_codes = [f'SUBJ{i:05d}' for i in range(n_subjects)]
+    subjects = pd.DataFrame({
+        'Subject_Code': subject_codes,
+        'Subject_Title': [f'Subject <{i}> & Studio' for i in range(n_subjects)],
+        'CreditPoints': 12,
+        'Hours': np.nan,
+        'Campus': np.asarray(CAMPUSES)[np.arange(n_subjects) % len(CAMPUSES)],
+    })
+
+    program_codes = courses['Program_Code'].to_numpy()
+    course_subjects = pd.DataFrame({
+        'Program_Code': np.repeat(program_codes, subjects_per_program),
+        'Subject_Code': np.asarray(subject_codes)[rng.integers(0, n_subjects, len(program_codes) * subjects_per_program)],
+        'Course_Year': 1,
+        'Core_YN': 'Y',
+        'Elective_YN': 'N',
+    })
+    return {'PathwayOverview': overview, 'Courses': courses, 'Subjects': subjects, 'CourseSubjects': course_subjects}
+
+
+def write_course_details(sheets, path):
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, index=False, sheet_name=name)
+    return path
+
+
+# ─── Writing every dataset for one scale into a folder ───
+def generate_all(out_dir, n_rows, n_programs=1000, fmt='xlsx', seed=0):
+    os.makedirs(out_dir, exist_ok=True)
+    current, future = make_continuing_pair(n_rows, seed=seed)
+    return {
+        'student_records': write_frame(make_student_records(n_rows, seed=seed),
+                                       os.path.join(out_dir, f'student_records_{n_rows}.{fmt}')),
+        'current_students': write_frame(current, os.path.join(out_dir, f'current_students_{n_rows}.{fmt}')),
+        'future_students': write_frame(future, os.path.join(out_dir, f'future_students_{n_rows}.{fmt}')),
+        'course_details': write_course_details(make_course_details(n_programs, seed=seed),
+                                               os.path.join(out_dir, f'CourseDetails_{n_programs}.xlsx')),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic benchmark data generator')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000])
+    parser.add_argument('--programs', type=int, default=1000)
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx')
+    parser.add_argument('--out', default='benchmarks/data')
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        for name, path in generate_all(args.out, n_rows, args.programs, args.format).items():
+            print(f'{n_rows:>8} {name:<18} {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#########################################################################
+# Title  : Chart Rendering
+# Purpose: Draws the GPA category bar chart and the continuing-students
+#          donut as inline SVG, cached by their input counts so identical
+#          results are never re-rendered. matplotlib is only imported when
+#          PNG output is explicitly requested.
+#########################################################################
+
+# Importing necessary libraries
+import base64
+import io
+import math
+from functools import lru_cache
+
+# Number of distinct charts kept per renderer
+CHART_CACHE_SIZE = 128
+
+# RMIT palette used by both charts
+COLORS = ('#161E87', '#A61C30')
+FONT = 'DejaVu Sans, Arial, sans-serif'
+
+GPA_LABELS = ('Eligible GPA', 'At-Risk GPA')
+
+
+# ─── Round tick step (1, 2 or 5 x 10^k) giving at most max_ticks intervals ───
+def _tick_step(top, max_ticks=8):
+    magnitude = 1
+    while True:
+        for factor in (1, 2, 5):
+            if factor * magnitude * max_ticks >= top:
+                return factor * magnitude
+        magnitude *= 10
+
+
+def _text(x, y, value, size=12, anchor='middle', weight='normal', fill='#000', extra=''):
+    return (f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" text-anchor="{anchor}" '
+            f'font-weight="{weight}" fill="{fill}"{extra}>{value}</text>')
+
+
+# ─── Two-bar chart of eligible vs at-risk predictions ───
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def gpa_bar_svg(count_pass: int, count_fail: int) -> str:
+    width, height = 640, 480
+    left, right, top, bottom = 80, 30, 50, 50
+    plot_w, plot_h = width - left - right, height - top - bottom
+
+    counts = (count_pass, count_fail)
+    step = _tick_step(max(counts))
+    y_max = max(step * math.ceil(max(counts) / step), step)
+    scale = plot_h / y_max
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+        f'font-family="{FONT}" role="img" aria-label="Students by GPA Category" style="max-width: 500px; width: 100%;">',
+        '<rect width="100%" height="100%" fill="white"/>',
+        _text(left + plot_w / 2, top - 18, 'Students by GPA Category', size=14),
+        _text(22, top + plot_h / 2, 'Number of Students', extra=f' transform="rotate(-90 22 {top + plot_h / 2:.1f})"'),
+    ]
+
+    # Y axis ticks and labels
+    for value in range(0, y_max + 1, step):
+        y = top + plot_h - value * scale
+        parts.append(f'<line x1="{left - 5}" y1="{y:.1f}" x2="{left}" y2="{y:.1f}" stroke="#000"/>')
+        parts.append(_text(left - 8, y + 4, value, size=11, anchor='end'))
+
+    # Bars with their category labels and counts
+    slot = plot_w / len(counts)
+    bar_w = slot * 0.8
+    for i, (label, count, color) in enumerate(zip(GPA_LABELS, counts, COLORS)):
+        x = left + slot * i + (slot - bar_w) / 2
+        h = count * scale
+        parts.append(f'<rect x="{x:.1f}" y="{top + plot_h - h:.1f}" width="{bar_w:.1f}" height="{h:.1f}" fill="{color}">'
+                     f'<title>{label}: {count}</title></rect>')
+        parts.append(_text(x + bar_w / 2, top + plot_h + 20, label))
+
+    parts.append(f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" fill="none" stroke="#000"/>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+# ─── Annular wedge between two angles (degrees, counter-clockwise from 3 o'clock) ───
+def _wedge(cx, cy, r_out, r_in, start, end):
+    if end - start >= 360:
+        # A full ring cannot be drawn as one arc, so split it in two
+        mid = start + 180
+        return _wedge(cx, cy, r_out, r_in, start, mid) + _wedge(cx, cy, r_out, r_in, mid, end)
+
+    def point(r, angle):
+        rad = math.radians(angle)
+        return cx + r * math.cos(rad), cy - r * math.sin(rad)
+
+    large = 1 if end - start > 180 else 0
+    (x1, y1), (x2, y2) = point(r_out, start), point(r_out, end)
+    (x3, y3), (x4, y4) = point(r_in, end), point(r_in, start)
+    return (f'M{x1:.2f},{y1:.2f} A{r_out},{r_out} 0 {large} 0 {x2:.2f},{y2:.2f} '
+            f'L{x3:.2f},{y3:.2f} A{r_in},{r_in} 0 {large} 1 {x4:.2f},{y4:.2f} Z')
+
+
+# ─── Donut of continuing vs non-continuing students ───
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def continuing_donut_svg(count_cont: int, count_non_cont: int) -> str:
+    # Extra width leaves room for the outside labels
+    width, height, radius = 800, 560, 220
+    hole = 0.55 * radius
+    cx, cy = width / 2, height / 2
+    total = count_cont + count_non_cont
+    pct_cont = (count_cont / total) * 100 if total > 0 else 0
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+        f'font-family="{FONT}" role="img" aria-label="Continuing Chart" style="max-width: 600px; width: 100%;">',
+    ]
+
+    # Wedges start at 12 o'clock and run counter-clockwise, as in the original pie
+    labels = (f'Continuing ({count_cont})', f'Non-Continuing ({count_non_cont})')
+    angle = 90.0
+    for count, label, color in zip((count_cont, count_non_cont), labels, COLORS):
+        if total == 0 or count == 0:
+            continue
+        sweep = 360.0 * count / total
+        parts.append(f'<path d="{_wedge(cx, cy, radius, hole, angle, angle + sweep)}" fill="{color}">'
+                     f'<title>{label}</title></path>')
+
+        # Percentage inside the ring and the label just outside it
+        mid = math.radians(angle + sweep / 2)
+        r_pct = (radius + hole) / 2
+        parts.append(_text(cx + r_pct * math.cos(mid), cy - r_pct * math.sin(mid) + 4,
+                           f'{100 * count / total:.1f}%', weight='bold', fill='white'))
+        r_lab = radius * 1.1
+        anchor = 'start' if math.cos(mid) > 0.01 else 'end' if math.cos(mid) < -0.01 else 'middle'
+        parts.append(_text(cx + r_lab * math.cos(mid), cy - r_lab * math.sin(mid) + 4, label,
+                           anchor=anchor, weight='bold', fill='#333'))
+        angle += sweep
+
+    parts.append(_text(cx, cy - 4, f'{pct_cont:.0f}%', size=16, weight='bold'))
+    parts.append(_text(cx, cy + 16, 'Continuing', size=16, weight='bold'))
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+# ─── Raster fallbacks (base64 PNG) — matplotlib is imported on first use only ───
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _png_base64(plt, fig, **savefig_kwargs):
+    img_buf = io.BytesIO()
+    plt.savefig(img_buf, format='png', **savefig_kwargs)
+    plt.close(fig)
+    return base64.b64encode(img_buf.getvalue()).decode('utf-8')
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def gpa_bar_png(count_pass: int, count_fail: int) -> str:
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    ax.bar(list(GPA_LABELS), [count_pass, count_fail], color=list(COLORS))
+    ax.set_ylabel('Number of Students')
+    ax.set_title('Students by GPA Category')
+    plt.tight_layout()
+    return _png_base64(plt, fig, dpi=150)
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def continuing_donut_png(count_cont: int, count_non_cont: int) -> str:
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(6, 6))
+    ax.pie(
+        [count_cont, count_non_cont],
+        labels=[f'Continuing ({count_cont})', f'Non-Continuing ({count_non_cont})'],
+        colors=list(COLORS),
+        autopct='%1.1f%%',
+        startangle=90,
+        pctdistance=0.75,
+        labeldistance=1.1,
+        textprops={'fontsize': 12, 'color': 'white', 'weight': 'bold'}
+    )
+
+    # Adding center circle for donut effect and the percentage annotation
+    fig.gca().add_artist(plt.Circle((0, 0), 0.55, fc='white'))
+    total = count_cont + count_non_cont
+    pct_cont = (count_cont / total) * 100 if total > 0 else 0
+    ax.text(0, 0, f'{pct_cont:.0f}%\nContinuing', ha='center', va='center', fontsize=16, color='black', weight='bold')
+    ax.axis('equal')
+    return _png_base64(plt, fig, bbox_inches='tight', pad_inches=0.1, dpi=200)
+
+
+# ─── Entry points used by the routes and background jobs ───
+RENDERERS = {
+    ('gpa', 'svg'): gpa_bar_svg,
+    ('gpa', 'png'): gpa_bar_png,
+    ('continuing', 'svg'): continuing_donut_svg,
+    ('continuing', 'png'): continuing_donut_png,
+}
+
+
+def render_chart(kind, counts, fmt='svg'):
+    """Returns SVG markup, or a base64 PNG when fmt is 'png'."""
+    return RENDERERS[(kind, fmt)](*(int(c) for c in counts))
+
+
+def stats():
+    return {
+        f'{kind}_{fmt}': fn.cache_info()._asdict() for (kind, fmt), fn in RENDERERS.items()
+    }
@@ -0,0 +1,268 @@
+#########################################################################
+# Title  : Course Details Workbook Store
+# Purpose: Loads the CourseDetails.xlsx sheets once per process and keeps
+#          them in memory, reloading only when the workbook changes on disk.
+#          An optional pickle snapshot lets a cold worker skip openpyxl.
+#########################################################################
+
+# Importing necessary libraries
+import os
+import pickle
+import threading
+from collections import OrderedDict
+import pandas as pd
+from metrics import metrics
+
+# Sheets used by the pathway blueprint
+SHEETS = ('PathwayOverview', 'Courses', 'CourseSubjects', 'Subjects')
+
+# Code columns are always compared as text in the routes, so they are stored as str
+CODE_COLUMNS = {
+    'PathwayOverview': ['Course_Code'],
+    'Courses': ['Parent_Program_Code', 'Program_Code', 'Previous_Program_Code'],
+    'CourseSubjects': ['Program_Code', 'Subject_Code'],
+    'Subjects': ['Subject_Code'],
+}
+
+# Bumping this invalidates every snapshot written by an older layout
+SNAPSHOT_FORMAT = 1
+
+# Subject columns joined onto the CourseSubjects mapping for the drill-down page
+SUBJECT_JOIN_COLUMNS = ['Subject_Code', 'Subject_Title', 'CreditPoints', 'Hours', 'Campus']
+
+# Number of rendered table fragments kept per data version
+FRAGMENT_CACHE_SIZE = 256
+
+
+class FragmentCache:
+    """Small thread-safe LRU for rendered HTML fragments."""
+
+    def __init__(self, maxsize=FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class CourseIndex:
+    """Code-keyed lookups built once per workbook version."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+        # Courses grouped by their parent program code
+        courses = frames['Courses']
+        self.courses_by_parent = {
+            code: grp for code, grp in courses.groupby('Parent_Program_Code', sort=False)
+        }
+
+        # CourseSubjects joined with Subjects ahead of time, grouped by program code
+        subjects = frames['Subjects'][SUBJECT_JOIN_COLUMNS]
+        joined = frames['CourseSubjects'].merge(subjects, on='Subject_Code', how='left')
+        joined = joined.rename(columns={'Subject_Title': 'Subject_Name'})
+        self.subjects_by_program = {
+            code: grp.reset_index(drop=True) for code, grp in joined.groupby('Program_Code', sort=False)
+        }
+
+        # Rendered fragments live and die with this data version
+        self.fragments = FragmentCache()
+
+        # Search / aggregate graph, built on the first query against this version
+        self._graph = None
+        self._graph_lock = threading.Lock()
+
+    def courses_for(self, parent_code):
+        return self.courses_by_parent.get(parent_code)
+
+    def subjects_for(self, program_code):
+        return self.subjects_by_program.get(program_code)
+
+    def graph(self):
+        graph = self._graph
+        if graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    from course_graph import CourseGraph
+
+                    self._graph = CourseGraph(self.frames)
+                graph = self._graph
+        return graph
+
+
+class CourseDetailsStore:
+    """Process-wide cache of the CourseDetails workbook sheets."""
+
+    def __init__(self, path, snapshot_dir=None):
+        self.path = path
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+        self._frames = None
+        self._version = None
+        self._index = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.snapshot_loads = 0
+
+    # ─── Data version (mtime + size) of the workbook on disk ───
+    def current_version(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    @property
+    def version(self):
+        return self._version
+
+    # ─── Returning all sheets, parsing the workbook only when it changed ───
+    def sheets(self):
+        version = self.current_version()
+
+        # Fast path without the lock: frames are replaced atomically on reload
+        frames = self._frames
+        if frames is not None and self._version == version:
+            self.hits += 1
+            return frames
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._frames is not None and self._version == version:
+                self.hits += 1
+                return self._frames
+
+            self.misses += 1
+            if self._frames is not None:
+                self.reloads += 1
+
+            frames = self._read_snapshot(version)
+            if frames is None:
+                frames = self._parse_workbook()
+                self._write_snapshot(version, frames)
+
+            self._frames = frames
+            self._version = version
+            return frames
+
+    def sheet(self, name):
+        return self.sheets()[name]
+
+    # ─── Returning the code index for the current workbook version ───
+    def index(self):
+        frames = self.sheets()
+        idx = self._index
+        if idx is not None and idx.frames is frames:
+            return idx
+
+        with self._lock:
+            if self._index is None or self._index.frames is not frames:
+                self._index = CourseIndex(frames)
+            return self._index
+
+    # ─── Reading every sheet through openpyxl in a single pass ───
+    def _parse_workbook(self):
+        frames = {}
+        with pd.ExcelFile(self.path) as xls:
+            for name in SHEETS:
+                df = pd.read_excel(xls, name).fillna('')
+                for col in CODE_COLUMNS.get(name, []):
+                    if col in df.columns:
+                        df[col] = df[col].astype(str)
+                frames[name] = df
+        return frames
+
+    # ─── Optional on-disk snapshot so cold workers skip openpyxl ───
+    def _snapshot_path(self):
+        if not self.snapshot_dir:
+            return None
+        base = os.path.splitext(os.path.basename(self.path))[0]
+        return os.path.join(self.snapshot_dir, f'{base}.pkl')
+
+    def _read_snapshot(self, version):
+        snap_path = self._snapshot_path()
+        if not snap_path or not os.path.exists(snap_path):
+            return None
+        try:
+            with open(snap_path, 'rb') as fh:
+                payload = pickle.load(fh)
+        except Exception as e:
+            print("Snapshot read failed:", e)
+            return None
+
+        # Ignoring snapshots taken from a different workbook version
+        if payload.get('format') != SNAPSHOT_FORMAT or tuple(payload.get('version', ())) != version:
+            return None
+
+        self.snapshot_loads += 1
+        return payload['frames']
+
+    def _write_snapshot(self, version, frames):
+        snap_path = self._snapshot_path()
+        if not snap_path:
+            return
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            tmp_path = f'{snap_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as fh:
+                pickle.dump({'format': SNAPSHOT_FORMAT, 'version': version, 'frames': frames},
+                            fh, protocol=pickle.HIGHEST_PROTOCOL)
+            # Atomic swap so concurrent workers never read a half-written file
+            os.replace(tmp_path, snap_path)
+        except Exception as e:
+            print("Snapshot write failed:", e)
+
+    # ─── Counters for monitoring ───
+    def stats(self):
+        return {
+            'path': self.path,
+            'version': list(self._version) if self._version else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'snapshot_loads': self.snapshot_loads,
+            'fragment_hits': self._index.fragments.hits if self._index else 0,
+            'fragment_misses': self._index.fragments.misses if self._index else 0,
+            'graph': self._index._graph.stats() if self._index and self._index._graph else None,
+        }
+
+
+# ─── One store per workbook path, shared by the whole process ───
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, snapshot_dir=None):
+    key = os.path.abspath(path)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = CourseDetailsStore(key, snapshot_dir=snapshot_dir)
+                _stores[key] = store
+    return store
+
+
+# Workbook cache counters on /metrics, one entry per loaded workbook
+metrics.register_collector('pathway', lambda: {
+    os.path.basename(path): store.stats() for path, store in list(_stores.items())
+})
@@ -0,0 +1,325 @@
+#########################################################################
+# Title  : Course Pathway Graph
+# Purpose: Pathway (parent program) → program → subject graph built once
+#          per CourseDetails version. Edges are stored as CSR adjacency
+#          arrays in both directions, so "which programs include this
+#          subject" is a slice rather than a sheet scan. Per-program and
+#          per-pathway aggregates (credit points, hours, core / elective
+#          counts) are computed up front, and a prefix and trigram index
+#          over codes, course names and subject titles answers search and
+#          autocomplete.
+#########################################################################
+
+# Importing necessary libraries
+import heapq
+import re
+import threading
+from bisect import bisect_left, bisect_right
+import numpy as np
+import pandas as pd
+
+# Node kinds, in the order results are ranked when they match equally well
+KINDS = ('pathway', 'program', 'subject')
+
+# Upper bound on results returned by one search
+MAX_RESULTS = 50
+
+_WORD = re.compile(r'\w+')
+
+
+def _numbers(series):
+    return pd.to_numeric(series, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+# Codes and names as plain text (the workbook pads some names with non-breaking spaces)
+def _text(value):
+    return '' if value is None or (isinstance(value, float) and np.isnan(value)) else ' '.join(str(value).split())
+
+
+# ─── CSR adjacency: ptr[i]:ptr[i + 1] slices the targets of node i ───
+def _csr(src, dst, n_nodes):
+    order = np.lexsort((dst, src))
+    ptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=ptr[1:])
+    return ptr, dst[order].astype(np.int32), order
+
+
+class _Nodes:
+    """Codes of one node kind, with their ids and display names."""
+
+    def __init__(self):
+        self.codes = []
+        self.names = []
+        self.ids = {}
+
+    def add(self, code, name=''):
+        node = self.ids.get(code)
+        if node is None:
+            node = self.ids[code] = len(self.codes)
+            self.codes.append(code)
+            self.names.append(name)
+        elif name and not self.names[node]:
+            self.names[node] = name
+        return node
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class CourseGraph:
+    """Adjacency arrays, aggregates and the search index for one workbook version."""
+
+    def __init__(self, frames):
+        overview, courses = frames['PathwayOverview'], frames['Courses']
+        links, subjects = frames['CourseSubjects'], frames['Subjects']
+
+        # ─── Nodes: pathways, programs and subjects keyed by code ───
+        self.pathways, self.programs, self.subjects = _Nodes(), _Nodes(), _Nodes()
+        for code, name in zip(overview['Course_Code'], overview['Final_Course']):
+            self.pathways.add(_text(code), _text(name))
+        for code, name in zip(courses['Program_Code'], courses['Course_Name']):
+            self.programs.add(_text(code), _text(name))
+        for code, name in zip(subjects['Subject_Code'], subjects['Subject_Title']):
+            self.subjects.add(_text(code), _text(name))
+
+        # ─── Edges: pathway → program from Courses, program → subject from CourseSubjects ───
+        pathway_src = np.array([self.pathways.add(_text(c)) for c in courses['Parent_Program_Code']], dtype=np.int32)
+        pathway_dst = np.array([self.programs.add(_text(c)) for c in courses['Program_Code']], dtype=np.int32)
+        program_src = np.array([self.programs.add(_text(c)) for c in links['Program_Code']], dtype=np.int32)
+        subject_dst = np.array([self.subjects.add(_text(c)) for c in links['Subject_Code']], dtype=np.int32)
+
+        n_pathways, n_programs, n_subjects = len(self.pathways), len(self.programs), len(self.subjects)
+        self.pathway_ptr, self.pathway_programs, _ = _csr(pathway_src, pathway_dst, n_pathways)
+        self.program_parent_ptr, self.program_parents, _ = _csr(pathway_dst, pathway_src, n_programs)
+        self.program_ptr, self.program_subjects, edge_order = _csr(program_src, subject_dst, n_programs)
+        self.subject_ptr, self.subject_programs, reverse_order = _csr(subject_dst, program_src, n_subjects)
+
+        # Edge attributes in program → subject order, and the same edges seen from the subject side
+        core = (links['Core_YN'].astype(str).str.strip().str.upper() == 'Y').to_numpy()
+        elective = (links['Elective_YN'].astype(str).str.strip().str.upper() == 'Y').to_numpy()
+        year = _numbers(links['Course_Year'])
+        self.edge_core, self.edge_elective, self.edge_year = core[edge_order], elective[edge_order], year[edge_order]
+        self.reverse_edges = np.argsort(edge_order)[reverse_order]
+
+        # ─── Subject attributes by node id (subjects missing from the Subjects sheet count as 0) ───
+        rows = np.array([self.subjects.ids[_text(c)] for c in subjects['Subject_Code']], dtype=np.int64)
+        first = ~pd.Series(rows).duplicated().to_numpy()
+        self.subject_credits = np.zeros(n_subjects)
+        self.subject_hours = np.zeros(n_subjects)
+        self.subject_credits[rows[first]] = _numbers(subjects['CreditPoints'])[first]
+        self.subject_hours[rows[first]] = _numbers(subjects['Hours'])[first]
+        self.subject_campus = [''] * n_subjects
+        for node, campus in zip(rows[first], subjects['Campus'].to_numpy()[first]):
+            self.subject_campus[node] = _text(campus)
+
+        # Pathway codes above each program, for the reverse lookups
+        self._program_pathways = [
+            [self.pathways.codes[p] for p in self.program_parents[self.program_parent_ptr[i]:self.program_parent_ptr[i + 1]].tolist()]
+            for i in range(n_programs)
+        ]
+        # Reverse lookups built on first request: at most one per subject, shared by request threads
+        self._reverse = {}
+        self._reverse_lock = threading.Lock()
+
+        self._aggregate(courses)
+        self._index()
+
+    # ─── Aggregates per program, then per pathway over its programs ───
+    def _aggregate(self, courses):
+        n_programs = len(self.programs)
+        edge_program = np.repeat(np.arange(n_programs), np.diff(self.program_ptr))
+        credits = np.bincount(edge_program, self.subject_credits[self.program_subjects], n_programs)
+        hours = np.bincount(edge_program, self.subject_hours[self.program_subjects], n_programs)
+        core = np.bincount(edge_program, self.edge_core, n_programs)
+        elective = np.bincount(edge_program, self.edge_elective, n_programs)
+
+        # Years and transferred credits from each program's first row in Courses
+        details = {}
+        for code, years, transferred in zip(courses['Program_Code'], _numbers(courses['Years']),
+                                            _numbers(courses['Credits_Transferred'])):
+            details.setdefault(_text(code), (years, transferred))
+
+        self.program_summaries = []
+        for node, code in enumerate(self.programs.codes):
+            years, transferred = details.get(code, (0, 0))
+            self.program_summaries.append({
+                'code': code,
+                'name': self.programs.names[node],
+                'years': _number(years),
+                'credits_transferred': _number(transferred),
+                'subjects': int(self.program_ptr[node + 1] - self.program_ptr[node]),
+                'credit_points': _number(credits[node]),
+                'hours': _number(hours[node]),
+                'core': int(core[node]),
+                'elective': int(elective[node]),
+            })
+
+        self.pathway_summaries = []
+        for node, code in enumerate(self.pathways.codes):
+            members = self.pathway_programs[self.pathway_ptr[node]:self.pathway_ptr[node + 1]]
+            distinct = np.unique(np.concatenate(
+                [self.program_subjects[self.program_ptr[p]:self.program_ptr[p + 1]] for p in members] or [np.array([], np.int32)]
+            ))
+            self.pathway_summaries.append({
+                'code': code,
+                'name': self.pathways.names[node],
+                'programs': [self.program_summaries[p] for p in members],
+                'distinct_subjects': len(distinct),
+                'credit_points': _number(credits[members].sum()),
+                'hours': _number(hours[members].sum()),
+                'core': int(core[members].sum()),
+                'elective': int(elective[members].sum()),
+            })
+
+    # ─── Search index: sorted words and codes for prefixes, trigram postings over code + name ───
+    # Entry ids follow (kind, code) order, so the smallest ids in a group are the best ranked
+    def _index(self):
+        self.entries = []
+        for kind, nodes in zip(KINDS, (self.pathways, self.programs, self.subjects)):
+            self.entries.extend(sorted((kind, code, name) for code, name in zip(nodes.codes, nodes.names)))
+        self._kind_entries = {kind: set() for kind in KINDS}
+        for entry, (kind, _, _) in enumerate(self.entries):
+            self._kind_entries[kind].add(entry)
+
+        self._texts = [f'{code} {name}'.lower() for _, code, name in self.entries]
+        self._entry_words = [frozenset(_WORD.findall(text)) for text in self._texts]
+        words = sorted((word, entry) for entry, entry_words in enumerate(self._entry_words) for word in entry_words)
+        self._words, self._word_entries = [w for w, _ in words], [e for _, e in words]
+        codes = sorted((code.lower(), entry) for entry, (_, code, _) in enumerate(self.entries))
+        self._codes, self._code_entries = [c for c, _ in codes], [e for _, e in codes]
+
+        trigrams = {}
+        for entry, text in enumerate(self._texts):
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                trigrams.setdefault(gram, []).append(entry)
+        self._trigrams = {gram: frozenset(entries) for gram, entries in trigrams.items()}
+
+    # Entries whose sorted key starts with the prefix: one contiguous slice
+    @staticmethod
+    def _prefix_range(keys, prefix, exact=False):
+        start = bisect_left(keys, prefix)
+        return start, bisect_right(keys, prefix) if exact else bisect_left(keys, prefix + '\U0010ffff')
+
+    def _code_prefixed(self, prefix, exact=False):
+        start, end = self._prefix_range(self._codes, prefix, exact)
+        return set(self._code_entries[start:end])
+
+    def _word_matches(self, prefix):
+        start, end = self._prefix_range(self._words, prefix)
+        return end - start
+
+    def _word_prefixed(self, prefix):
+        start, end = self._prefix_range(self._words, prefix)
+        return set(self._word_entries[start:end])
+
+    # Exact code, then code prefix, then a word prefix, then anywhere; ties by kind and code.
+    # Codes and index words hold no spaces, so a multi-word query is ranked on its first word
+    def _rank(self, found, query, kind, limit):
+        if kind:
+            found = found & self._kind_entries[kind]
+        limit = min(limit, MAX_RESULTS)
+        lead = query.split()[0] if query.split() else ''
+        groups = (
+            lambda: self._code_prefixed(lead, exact=True),
+            lambda: self._code_prefixed(lead),
+            lambda: self._word_prefixed(lead),
+            lambda: found,
+        )
+        ranked, seen = [], set()
+        for group in groups:
+            if len(ranked) >= limit:
+                break
+            best = heapq.nsmallest(limit - len(ranked), (group() & found) - seen)
+            ranked.extend(best)
+            seen.update(best)
+        return [{'kind': self.entries[e][0], 'code': self.entries[e][1], 'name': self.entries[e][2]} for e in ranked]
+
+    # ─── Autocomplete: every query word must start a word of the code or name ───
+    def autocomplete(self, query, kind=None, limit=10):
+        # Narrowest word first (range sizes come from the bisects alone); the rest only filter
+        words = sorted(set(_WORD.findall(query.lower())), key=self._word_matches)
+        if not words:
+            return []
+        found = self._word_prefixed(words[0])
+        for word in words[1:]:
+            found = {e for e in found if any(w.startswith(word) for w in self._entry_words[e])}
+        return self._rank(found, ' '.join(_WORD.findall(query.lower())), kind, limit)
+
+    # ─── Search: the query anywhere in the code or name (trigrams, then a substring check) ───
+    def search(self, query, kind=None, limit=10):
+        query = ' '.join(query.lower().split())
+        if len(query) < 3:
+            return self.autocomplete(query, kind, limit)
+
+        postings = []
+        for gram in {query[i:i + 3] for i in range(len(query) - 2)}:
+            entries = self._trigrams.get(gram)
+            if entries is None:
+                return []
+            postings.append(entries)
+        postings.sort(key=len)
+        found = postings[0].intersection(*postings[1:])
+        return self._rank({e for e in found if query in self._texts[e]}, query, kind, limit)
+
+    # ─── Reverse lookups (each subject's answer is kept once built; the graph never changes) ───
+    def programs_with_subject(self, code):
+        node = self.subjects.ids.get(code)
+        if node is None:
+            return None
+        with self._reverse_lock:
+            found = self._reverse.get(node)
+        if found is not None:
+            return found
+
+        start, end = self.subject_ptr[node], self.subject_ptr[node + 1]
+        edges = self.reverse_edges[start:end]
+        programs = []
+        for program, core, elective, year in zip(self.subject_programs[start:end].tolist(), self.edge_core[edges].tolist(),
+                                                 self.edge_elective[edges].tolist(), self.edge_year[edges].tolist()):
+            programs.append({
+                'code': self.programs.codes[program],
+                'name': self.programs.names[program],
+                'pathways': self._program_pathways[program],
+                'core': core,
+                'elective': elective,
+                'course_year': _number(year),
+            })
+        found = {
+            'code': code,
+            'title': self.subjects.names[node],
+            'credit_points': _number(self.subject_credits[node]),
+            'hours': _number(self.subject_hours[node]),
+            'campus': self.subject_campus[node],
+            'programs': programs,
+        }
+        # Two threads may build the same subject; both return the first one kept
+        with self._reverse_lock:
+            return self._reverse.setdefault(node, found)
+
+    def pathways_with_program(self, code):
+        node = self.programs.ids.get(code)
+        return None if node is None else self._program_pathways[node]
+
+    # ─── Precomputed aggregates ───
+    def program_summary(self, code):
+        node = self.programs.ids.get(code)
+        return None if node is None else self.program_summaries[node]
+
+    def pathway_summary(self, code):
+        node = self.pathways.ids.get(code)
+        return None if node is None else self.pathway_summaries[node]
+
+    def stats(self):
+        return {
+            'pathways': len(self.pathways),
+            'programs': len(self.programs),
+            'subjects': len(self.subjects),
+            'pathway_edges': len(self.pathway_programs),
+            'subject_edges': len(self.program_subjects),
+            'trigrams': len(self._trigrams),
+        }
@@ -0,0 +1,156 @@
+#########################################################################
+# Title  : DataTables Server-Side Protocol
+# Purpose: Answers DataTables' server-side requests (paging, sorting,
+#          global search and per-column filters) from a cached result frame
+#          so pages no longer ship every row as HTML.
+#########################################################################
+
+# Importing necessary libraries
+import json
+import threading
+import numpy as np
+import pandas as pd
+from flask import Response
+from table_render import escape_series, widen_floats
+
+# Upper bound on rows returned for one page (DataTables sends -1 for "All")
+MAX_PAGE_ROWS = 1000
+
+
+class TableView:
+    """A result frame plus lazily built search text and sort orders.
+
+    When the displayed cells hold markup (links), ``text`` is a frame of the
+    same shape with the plain values that searching and sorting should use.
+    """
+
+    def __init__(self, df: pd.DataFrame, text: pd.DataFrame = None):
+        self.df = df.reset_index(drop=True)
+        self.text = self.df if text is None else text.reset_index(drop=True).set_axis(self.df.columns, axis=1)
+        self._lower = {}
+        self._order = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def columns(self):
+        return list(self.df.columns)
+
+    # ─── Lower-cased text of one column (non-breaking spaces as spaces), built once for every search ───
+    def _text(self, i):
+        text = self._lower.get(i)
+        if text is None:
+            col = self.text.iloc[:, i]
+            text = col.where(col.notna(), '').astype(str).str.lower().str.replace('\xa0', ' ', regex=False).to_numpy(dtype=object)
+            with self._lock:
+                self._lower[i] = text
+        return text
+
+    # ─── Stable ascending row order of one column, built once ───
+    def _sorted(self, i):
+        order = self._order.get(i)
+        if order is None:
+            col = self.text.iloc[:, i]
+            if not pd.api.types.is_numeric_dtype(col):
+                col = col.where(col.notna(), '').astype(str)
+            order = col.argsort(kind='stable').to_numpy()
+            with self._lock:
+                self._order[i] = order
+        return order
+
+    def _contains(self, i, needle):
+        return pd.Series(self._text(i)).str.contains(needle, regex=False).to_numpy()
+
+    # ─── Applying global search and column filters ───
+    def filter_mask(self, search, column_search):
+        mask = np.ones(len(self.df), dtype=bool)
+        if search:
+            needle = search.lower()
+            hit = np.zeros(len(self.df), dtype=bool)
+            for i in range(len(self.df.columns)):
+                hit |= self._contains(i, needle)
+            mask &= hit
+        for i, value in column_search.items():
+            if value and 0 <= i < len(self.df.columns):
+                mask &= self._contains(i, value.lower())
+        return mask
+
+    # ─── Row positions for the requested page ───
+    def query(self, start=0, length=10, search='', column_search=None, order=None):
+        mask = self.filter_mask(search, column_search or {})
+        order = [(i, d) for i, d in (order or []) if 0 <= i < len(self.df.columns)]
+
+        if len(order) == 1:
+            # Single-column sort reuses the cached order and keeps only matching rows
+            i, direction = order[0]
+            rows = self._sorted(i)
+            if direction == 'desc':
+                rows = rows[::-1]
+            rows = rows[mask[rows]]
+        else:
+            rows = np.flatnonzero(mask)
+            if order:
+                # Multi-column sort on the filtered rows (index labels are row positions)
+                by = [self.df.columns[i] for i, _ in order]
+                ascending = [d != 'desc' for _, d in order]
+                rows = self.text.iloc[rows].sort_values(by=by, ascending=ascending, kind='stable').index.to_numpy()
+
+        filtered = len(rows)
+        if length is None or length < 0:
+            length = MAX_PAGE_ROWS
+        page = rows[start:start + min(length, MAX_PAGE_ROWS)]
+        return page, filtered
+
+
+# ─── Parsing DataTables' query-string parameters ───
+def parse_request(args):
+    def as_int(name, default):
+        try:
+            return int(args.get(name, default))
+        except (TypeError, ValueError):
+            return default
+
+    column_search = {}
+    order = []
+    i = 0
+    while f'columns[{i}][data]' in args:
+        value = args.get(f'columns[{i}][search][value]', '')
+        if value:
+            column_search[i] = value
+        i += 1
+    j = 0
+    while f'order[{j}][column]' in args:
+        order.append((as_int(f'order[{j}][column]', -1), args.get(f'order[{j}][dir]', 'asc')))
+        j += 1
+
+    return {
+        'draw': as_int('draw', 0),
+        'start': max(as_int('start', 0), 0),
+        'length': as_int('length', 10),
+        'search': args.get('search[value]', ''),
+        'column_search': column_search,
+        'order': order,
+    }
+
+
+# ─── Building the JSON response for one DataTables draw ───
+# Text cells are HTML-escaped unless the view already holds HTML-safe markup
+def datatables_response(view: TableView, args, escape=True):
+    params = parse_request(args)
+    rows, filtered = view.query(
+        start=params['start'], length=params['length'], search=params['search'],
+        column_search=params['column_search'], order=params['order']
+    )
+    page = widen_floats(view.df.iloc[rows])
+    if escape:
+        text_cols = [c for c in page.columns if page[c].dtype == object]
+        if text_cols:
+            page = page.assign(**{c: escape_series(page[c]) for c in text_cols})
+    page_json = page.to_json(orient='values', date_format='iso', default_handler=str)
+    body = (
+        '{"draw": %d, "recordsTotal": %d, "recordsFiltered": %d, "columns": %s, "data": %s}'
+        % (params['draw'], len(view), filtered, json.dumps([str(c) for c in view.columns]), page_json)
+    )
+    return Response(body, mimetype='application/json')
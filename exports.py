@@ -0,0 +1,95 @@
+#########################################################################
+# Title  : Result Exports
+# Purpose: Streams a result frame (GPA predictions, continuing matches) to
+#          the browser as CSV or XLSX without building the whole file in
+#          memory. CSV is generated block by block, so the first bytes
+#          leave straight away; XLSX rows are written with XlsxWriter's
+#          constant_memory mode to a scratch file that is then streamed in
+#          chunks and removed.
+#########################################################################
+
+# Importing necessary libraries
+# (pandas and XlsxWriter are imported on first use through gpa_stream)
+import os
+import shutil
+import tempfile
+from flask import Response, current_app, send_file
+
+# Rows converted per block when exporting a stored result
+EXPORT_BLOCK_ROWS = 50_000
+
+# Bytes read per chunk when streaming a finished file
+CHUNK_BYTES = 256 * 1024
+
+CSV_MIMETYPE = 'text/csv'
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _attachment(filename):
+    return {'Content-Disposition': f'attachment; filename={filename}'}
+
+
+# ─── Sending a file from a scratch directory and removing it afterwards ───
+def send_and_remove(path, work_dir, mimetype, download_name):
+    response = send_file(path, mimetype=mimetype, as_attachment=True, download_name=download_name)
+    # Passthrough responses skip close callbacks, so turn it off to get the cleanup
+    response.direct_passthrough = False
+    response.call_on_close(lambda: shutil.rmtree(work_dir, ignore_errors=True))
+    return response
+
+
+# ─── CSV: header first, then one block of rows at a time ───
+def csv_chunks(df, block_rows=EXPORT_BLOCK_ROWS):
+    yield df.iloc[:0].to_csv(index=False)
+    for start in range(0, len(df), block_rows):
+        yield df.iloc[start:start + block_rows].to_csv(index=False, header=False)
+
+
+def csv_response(df, name, block_rows=EXPORT_BLOCK_ROWS):
+    return Response(csv_chunks(df, block_rows), mimetype=CSV_MIMETYPE, headers=_attachment(f'{name}.csv'))
+
+
+# ─── XLSX: constant-memory workbook in a scratch directory ───
+def write_xlsx(df, path, sheet_name, block_rows=EXPORT_BLOCK_ROWS):
+    from gpa_stream import ResultWriter
+
+    writer = ResultWriter(path, 'xlsx', columns=df.columns, sheet_name=sheet_name)
+    for start in range(0, len(df), block_rows):
+        writer.write(df.iloc[start:start + block_rows])
+    writer.close()
+
+
+def file_chunks(path, work_dir, chunk_bytes=CHUNK_BYTES):
+    try:
+        with open(path, 'rb') as fh:
+            while True:
+                chunk = fh.read(chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def xlsx_response(df, name, sheet_name, block_rows=EXPORT_BLOCK_ROWS):
+    work_dir = tempfile.mkdtemp(prefix='export_', dir=current_app.config.get('UPLOAD_FOLDER'))
+    path = os.path.join(work_dir, f'{name}.xlsx')
+    try:
+        write_xlsx(df, path, sheet_name, block_rows)
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    headers = _attachment(f'{name}.xlsx')
+    headers['Content-Length'] = str(os.path.getsize(path))
+    response = Response(file_chunks(path, work_dir), mimetype=XLSX_MIMETYPE, headers=headers)
+    # The generator cleans up when it finishes or is closed mid-way; this covers one never started
+    response.call_on_close(lambda: shutil.rmtree(work_dir, ignore_errors=True))
+    return response
+
+
+# ─── Streaming a result frame as CSV or XLSX ───
+def export_response(df, fmt, name, sheet_name):
+    if fmt == 'csv':
+        return csv_response(df, name)
+    return xlsx_response(df, name, sheet_name)
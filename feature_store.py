@@ -0,0 +1,144 @@
+#########################################################################
+# Title  : GPA Training Feature Store
+# Purpose: Persists the training data for train_hist_model.py as a long
+#          mark table plus a wide, one-row-per-Emplid feature table with
+#          its GPA target. New term exports are ingested incrementally:
+#          only the students they touch get their pivot rows and targets
+#          recomputed, and every ingest is recorded in a manifest.
+#########################################################################
+
+# Importing necessary libraries
+import hashlib
+import importlib.util
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from gpa_features import FEATURE_DTYPE, clean_marks, pivot_marks
+from ingest import read_upload
+
+MARK_COLUMNS = ['Emplid', 'Name', 'Course', 'Mark']
+
+# Parquet when pyarrow is installed, otherwise pickled frames
+STORE_FORMAT = 'parquet' if importlib.util.find_spec('pyarrow') is not None else 'pickle'
+
+
+# ─── GPA target used for training: average mark on a 4-point scale, capped at 4 ───
+def gpa_target(X: np.ndarray) -> np.ndarray:
+    taken = np.count_nonzero(~np.isnan(X), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gpa = np.nansum(X, axis=1) / (taken * 25)
+    return np.minimum(gpa, 4.0)
+
+
+class FeatureStore:
+    """Long marks, wide per-student features and an ingest manifest in one folder."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        ext = 'parquet' if STORE_FORMAT == 'parquet' else 'pkl'
+        self.marks_path = os.path.join(root, f'marks.{ext}')
+        self.features_path = os.path.join(root, f'features.{ext}')
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.marks = self._read(self.marks_path, MARK_COLUMNS)
+        self.features = self._read(self.features_path, ['Emplid', 'Name', 'GPA'])
+        self.manifest = self._read_manifest()
+
+    # ─── Persistence ───
+    @staticmethod
+    def _read(path, columns):
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=columns)
+        return pd.read_parquet(path) if STORE_FORMAT == 'parquet' else pd.read_pickle(path)
+
+    @staticmethod
+    def _write(df, path):
+        tmp = f'{path}.tmp'
+        if STORE_FORMAT == 'parquet':
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'version': 0, 'ingests': []}
+        with open(self.manifest_path) as fh:
+            return json.load(fh)
+
+    def save(self):
+        self._write(self.marks, self.marks_path)
+        self._write(self.features, self.features_path)
+        tmp = f'{self.manifest_path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.manifest, fh, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def subject_cols(self):
+        return [c for c in self.features.columns if c not in ('Emplid', 'Name', 'GPA')]
+
+    def already_ingested(self, digest):
+        return any(entry['digest'] == digest for entry in self.manifest['ingests'])
+
+    # ─── Adding one export: merge its marks, then rebuild only the students it touches ───
+    def ingest(self, path):
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if self.already_ingested(digest):
+            return None
+
+        start = time.perf_counter()
+        new = clean_marks(read_upload(data, usecols=MARK_COLUMNS, label='training_export'), fill_missing=False)
+        affected = pd.Index(new['Emplid'].unique())
+
+        # Existing marks come first so a repeated (student, course) keeps its earliest mark
+        self.marks = pd.concat([self.marks, new], ignore_index=True).drop_duplicates()
+        self.marks['Emplid'] = self.marks['Emplid'].astype(str)
+        self._rebuild(affected)
+
+        self.manifest['version'] += 1
+        entry = {
+            'version': self.manifest['version'],
+            'file': os.path.basename(path),
+            'digest': digest,
+            'rows': int(len(new)),
+            'students_affected': int(len(affected)),
+            'students_total': int(len(self.features)),
+            'subjects_total': len(self.subject_cols),
+            'ingested_at': time.time(),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        self.manifest['ingests'].append(entry)
+        return entry
+
+    def _rebuild(self, emplids):
+        # Pivoting only the affected students' marks
+        subset = self.marks[self.marks['Emplid'].isin(emplids)]
+        ids, X, cols = pivot_marks(subset)
+        rows = ids.copy()
+        rows[cols] = pd.DataFrame(X, columns=cols, index=rows.index)
+        rows['GPA'] = gpa_target(X)
+
+        # Replacing those students' rows; subjects new to the store become NaN for everyone else
+        kept = self.features[~self.features['Emplid'].isin(emplids)]
+        features = pd.concat([kept, rows], ignore_index=True) if len(kept) else rows
+        subject_cols = [c for c in features.columns if c not in ('Emplid', 'Name', 'GPA')]
+        features[subject_cols] = features[subject_cols].astype(FEATURE_DTYPE)
+        self.features = features[['Emplid', 'Name', *subject_cols, 'GPA']]
+
+    # ─── Raw training matrix (NaN = subject not taken), targets and column order ───
+    def training_data(self):
+        features = self.features.sort_values('Emplid', kind='stable').reset_index(drop=True)
+        cols = self.subject_cols
+        return features[cols].to_numpy(dtype=FEATURE_DTYPE), features['GPA'].to_numpy(dtype=np.float64), cols
+
+    def mark_median(self):
+        return float(pd.to_numeric(self.marks['Mark'], errors='coerce').median())
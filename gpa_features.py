@@ -0,0 +1,139 @@
+#########################################################################
+# Title  : GPA Feature Builder
+# Purpose: Shared by train_hist_model.py and the GPA predictor. Codes long
+#          (Emplid, Name, Course, Mark) records as sparse (student, subject)
+#          coordinates and builds dense, normalised rows per student only
+#          when a block is handed to a model.
+#########################################################################
+
+# Importing necessary libraries
+import warnings
+import numpy as np
+import pandas as pd
+
+FEATURE_DTYPE = np.float32
+
+
+# ─── Cleaning the long-format mark records ───
+def clean_marks(df: pd.DataFrame, mark_median=None, fill_missing=True) -> pd.DataFrame:
+    df = df[['Emplid', 'Name', 'Course', 'Mark']].drop_duplicates()
+    df = df.assign(
+        Emplid=df['Emplid'].astype(str),
+        Mark=pd.to_numeric(df['Mark'], errors='coerce'),
+    )
+
+    # Missing marks fall back to the training median, or this batch's median
+    if fill_missing:
+        fill = df['Mark'].median() if mark_median is None else mark_median
+        df['Mark'] = df['Mark'].fillna(fill)
+    return df
+
+
+# ─── Marks as coordinates: one (student, subject, mark) triple per record ───
+# Students and subjects are integer codes, so memory grows with the number of
+# records rather than students x subjects. Dense float blocks are only built by
+# dense()/blocks(), at the point a block is handed to the model.
+class SparseMarks:
+    """COO view of long mark records with sorted student and subject codes."""
+
+    def __init__(self, ids, rows, cols, values, subject_cols):
+        self.ids = ids
+        self.rows = rows
+        self.cols = cols
+        self.values = values
+        self.subject_cols = subject_cols
+
+    @property
+    def shape(self):
+        return len(self.ids), len(self.subject_cols)
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.cols.nbytes + self.values.nbytes
+
+    # ─── Per-subject means over the students who took it (NaN when nobody did) ───
+    def means(self):
+        n_cols = len(self.subject_cols)
+        counts = np.bincount(self.cols, minlength=n_cols)
+        sums = np.bincount(self.cols, weights=self.values, minlength=n_cols)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (sums / counts).astype(FEATURE_DTYPE)
+
+    # ─── Dense rows [start, stop): raw marks with NaN, or normalised when means are given ───
+    def dense(self, means=None, start=0, stop=None):
+        stop = len(self.ids) if stop is None else min(stop, len(self.ids))
+        lo, hi = np.searchsorted(self.rows, [start, stop])
+        rows, cols, values = self.rows[lo:hi] - start, self.cols[lo:hi], self.values[lo:hi]
+
+        if means is None:
+            X = np.full((stop - start, len(self.subject_cols)), np.nan, dtype=FEATURE_DTYPE)
+            X[rows, cols] = values
+            return X
+
+        # Untaken subjects are mean-filled, i.e. (mu - mu) / mu: 0, or NaN for a zero/NaN mean
+        means = np.asarray(means, dtype=FEATURE_DTYPE)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fill = (means - means) / means
+            X = np.tile(fill, (stop - start, 1))
+            X[rows, cols] = (values - means[cols]) / means[cols]
+        return X
+
+    def blocks(self, means=None, block_rows=100_000):
+        for start in range(0, len(self.ids), block_rows):
+            yield self.dense(means, start, start + block_rows)
+
+
+def sparse_marks(df: pd.DataFrame, subject_cols=None) -> SparseMarks:
+    # Same records pivot_table(aggfunc='first') would use: no missing keys or marks
+    df = df.dropna(subset=['Emplid', 'Name', 'Course', 'Mark'])
+
+    # Student codes follow the sorted (Emplid, Name) order of the old pivot index
+    emplid, emplids = pd.factorize(df['Emplid'], sort=True)
+    name, names = pd.factorize(df['Name'], sort=True)
+    student, pairs = pd.factorize(emplid.astype(np.int64) * len(names) + name, sort=True)
+    ids = pd.DataFrame({'Emplid': emplids[pairs // len(names)], 'Name': names[pairs % len(names)]})
+
+    # Subjects outside subject_cols are dropped; subject_cols=None keeps every course, sorted
+    if subject_cols is None:
+        course, courses = pd.factorize(df['Course'], sort=True)
+        subject_cols = list(courses)
+    else:
+        course = pd.Index(subject_cols).get_indexer(df['Course'])
+    keep = course >= 0
+    rows, cols = student[keep], course[keep]
+    values = df['Mark'].to_numpy(dtype=FEATURE_DTYPE)[keep]
+
+    # A repeated (student, subject) keeps its first mark, then coordinates are sorted by row
+    first = ~pd.Series(rows * len(subject_cols) + cols).duplicated().to_numpy()
+    order = np.argsort(rows[first], kind='stable')
+    return SparseMarks(
+        ids=ids,
+        rows=rows[first][order].astype(np.int32),
+        cols=cols[first][order].astype(np.int32),
+        values=values[first][order],
+        subject_cols=list(subject_cols),
+    )
+
+
+# ─── Pivoting to one dense row per student, reindexed to the model's subject columns ───
+# Subjects missing from the upload become all-NaN columns instead of a KeyError
+def pivot_marks(df: pd.DataFrame, subject_cols=None):
+    marks = sparse_marks(df, subject_cols)
+    return marks.ids, marks.dense(), marks.subject_cols
+
+
+# ─── Per-subject means, ignoring students who did not take the subject ───
+def subject_means(X: np.ndarray) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanmean(X, axis=0).astype(FEATURE_DTYPE)
+
+
+# ─── Mean-filling and normalising all columns at once: (x - mu) / mu ───
+def normalise(X: np.ndarray, means: np.ndarray) -> np.ndarray:
+    means = np.asarray(means, dtype=FEATURE_DTYPE)
+    np.copyto(X, np.broadcast_to(means, X.shape), where=np.isnan(X))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        X -= means
+        X /= means
+    return X
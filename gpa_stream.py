@@ -0,0 +1,272 @@
+#########################################################################
+# Title  : Streaming Batch GPA Prediction
+# Purpose: Predicts GPAs for mark files too large to hold in memory.
+#          Rows are read in chunks, grouped per student either from sorted
+#          input or by spilling to on-disk partitions keyed by a hash of
+#          Emplid, and predicted in blocks of N students. Results are written
+#          to CSV/XLSX as they are produced, so peak memory stays bounded.
+#########################################################################
+
+# Importing necessary libraries
+import csv
+import itertools
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from gpa_features import clean_marks, sparse_marks
+from ingest import sniff_format
+from table_render import widen_floats
+
+INPUT_COLUMNS = ['Emplid', 'Name', 'Course', 'Mark']
+OUTPUT_COLUMNS = ['Emplid', 'Name', 'Estimated GPA Range', 'Predicted GPA']
+
+# Rows read per chunk, students predicted per block, and target partition size
+# (parsed rows in memory, not bytes on disk)
+CHUNK_ROWS = 200_000
+BLOCK_STUDENTS = 50_000
+PARTITION_BYTES = 64 * 1024 * 1024
+
+# Times an oversized partition is split again before it is predicted as it is
+MAX_SPLIT_DEPTH = 3
+
+
+# ─── Reading the upload in chunks of rows (CSV natively, XLSX via read-only openpyxl) ───
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    with open(path, 'rb') as fh:
+        fmt = sniff_format(fh.read(8))
+
+    if fmt != 'xlsx':
+        reader = pd.read_csv(path, usecols=INPUT_COLUMNS, dtype={'Emplid': str, 'Name': str, 'Course': str},
+                             chunksize=chunk_rows)
+        for chunk in reader:
+            yield chunk
+        return
+
+    from openpyxl import load_workbook
+    # Passing a file object so openpyxl does not insist on an .xlsx extension
+    fh = open(path, 'rb')
+    wb = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else '' for h in next(rows)]
+        missing = [c for c in INPUT_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        positions = [header.index(c) for c in INPUT_COLUMNS]
+
+        buffer = []
+        for row in rows:
+            buffer.append([row[i] if i < len(row) else None for i in positions])
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=INPUT_COLUMNS)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=INPUT_COLUMNS)
+    finally:
+        wb.close()
+        fh.close()
+
+
+# ─── Writing result blocks as they are produced ───
+class ResultWriter:
+    def __init__(self, path, fmt='csv', columns=OUTPUT_COLUMNS, sheet_name='Predictions'):
+        self.path = path
+        self.fmt = fmt
+        self.columns = list(columns)
+        self.rows = 0
+        if fmt == 'xlsx':
+            import xlsxwriter
+            # Without a default date format, datetime cells show as serial numbers
+            self._book = xlsxwriter.Workbook(path, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd'})
+            self._sheet = self._book.add_worksheet(sheet_name)
+            self._sheet.write_row(0, 0, self.columns)
+        else:
+            self._fh = open(path, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._fh)
+            self._csv.writerow(self.columns)
+
+    def write(self, block: pd.DataFrame):
+        block = widen_floats(block[self.columns])
+        if self.fmt == 'xlsx':
+            # XlsxWriter rejects NaN, so missing cells are written as blanks
+            block = block.astype(object).where(block.notna(), None)
+        records = block.itertuples(index=False, name=None)
+        if self.fmt == 'xlsx':
+            for record in records:
+                self.rows += 1
+                self._sheet.write_row(self.rows, 0, record)
+        else:
+            self._csv.writerows(records)
+            self.rows += len(block)
+
+    def close(self):
+        if self.fmt == 'xlsx':
+            self._book.close()
+        else:
+            self._fh.close()
+
+
+# ─── Streaming normalisation stats when the model bundle does not carry them ───
+class StatsAccumulator:
+    def __init__(self, subject_cols):
+        self.subject_cols = list(subject_cols)
+        self.sums = pd.Series(0.0, index=self.subject_cols)
+        self.counts = pd.Series(0, index=self.subject_cols)
+        self.nulls = pd.Series(0, index=self.subject_cols)
+        self.mark_counts = pd.Series(dtype='int64')
+
+    def update(self, chunk: pd.DataFrame):
+        marks = pd.to_numeric(chunk['Mark'], errors='coerce')
+        grouped = marks.groupby(chunk['Course'].astype(str))
+        self.sums = self.sums.add(grouped.sum().reindex(self.subject_cols), fill_value=0)
+        self.counts = self.counts.add(grouped.count().reindex(self.subject_cols), fill_value=0)
+        self.nulls = self.nulls.add(marks.isna().groupby(chunk['Course'].astype(str)).sum().reindex(self.subject_cols),
+                                    fill_value=0)
+
+        # Counting each distinct mark so the exact median can be found at the end
+        self.mark_counts = self.mark_counts.add(marks.value_counts(), fill_value=0)
+
+    def median(self):
+        counts = self.mark_counts.sort_index()
+        total = int(counts.sum())
+        if total == 0:
+            return float('nan')
+        cum = counts.cumsum().to_numpy()
+        values = counts.index.to_numpy(dtype=float)
+        lo = values[np.searchsorted(cum, (total - 1) // 2 + 1)]
+        hi = values[np.searchsorted(cum, total // 2 + 1)]
+        return float((lo + hi) / 2)
+
+    def result(self):
+        median = self.median()
+        # Missing marks are median-filled before the means, matching preprocess_input
+        totals = self.counts + self.nulls
+        means = (self.sums + self.nulls * median) / totals.where(totals > 0)
+        return means.to_numpy(dtype=np.float32), median
+
+
+# ─── Predicting one group of complete students in blocks of N ───
+def _predict_students(df, model, subject_cols, means, mark_median, band_fn, writer, block_students):
+    marks = sparse_marks(clean_marks(df, mark_median=mark_median), subject_cols)
+
+    # Dense, mean-filled rows exist for one block of students at a time
+    for start, X in zip(range(0, len(marks.ids), block_students), marks.blocks(means, block_students)):
+        block = marks.ids.iloc[start:start + block_students].copy()
+        pred = model.predict(pd.DataFrame(X, columns=subject_cols, copy=False))
+        block['Estimated GPA Range'] = band_fn(pred)
+        block['Predicted GPA'] = np.round(pred, 3)
+        writer.write(block)
+
+
+# ─── Full pipeline: upload path in, result file out ───
+# means=None computes file-wide stats in one extra pass; they approximate the
+# in-memory batch-relative path, which averages after de-duplicating per student.
+def stream_predict(src_path, out_path, model, subject_cols, band_fn, means=None, mark_median=None,
+                   fmt='csv', assume_sorted=False, chunk_rows=CHUNK_ROWS, block_students=BLOCK_STUDENTS,
+                   work_dir=None):
+    if means is None:
+        acc = StatsAccumulator(subject_cols)
+        for chunk in iter_chunks(src_path, chunk_rows):
+            acc.update(chunk)
+        means, mark_median = acc.result()
+    if mark_median is None:
+        mark_median = float('nan')
+
+    writer = ResultWriter(out_path, fmt)
+    try:
+        if assume_sorted:
+            _stream_sorted(src_path, model, subject_cols, means, mark_median, band_fn, writer,
+                           chunk_rows, block_students)
+        else:
+            _stream_partitioned(src_path, model, subject_cols, means, mark_median, band_fn, writer,
+                                chunk_rows, block_students, work_dir)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+# ─── Sorted input: each chunk is complete except for its last student ───
+def _stream_sorted(src_path, model, subject_cols, means, mark_median, band_fn, writer, chunk_rows, block_students):
+    carry = None
+    for chunk in iter_chunks(src_path, chunk_rows):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        emplid = chunk['Emplid'].astype(str)
+        last = emplid.iloc[-1]
+        carry = chunk[emplid == last]
+        complete = chunk[emplid != last]
+        if len(complete):
+            _predict_students(complete, model, subject_cols, means, mark_median, band_fn, writer, block_students)
+    if carry is not None and len(carry):
+        _predict_students(carry, model, subject_cols, means, mark_median, band_fn, writer, block_students)
+
+
+# ─── Rows in the upload: the sheet dimension for XLSX, bytes per CSV row of the first chunk otherwise ───
+def estimate_rows(path, first):
+    with open(path, 'rb') as fh:
+        fmt = sniff_format(fh.read(8))
+
+    if fmt == 'xlsx':
+        from openpyxl import load_workbook
+        with open(path, 'rb') as fh:
+            wb = load_workbook(fh, read_only=True)
+            try:
+                max_row = wb.active.max_row
+            finally:
+                wb.close()
+        # Sheets written without a dimension record fall back to re-splitting later
+        return max(max_row - 1, len(first)) if max_row else len(first)
+
+    csv_bytes = len(first.to_csv(index=False).encode())
+    return os.path.getsize(path) * len(first) / max(csv_bytes, 1)
+
+
+def _partitions(n_bytes):
+    return max(1, int(n_bytes // PARTITION_BYTES) + 1)
+
+
+# ─── Unsorted input: spill rows to hash partitions so each student lands in one file ───
+# Partitions are sized from the parsed bytes per row of the first chunk; one that still
+# holds more than PARTITION_BYTES once spilled is split again on the next hash digits
+def _stream_partitioned(src_path, model, subject_cols, means, mark_median, band_fn, writer,
+                        chunk_rows, block_students, work_dir):
+    chunks = iter_chunks(src_path, chunk_rows)
+    first = next(chunks, None)
+    if first is None:
+        return
+    row_bytes = max(first.memory_usage(index=False, deep=True).sum() / max(len(first), 1), 1.0)
+    n_parts = _partitions(estimate_rows(src_path, first) * row_bytes)
+
+    def predict(part_df):
+        _predict_students(part_df, model, subject_cols, means, mark_median, band_fn, writer, block_students)
+
+    spill_dir = tempfile.mkdtemp(prefix='gpa_spill_', dir=work_dir)
+    try:
+        _spill_and_predict(itertools.chain([first], chunks), n_parts, 1, row_bytes, spill_dir,
+                           chunk_rows, predict, depth=0)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+def _spill_and_predict(chunks, n_parts, divisor, row_bytes, spill_dir, chunk_rows, predict, depth):
+    part_dir = tempfile.mkdtemp(dir=spill_dir)
+    paths = [os.path.join(part_dir, f'part_{i:04d}.csv') for i in range(n_parts)]
+    rows = np.zeros(n_parts, dtype=np.int64)
+    for chunk in chunks:
+        chunk = chunk.assign(Emplid=chunk['Emplid'].astype(str))
+        hashed = pd.util.hash_pandas_object(chunk['Emplid'], index=False).to_numpy()
+        part = (hashed // np.uint64(divisor)) % np.uint64(n_parts)
+        for i, part_rows in chunk.groupby(part, sort=False):
+            part_rows.to_csv(paths[i], mode='a', header=bool(rows[i] == 0), index=False)
+            rows[i] += len(part_rows)
+
+    for i in np.flatnonzero(rows):
+        n_bytes = rows[i] * row_bytes
+        if n_bytes > PARTITION_BYTES and depth < MAX_SPLIT_DEPTH:
+            _spill_and_predict(iter_chunks(paths[i], chunk_rows), _partitions(n_bytes), divisor * n_parts,
+                               row_bytes, spill_dir, chunk_rows, predict, depth + 1)
+        else:
+            predict(pd.read_csv(paths[i], dtype={'Emplid': str, 'Name': str, 'Course': str}))
+        os.remove(paths[i])
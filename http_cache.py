@@ -0,0 +1,295 @@
+#########################################################################
+# Title  : HTTP Caching and Compression
+# Purpose: Read-only pages (the pathway blueprint) carry weak ETags built
+#          from the CourseDetails workbook version (mtime + size), a hash
+#          of the templates and the request path, plus a Last-Modified date.
+#          A matching If-None-Match / If-Modified-Since is answered with
+#          304 before the view runs, and rendered bodies are kept in an
+#          in-process LRU (with their compressed copies) so a repeat view
+#          skips the workbook, the view and the template. Text bodies above
+#          a size threshold are gzip-compressed (brotli when installed) for
+#          clients that accept it; responses that already set
+#          Content-Encoding or stream are left alone.
+#########################################################################
+
+# Importing necessary libraries
+import gzip
+import hashlib
+import importlib.util
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import g, request, session
+from werkzeug.http import is_resource_modified
+
+# Blueprints whose GET responses depend only on the workbook, the templates and the URL
+CACHED_BLUEPRINTS = ('pathway',)
+
+# Endpoints in those blueprints that report live state instead
+UNCACHED_ENDPOINTS = {'pathway.cache_stats'}
+
+# Rendered responses kept per process
+CACHE_ENTRIES = 256
+
+# Bodies larger than this are revalidated with ETags but not kept in memory
+CACHE_MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Smallest body worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+# Content types that compress well (images and spreadsheets are compressed already)
+COMPRESSIBLE_TYPES = {'text/html', 'text/css', 'text/plain', 'text/csv', 'application/json',
+                      'application/javascript', 'text/javascript', 'image/svg+xml'}
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+HAS_BROTLI = importlib.util.find_spec('brotli') is not None
+
+
+# ─── Compressing one body for a content coding ───
+def compress(body, encoding):
+    if encoding == 'br':
+        import brotli
+
+        data = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        data = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    responses.count_compressed(len(body), len(data))
+    return data
+
+
+def _encodings():
+    return ('br', 'gzip') if HAS_BROTLI else ('gzip',)
+
+
+class CachedBody:
+    """One response body with its compressed copies, made the first time a client asks for each."""
+
+    def __init__(self, body, mimetype, etag=None, last_modified=None):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self._variants = {}
+
+    def variant(self, encoding):
+        if encoding is None:
+            return self.body
+        data = self._variants.get(encoding)
+        if data is None:
+            data = self._variants[encoding] = compress(self.body, encoding)
+        return data
+
+
+class ResponseCache:
+    """Thread-safe LRU of CachedBody objects keyed by ETag (or static file validator)."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_body_bytes=CACHE_MAX_BODY_BYTES):
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.configure(max_entries, max_body_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def configure(self, max_entries=CACHE_ENTRIES, max_body_bytes=CACHE_MAX_BODY_BYTES):
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_body_bytes = max_body_bytes
+            self._items.clear()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key, item):
+        if not self.max_entries or len(item.body) > self.max_body_bytes:
+            return
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def count_compressed(self, n_in, n_out):
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += n_in
+            self.bytes_out += n_out
+
+    def stats(self):
+        return {
+            'response_cache': {
+                'entries': len(self._items),
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+            },
+            'compression': {
+                'responses': self.compressed,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+            },
+        }
+
+
+# Shared cache for the whole process
+responses = ResponseCache()
+
+
+# ─── Hash and newest modification time of the templates, taken once when the app is created ───
+def template_version(folder):
+    digest = hashlib.blake2b(digest_size=16)
+    newest = 0.0
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, folder).encode())
+            with open(path, 'rb') as fh:
+                digest.update(fh.read())
+            newest = max(newest, os.path.getmtime(path))
+    return digest.hexdigest(), newest
+
+
+def _cacheable(app):
+    if request.method not in ('GET', 'HEAD') or request.blueprint not in CACHED_BLUEPRINTS:
+        return False
+    if request.endpoint in UNCACHED_ENDPOINTS:
+        return False
+
+    # A message flashed by an earlier request must still be rendered into this page
+    if app.config['SESSION_COOKIE_NAME'] in request.cookies:
+        pending = app.session_interface.open_session(app, request)
+        if pending and pending.get('_flashes'):
+            return False
+    return True
+
+
+# ─── Validator for this URL: workbook version + templates + path (None without a workbook) ───
+def _validator(app):
+    try:
+        st = os.stat(app.config['COURSE_DETAILS_PATH'])
+    except OSError:
+        return None
+    key = f"{st.st_mtime_ns}:{st.st_size}|{app.config['HTTP_TEMPLATE_HASH']}|{request.script_root}|{request.full_path}"
+    last_modified = datetime.fromtimestamp(max(st.st_mtime, app.config['HTTP_TEMPLATE_MTIME']), tz=timezone.utc)
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest(), last_modified
+
+
+def _accepted_encoding():
+    return request.accept_encodings.best_match(_encodings())
+
+
+def _compressible(response, min_bytes):
+    return (response.status_code == 200 and response.mimetype in COMPRESSIBLE_TYPES
+            and 'Content-Encoding' not in response.headers
+            and (response.direct_passthrough or not response.is_streamed)
+            and (response.content_length is None or response.content_length >= min_bytes))
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+
+
+def _send(app, item, encoding):
+    response = app.response_class(item.variant(encoding), mimetype=item.mimetype)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    _set_validators(response, item.etag, item.last_modified)
+    return response
+
+
+def init_http_cache(app):
+    responses.configure(app.config['HTTP_CACHE_ENTRIES'], app.config['HTTP_CACHE_MAX_BODY_BYTES'])
+    app.config['HTTP_TEMPLATE_HASH'], app.config['HTTP_TEMPLATE_MTIME'] = \
+        template_version(os.path.join(app.root_path, app.template_folder))
+    min_bytes = app.config['HTTP_COMPRESS_MIN_BYTES']
+
+    # ─── Answering from the validator or the cache before the view runs ───
+    @app.before_request
+    def _cached_response():
+        if not _cacheable(app):
+            return None
+        validator = _validator(app)
+        if validator is None:
+            return None
+        etag, last_modified = validator
+        g.http_validator = validator
+
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            responses.count_not_modified()
+            response = app.response_class(status=304)
+            _set_validators(response, etag, last_modified)
+            return response
+
+        item = responses.get(etag)
+        if item is not None:
+            return _send(app, item, _accepted_encoding() if len(item.body) >= min_bytes else None)
+        return None
+
+    # ─── Keeping fresh pathway responses, then compressing any large text body ───
+    @app.after_request
+    def _cache_and_compress(response):
+        # Pages that flashed (and so rendered) a message of their own are not shared
+        validator = g.pop('http_validator', None)
+        if (validator is not None and response.status_code == 200 and not session.modified
+                and not response.is_streamed and 'Content-Encoding' not in response.headers):
+            etag, last_modified = validator
+            item = CachedBody(response.get_data(), response.mimetype, etag, last_modified)
+            responses.put(etag, item)
+            return _send(app, item, _accepted_encoding() if len(item.body) >= min_bytes else None)
+
+        if not _compressible(response, min_bytes):
+            return response
+        encoding = _accepted_encoding()
+        if encoding is None:
+            return response
+
+        # Static files stream from disk; their compressed copies are cached per file validator
+        if response.direct_passthrough:
+            file_etag, _ = response.get_etag()
+            if request.endpoint != 'static' or file_etag is None:
+                return response
+            key = ('static', request.path, file_etag)
+            item = responses.get(key)
+            if item is None:
+                response.direct_passthrough = False
+                item = CachedBody(response.get_data(), response.mimetype)
+                responses.put(key, item)
+            if len(item.body) < min_bytes:
+                return response
+            if response.direct_passthrough:
+                response.response.close()
+            data = item.variant(encoding)
+
+            # The compressed file is another representation of the same resource
+            response.set_etag(file_etag, weak=True)
+        else:
+            body = response.get_data()
+            if len(body) < min_bytes:
+                return response
+            data = compress(body, encoding)
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,156 @@
+#########################################################################
+# Title  : Parallel Prediction Executor
+# Purpose: Shards a feature matrix across a thread or process pool and runs
+#          a registered model (HGBR, KNN) on every shard, merging results
+#          back in row order. OpenMP threads per worker are capped so the
+#          pool does not oversubscribe the cores (through threadpoolctl
+#          when installed; it comes with scikit-learn, which the exported
+#          tree model does not need).
+#########################################################################
+
+# Importing necessary libraries
+import contextlib
+import importlib.util
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from flask import current_app
+from model_registry import registry
+
+# Smallest shard worth dispatching; smaller inputs are predicted in one call
+MIN_SHARD_ROWS = 10_000
+
+HAS_THREADPOOLCTL = importlib.util.find_spec('threadpoolctl') is not None
+
+
+# ─── Capping OpenMP threads while a block runs (a no-op without threadpoolctl) ───
+def _openmp_limits(threads):
+    if not HAS_THREADPOOLCTL:
+        return contextlib.nullcontext()
+    from threadpoolctl import threadpool_limits
+
+    return threadpool_limits(limits=threads, user_api='openmp')
+
+
+# ─── Process-pool worker side ───
+def _init_worker(threads_per_worker, model_paths):
+    # Capping OpenMP (and BLAS) threads for the lifetime of this worker; the variable
+    # covers libraries loaded later, threadpoolctl any already loaded
+    os.environ['OMP_NUM_THREADS'] = str(threads_per_worker)
+    if HAS_THREADPOOLCTL:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(limits=threads_per_worker)
+
+    # Workers started with 'spawn' have an empty registry, so register by path
+    for name, (path, compiled) in model_paths.items():
+        if name not in registry.names():
+            registry.register(name, path, warmup=False, compiled=compiled)
+
+
+def _predict_shard(name, X):
+    return registry.model(name).predict(X)
+
+
+def _rows(X, start, stop):
+    return X.iloc[start:stop] if hasattr(X, 'iloc') else X[start:stop]
+
+
+class PredictionExecutor:
+    """Runs model.predict over row shards of X on a pool of workers."""
+
+    def __init__(self, workers=1, backend='thread', threads_per_worker=1, min_shard_rows=MIN_SHARD_ROWS):
+        if backend not in ('thread', 'process'):
+            raise ValueError(f"Unknown prediction backend '{backend}'")
+        self.workers = max(int(workers), 1)
+        self.backend = backend
+        self.threads_per_worker = max(int(threads_per_worker), 1)
+        self.min_shard_rows = max(int(min_shard_rows), 1)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.sharded_calls = 0
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                if self.backend == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=_init_worker,
+                        initargs=(self.threads_per_worker, registry.paths())
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='predict')
+            return self._executor
+
+    # ─── Row bounds of each shard (one per worker, never below min_shard_rows) ───
+    def shard_bounds(self, n_rows):
+        import numpy as np
+
+        n_shards = min(self.workers, max(n_rows // self.min_shard_rows, 1))
+        edges = np.linspace(0, n_rows, n_shards + 1).astype(int)
+        return list(zip(edges[:-1], edges[1:]))
+
+    def predict(self, name, X):
+        import numpy as np
+
+        self.calls += 1
+        bounds = self.shard_bounds(len(X))
+        if len(bounds) <= 1:
+            return registry.model(name).predict(X)
+
+        self.sharded_calls += 1
+        pool = self._pool()
+        if self.backend == 'process':
+            futures = [pool.submit(_predict_shard, name, _rows(X, a, b)) for a, b in bounds]
+            return np.concatenate([f.result() for f in futures])
+
+        # Threads share the model; the OpenMP cap applies while the shards run
+        model = registry.model(name)
+        with _openmp_limits(self.threads_per_worker):
+            futures = [pool.submit(model.predict, _rows(X, a, b)) for a, b in bounds]
+            return np.concatenate([f.result() for f in futures])
+
+    # ─── Model-like wrapper so callers can keep using .predict(X) ───
+    def bind(self, name):
+        return ShardedModel(self, name)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'backend': self.backend,
+            'threads_per_worker': self.threads_per_worker,
+            'min_shard_rows': self.min_shard_rows,
+            'calls': self.calls,
+            'sharded_calls': self.sharded_calls,
+        }
+
+
+class ShardedModel:
+    """A registered model whose predict() goes through a PredictionExecutor."""
+
+    def __init__(self, executor, name):
+        self.executor = executor
+        self.name = name
+
+    def predict(self, X):
+        return self.executor.predict(self.name, X)
+
+
+def init_predictor(app):
+    app.extensions['predictor'] = PredictionExecutor(
+        workers=app.config['PREDICT_WORKERS'],
+        backend=app.config['PREDICT_BACKEND'],
+        threads_per_worker=app.config['PREDICT_THREADS_PER_WORKER'],
+        min_shard_rows=app.config['PREDICT_MIN_SHARD_ROWS'],
+    )
+
+
+def prediction_executor():
+    return current_app.extensions['predictor']
@@ -0,0 +1,159 @@
+#########################################################################
+# Title  : Spreadsheet Ingestion
+# Purpose: Single entry point for reading uploaded CSV/XLS/XLSX files.
+#          Sniffs the real format from magic bytes, reads only the columns a
+#          feature needs, prefers the calamine engine when installed, caches
+#          parsed uploads by content hash and records parse timings.
+#          Uploads are hashed and parsed through a memory map of the spooled
+#          file (see uploads.py), never copied into a bytes object.
+#########################################################################
+
+# Importing necessary libraries
+import hashlib
+import importlib.util
+import threading
+import time
+from collections import OrderedDict, deque
+import pandas as pd
+from metrics import metrics
+from uploads import mapped, open_buffer, spooler
+
+# Magic bytes of the supported spreadsheet containers
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Parsed uploads kept in memory (entries and approximate total bytes)
+CACHE_ENTRIES = 32
+CACHE_BYTES = 256 * 1024 * 1024
+
+# Number of recent parse reports kept for monitoring
+REPORT_HISTORY = 100
+
+
+# ─── Detecting the real file format, ignoring the extension ───
+def sniff_format(head: bytes) -> str:
+    if head.startswith(XLSX_MAGIC):
+        return 'xlsx'
+    if head.startswith(XLS_MAGIC):
+        return 'xls'
+    return 'csv'
+
+
+# ─── Fastest available engine per format (calamine is optional) ───
+def excel_engine(fmt):
+    if importlib.util.find_spec('python_calamine') is not None:
+        return 'calamine'
+    return 'openpyxl' if fmt == 'xlsx' else 'xlrd'
+
+
+class _ParseCache:
+    """LRU of parsed frames keyed by content hash and read options."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_bytes=CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, df):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._items.pop(key)[1]
+            self._items[key] = (df, size)
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old_size) = self._items.popitem(last=False)
+                self._bytes -= old_size
+
+
+_cache = _ParseCache()
+_reports = deque(maxlen=REPORT_HISTORY)
+
+
+# ─── Accepting column names regardless of surrounding whitespace ───
+def _column_filter(usecols):
+    if usecols is None:
+        return None
+    wanted = {c.strip() for c in usecols}
+    return lambda col: str(col).strip() in wanted
+
+
+def _parse(data, fmt, usecols, dtype):
+    buf = open_buffer(data)
+    if fmt == 'csv':
+        return pd.read_csv(buf, usecols=_column_filter(usecols), dtype=dtype), 'c'
+    engine = excel_engine(fmt)
+    return pd.read_excel(buf, engine=engine, usecols=_column_filter(usecols), dtype=dtype), engine
+
+
+# ─── Main entry point: read an upload, from cache when the same bytes were seen ───
+def read_upload(source, usecols=None, dtype=None, label=None):
+    start = time.perf_counter()
+    with mapped(source) as data:
+        size = len(data)
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        fmt = sniff_format(bytes(data[:8]))
+
+        key = (digest, tuple(usecols) if usecols else None, tuple(sorted((dtype or {}).items())))
+        cached = _cache.get(key)
+        if cached is not None:
+            df, engine, hit = cached, 'cache', True
+        else:
+            with spooler.parse_slot():
+                df, engine = _parse(data, fmt, usecols, dtype)
+            _cache.put(key, df)
+            hit = False
+
+    _reports.append({
+        'label': label,
+        'format': fmt,
+        'engine': engine,
+        'bytes': size,
+        'rows': len(df),
+        'columns': len(df.columns),
+        'cache_hit': hit,
+        'seconds': time.perf_counter() - start,
+    })
+    metrics.observe_upload(label, size, len(df))
+    # Callers mutate their frames, so never hand out the cached object itself
+    return df.copy()
+
+
+def clear_cache():
+    with _cache._lock:
+        _cache._items.clear()
+        _cache._bytes = 0
+
+
+def recent_reports():
+    return list(_reports)
+
+
+def stats():
+    return {
+        'cache_hits': _cache.hits,
+        'cache_misses': _cache.misses,
+        'cache_entries': len(_cache._items),
+        'cache_bytes': _cache._bytes,
+        'recent': recent_reports(),
+    }
+
+
+# Parse cache counters on /metrics once an upload path has imported this module
+metrics.register_collector('ingest', lambda: {'parse_cache': stats()})
@@ -0,0 +1,521 @@
+#########################################################################
+# Title  : Background Upload Jobs
+# Purpose: Runs the heavy upload flows (continuing-students merge, GPA
+#          prediction, failing-students download) in a local process pool
+#          instead of the request thread. Job state lives in a SQLite file
+#          and results in a per-job folder, so no external broker is needed.
+#########################################################################
+
+# Importing necessary libraries
+import base64
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import Blueprint, current_app, jsonify, request, send_file, url_for, abort
+from werkzeug.utils import secure_filename
+
+# Creating Flask blueprint for the job endpoints
+jobs_bp = Blueprint('jobs', __name__)
+
+# Content types of the result files a job can produce
+RESULT_MIMETYPES = {
+    '.html': 'text/html',
+    '.png': 'image/png',
+    '.svg': 'image/svg+xml',
+    '.json': 'application/json',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+# Error recorded for a job with no progress for a whole TTL (its worker or the server stopped)
+ABANDONED_ERROR = 'The job stopped without finishing (its worker or the server restarted).'
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobStore:
+    """SQLite-backed job table plus one folder per job for inputs and results."""
+
+    def __init__(self, root):
+        self.root = root
+        self.db_path = os.path.join(root, 'jobs.sqlite3')
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    results TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    finished REAL
+                )
+            ''')
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def create(self, kind):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        os.makedirs(self.job_dir(job_id))
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, status, stage, created, updated) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, 'queued', 'queued', now, now)
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        fields['updated'] = time.time()
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        with self._connect() as conn:
+            conn.execute(f'UPDATE jobs SET {columns} WHERE id = ?', (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['results'] = json.loads(job['results']) if job['results'] else {}
+        return job
+
+    # ─── Jobs holding a queue slot: queued or running rows updated within the TTL ───
+    # (every progress step updates the row, so a job whose worker or server died stops counting)
+    def count_active(self, ttl_seconds):
+        cutoff = time.time() - ttl_seconds
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running') AND updated >= ?", (cutoff,)
+            ).fetchone()[0]
+
+    # ─── Failing jobs abandoned mid-run, then removing finished jobs (rows and files) older than the TTL ───
+    def purge(self, ttl_seconds):
+        now = time.time()
+        cutoff = now - ttl_seconds
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated = ?, finished = ? "
+                "WHERE status IN ('queued', 'running') AND updated < ?",
+                (ABANDONED_ERROR, now, now, cutoff)
+            )
+            expired = [r[0] for r in conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (cutoff,)
+            )]
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in expired])
+        for job_id in expired:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return len(expired)
+
+
+# ─── Worker-side job handlers (run inside the process pool) ───
+def _write_chart(job_dir, chart, fmt):
+    if fmt == 'svg':
+        return _write_text(job_dir, 'chart.svg', chart)
+    with open(os.path.join(job_dir, 'chart.png'), 'wb') as fh:
+        fh.write(base64.b64decode(chart))
+    return 'chart.png'
+
+
+def _write_text(job_dir, name, text):
+    with open(os.path.join(job_dir, name), 'w', encoding='utf-8') as fh:
+        fh.write(text)
+    return name
+
+
+# Result frame kept beside the job files for server-side table paging
+ROWS_FILE = 'rows.pkl'
+
+
+def _continuing_job(progress, job_dir, params):
+    from continuing_students import (
+        read_continuing_files, build_continuing_result, render_continuing_chart, render_continuing_table
+    )
+
+    progress('parse', 0.1)
+    df1, df2 = read_continuing_files(os.path.join(job_dir, params['file1']), os.path.join(job_dir, params['file2']))
+
+    progress('merge', 0.4)
+    final_df, match = build_continuing_result(df1, df2)
+
+    progress('render', 0.7)
+    results = {
+        'table': _write_text(job_dir, 'table.html', render_continuing_table(final_df)),
+        'counts': _write_text(job_dir, 'counts.json', json.dumps(match.counts())),
+    }
+    try:
+        fmt = params.get('chart_format', 'svg')
+        results['chart'] = _write_chart(job_dir, render_continuing_chart(match.continuing, match.non_continuing, fmt), fmt)
+    except Exception as e:
+        print("Chart error:", e)
+    final_df.to_excel(os.path.join(job_dir, 'continuing_students.xlsx'), index=False)
+    final_df.to_pickle(os.path.join(job_dir, ROWS_FILE))
+    results['file'] = 'continuing_students.xlsx'
+    return results
+
+
+# ─── Prediction executor and memo of this worker process, set up from the app's settings once ───
+_worker_executor = None
+
+
+def _job_executor(settings):
+    global _worker_executor
+    if _worker_executor is None:
+        from inference import PredictionExecutor
+        from prediction_memo import memo
+
+        memo.configure(*settings['memo'])
+        _worker_executor = PredictionExecutor(**settings['executor'])
+    return _worker_executor
+
+
+def _ml_job(progress, job_dir, params):
+    from model_registry import registry
+    from Predicting_gpa import (
+        read_marks, bundle_means, predict_results, render_gpa_chart, render_results_table, failures_workbook,
+        band_labels, serving_model, memo_report, GPA_BAND_EDGES
+    )
+    from table_render import widen_floats
+
+    progress('parse', 0.1)
+    df_raw = read_marks(os.path.join(job_dir, params['datafile']))
+
+    progress('predict', 0.4)
+    hist_store = registry.get('hist')
+    means, mark_median = bundle_means(hist_store, batch_relative=params.get('batch_relative', False))
+    band_edges = params.get('band_edges', GPA_BAND_EDGES)
+    model = serving_model(executor=_job_executor(params['predictor']))
+    results_df, pred_hist, band_counts = predict_results(df_raw, hist_store, means=means, mark_median=mark_median,
+                                                         band_edges=band_edges, model=model)
+    memo_counts = memo_report(model, 'gpa_marks')
+
+    progress('render', 0.7)
+    results = {
+        'table': _write_text(job_dir, 'table.html', render_results_table(results_df)),
+        'bands': _write_text(job_dir, 'bands.json', json.dumps(dict(zip(band_labels(band_edges), band_counts.tolist())))),
+    }
+    if memo_counts is not None:
+        results['memo'] = _write_text(job_dir, 'memo.json', json.dumps(memo_counts))
+    try:
+        fmt = params.get('chart_format', 'svg')
+        results['chart'] = _write_chart(job_dir, render_gpa_chart(pred_hist, fmt), fmt)
+    except Exception as e:
+        print("Chart generation failed:", e)
+    widen_floats(results_df).to_excel(os.path.join(job_dir, 'gpa_predictions.xlsx'), index=False)
+    results_df.to_pickle(os.path.join(job_dir, ROWS_FILE))
+    results['file'] = 'gpa_predictions.xlsx'
+
+    failing = results_df[results_df['Predicted GPA'] < 2.0]
+    with open(os.path.join(job_dir, 'failing_students.xlsx'), 'wb') as fh:
+        fh.write(failures_workbook(failing).getvalue())
+    results['failures'] = 'failing_students.xlsx'
+    return results
+
+
+def _failures_job(progress, job_dir, params):
+    import pandas as pd
+    from Predicting_gpa import failures_workbook
+
+    progress('parse', 0.2)
+    df = pd.read_json(os.path.join(job_dir, params['failing_data']))
+
+    progress('render', 0.6)
+    with open(os.path.join(job_dir, 'failing_students.xlsx'), 'wb') as fh:
+        fh.write(failures_workbook(df).getvalue())
+    return {'file': 'failing_students.xlsx'}
+
+
+JOB_HANDLERS = {
+    'continuing': _continuing_job,
+    'ml': _ml_job,
+    'ml-failures': _failures_job,
+}
+
+
+def run_job(root, job_id, kind, params):
+    store = JobStore(root)
+    store.update(job_id, status='running')
+
+    def progress(stage, fraction):
+        store.update(job_id, stage=stage, progress=fraction)
+
+    try:
+        results = JOB_HANDLERS[kind](progress, store.job_dir(job_id), params)
+        store.update(job_id, status='done', stage='done', progress=1.0,
+                     results=json.dumps(results), finished=time.time())
+    except Exception as e:
+        store.update(job_id, status='failed', error=str(e), finished=time.time())
+
+
+# ─── Parent-side queue with bounded concurrency ───
+class JobQueue:
+    def __init__(self, root, max_workers=2, max_pending=16, ttl_seconds=3600):
+        self.store = JobStore(root)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    # ─── Dropping a pool whose worker died (e.g. killed for memory); the next job starts a new one ───
+    def _discard_pool(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def create(self, kind):
+        self.store.purge(self.ttl_seconds)
+        if self.store.count_active(self.ttl_seconds) >= self.max_pending:
+            raise QueueFull(f'{self.max_pending} jobs already pending')
+        return self.store.create(kind)
+
+    def start(self, job_id, kind, params):
+        executor = self._pool()
+        try:
+            future = executor.submit(run_job, self.store.root, job_id, kind, params)
+        except BrokenProcessPool:
+            self._discard_pool(executor)
+            executor = self._pool()
+            future = executor.submit(run_job, self.store.root, job_id, kind, params)
+
+        # A worker that crashes never reports back, so record the failure here
+        def on_done(fut):
+            error = fut.exception()
+            if error is None:
+                return
+            if isinstance(error, BrokenProcessPool):
+                self._discard_pool(executor)
+                error = 'The job worker stopped unexpectedly (possibly out of memory).'
+            self.fail(job_id, error)
+
+        future.add_done_callback(on_done)
+
+    def fail(self, job_id, error):
+        self.store.update(job_id, status='failed', error=str(error), finished=time.time())
+
+
+def init_jobs(app):
+    app.extensions['jobs'] = JobQueue(
+        app.config['JOB_FOLDER'],
+        max_workers=app.config['JOB_WORKERS'],
+        max_pending=app.config['JOB_MAX_PENDING'],
+        ttl_seconds=app.config['JOB_TTL_SECONDS'],
+    )
+
+
+def job_queue():
+    return current_app.extensions['jobs']
+
+
+# ─── Saving an uploaded file into the job folder ───
+def _save_upload(job_dir, f, default_name):
+    name = secure_filename(f.filename or '') or default_name
+    f.save(os.path.join(job_dir, name))
+    return name
+
+
+def _submit(kind, save_inputs):
+    queue = job_queue()
+    try:
+        job_id = queue.create(kind)
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+
+    # A job that could not be saved or handed to the pool gives up its queue slot
+    try:
+        params = save_inputs(queue.store.job_dir(job_id))
+        queue.start(job_id, kind, params)
+    except Exception as e:
+        queue.fail(job_id, e)
+        return jsonify({'error': f'Could not start the job: {e}'}), 500
+    return jsonify({'job_id': job_id, 'status_url': url_for('jobs.status', job_id=job_id)}), 202
+
+
+# ─── The app's prediction executor and memo settings, for the job worker to use the same ───
+def _predictor_settings():
+    config = current_app.config
+    return {
+        'executor': {
+            'workers': config['PREDICT_WORKERS'],
+            'backend': config['PREDICT_BACKEND'],
+            'threads_per_worker': config['PREDICT_THREADS_PER_WORKER'],
+            'min_shard_rows': config['PREDICT_MIN_SHARD_ROWS'],
+        },
+        'memo': (config['PREDICTION_MEMO_ENTRIES'], config['PREDICTION_MEMO_PATH'],
+                 config['PREDICTION_MEMO_SAVE_SECONDS']),
+    }
+
+
+def _allowed(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv', 'xls', 'xlsx'}
+
+
+# ─── Submit endpoints (each returns a job id straight away) ───
+@jobs_bp.route('/continuing', methods=['POST'])
+def submit_continuing():
+    f1 = request.files.get('file1')
+    f2 = request.files.get('file2')
+    if not f1 or not f2 or not f1.filename or not f2.filename:
+        return jsonify({'error': 'Both files must be uploaded.'}), 400
+    if f1.filename != 'current_students.xlsx' or f2.filename != 'future_students.xlsx':
+        return jsonify({'error': "You must upload files named 'current_students.xlsx' and 'future_students.xlsx' only."}), 400
+    if not _allowed(f1.filename) or not _allowed(f2.filename):
+        return jsonify({'error': 'Invalid file type. Only CSV, XLS, and XLSX are allowed.'}), 400
+
+    chart_format = current_app.config.get('CHART_FORMAT', 'svg')
+
+    def save(job_dir):
+        os.makedirs(os.path.join(job_dir, 'in1'))
+        os.makedirs(os.path.join(job_dir, 'in2'))
+        return {
+            'file1': os.path.join('in1', _save_upload(os.path.join(job_dir, 'in1'), f1, 'file1.xlsx')),
+            'file2': os.path.join('in2', _save_upload(os.path.join(job_dir, 'in2'), f2, 'file2.xlsx')),
+            'chart_format': chart_format,
+        }
+
+    return _submit('continuing', save)
+
+
+@jobs_bp.route('/ml', methods=['POST'])
+def submit_ml():
+    f = request.files.get('datafile')
+    if not f or not f.filename or not _allowed(f.filename):
+        return jsonify({'error': 'Please upload a CSV or Excel file.'}), 400
+
+    batch_relative = current_app.config.get('GPA_BATCH_RELATIVE', False)
+    chart_format = current_app.config.get('CHART_FORMAT', 'svg')
+    band_edges = list(current_app.config['GPA_BAND_EDGES'])
+    predictor = _predictor_settings()
+
+    def save(job_dir):
+        return {
+            'datafile': _save_upload(job_dir, f, 'upload'),
+            'batch_relative': batch_relative,
+            'band_edges': band_edges,
+            'chart_format': chart_format,
+            'predictor': predictor,
+        }
+
+    return _submit('ml', save)
+
+
+@jobs_bp.route('/ml-failures', methods=['POST'])
+def submit_failures():
+    failing_json = request.form.get('failing_data')
+    if not failing_json:
+        return jsonify({'error': 'No failing students supplied.'}), 400
+
+    def save(job_dir):
+        return {'failing_data': _write_text(job_dir, 'failing.json', failing_json)}
+
+    return _submit('ml-failures', save)
+
+
+# ─── Status / progress ───
+@jobs_bp.route('/<job_id>')
+def status(job_id):
+    job = job_queue().store.get(job_id)
+    if job is None:
+        abort(404)
+    job['result_urls'] = {
+        name: url_for('jobs.result', job_id=job_id, name=name) for name in job['results']
+    }
+    if job['kind'] in ('continuing', 'ml') and job['status'] == 'done':
+        job['data_url'] = url_for('jobs.table_data', job_id=job_id)
+    return jsonify(job)
+
+
+# ─── A finished job's result rows, kept in the result store as 'job:<id>' for paging and downloads ───
+def finished_job(job_id, kind=None):
+    import pandas as pd
+    from result_store import results
+
+    store = job_queue().store
+    job = store.get(job_id)
+    if job is None or job['status'] != 'done' or (kind is not None and job['kind'] != kind):
+        return None
+
+    result_id = 'job:' + job_id
+    view = results.get(result_id, kind=job['kind'])
+    if view is None:
+        path = os.path.join(store.job_dir(job_id), ROWS_FILE)
+        if not os.path.exists(path):
+            return None
+        results.put(job['kind'], pd.read_pickle(path), result_id=result_id)
+        view = results.get(result_id)
+    return job, result_id, view
+
+
+# ─── A finished job's chart as (format, SVG markup or base64 PNG), and its JSON results ───
+def job_chart(job):
+    name = job['results'].get('chart')
+    if not name:
+        return None, None
+    path = os.path.join(job_queue().store.job_dir(job['id']), name)
+    if name.endswith('.svg'):
+        with open(path, encoding='utf-8') as fh:
+            return 'svg', fh.read()
+    with open(path, 'rb') as fh:
+        return 'png', base64.b64encode(fh.read()).decode('ascii')
+
+
+def job_json(job, name):
+    filename = job['results'].get(name)
+    if not filename:
+        return None
+    with open(os.path.join(job_queue().store.job_dir(job['id']), filename), encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+# ─── Server-side DataTables paging over a finished job's result rows ───
+@jobs_bp.route('/<job_id>/data')
+def table_data(job_id):
+    from datatables import datatables_response
+
+    found = finished_job(job_id)
+    if found is None:
+        abort(404)
+    return datatables_response(found[2], request.args)
+
+
+# ─── Result retrieval (table, chart, downloadable files) ───
+@jobs_bp.route('/<job_id>/result/<name>')
+def result(job_id, name):
+    store = job_queue().store
+    job = store.get(job_id)
+    if job is None or name not in job['results']:
+        abort(404)
+
+    filename = job['results'][name]
+    mimetype = RESULT_MIMETYPES.get(os.path.splitext(filename)[1], 'application/octet-stream')
+    return send_file(
+        os.path.join(store.job_dir(job_id), filename),
+        mimetype=mimetype,
+        as_attachment=mimetype == RESULT_MIMETYPES['.xlsx'],
+        download_name=filename
+    )
@@ -0,0 +1,250 @@
+#########################################################################
+# Title  : Request Metrics and Profiling
+# Purpose: In-process counters and histograms for request latency, per-stage
+#          timings (parse, match/pivot, predict, chart, render), upload sizes
+#          and cache hit rates, served as Prometheus text from /metrics.
+#          Sampled slow requests can be profiled with cProfile (or
+#          pyinstrument when installed) and dumped to a folder.
+#          Values are per process; with several gunicorn workers each one
+#          reports its own numbers.
+#########################################################################
+
+# Importing necessary libraries
+import cProfile
+import importlib.util
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from flask import Blueprint, Response, g, request
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# ─── Histogram buckets ───
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1e4, 1e5, 1e6, 1e7, 5e7, 1e8, 5e8)
+ROWS_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, edge in enumerate(self.buckets):
+            if value <= edge:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def lines(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, (counts, total, n) in sorted(self._series.items()):
+            for edge, count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket{_label_text(labels + (("le", _number(edge)),))} {count}'
+            yield f'{self.name}_bucket{_label_text(labels + (("le", "+Inf"),))} {n}'
+            yield f'{self.name}_sum{_label_text(labels)} {total:.6f}'
+            yield f'{self.name}_count{_label_text(labels)} {n}'
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._series = {}
+
+    def inc(self, labels, amount=1):
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def lines(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self._series.items()):
+            yield f'{self.name}{_label_text(labels)} {value}'
+
+
+class Metrics:
+    """All metric families for this process, guarded by one lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_seconds = Histogram('app_request_seconds', 'Request latency by endpoint.', SECONDS_BUCKETS)
+        self.requests = Counter('app_requests_total', 'Requests by endpoint and status code.')
+        self.stage_seconds = Histogram('app_stage_seconds', 'Time spent in each processing stage.', SECONDS_BUCKETS)
+        self.upload_bytes = Histogram('app_upload_bytes', 'Size of parsed uploads.', BYTES_BUCKETS)
+        self.upload_rows = Histogram('app_upload_rows', 'Rows in parsed uploads.', ROWS_BUCKETS)
+        self.profiles = Counter('app_profiles_total', 'Slow requests profiled and dumped.')
+        self._collectors = {}
+
+    def observe_stage(self, route, name, seconds):
+        with self._lock:
+            self.stage_seconds.observe(seconds, (('route', route), ('stage', name)))
+
+    def observe_upload(self, source, n_bytes, n_rows):
+        labels = (('source', source or 'unknown'),)
+        with self._lock:
+            self.upload_bytes.observe(n_bytes, labels)
+            self.upload_rows.observe(n_rows, labels)
+
+    def observe_request(self, endpoint, status, seconds):
+        with self._lock:
+            self.request_seconds.observe(seconds, (('endpoint', endpoint),))
+            self.requests.inc((('endpoint', endpoint), ('status', str(status))))
+
+    def count_profile(self, endpoint):
+        with self._lock:
+            self.profiles.inc((('endpoint', endpoint),))
+
+    # ─── Cache counters read at scrape time: fn() -> {cache name: {counter: value}} ───
+    def register_collector(self, name, fn):
+        self._collectors[name] = fn
+
+    def _collected_lines(self):
+        values, ratios = [], []
+        for component, fn in sorted(self._collectors.items()):
+            try:
+                caches = fn()
+            except Exception:
+                continue
+            for cache, counters in sorted(caches.items()):
+                for counter, value in sorted(counters.items()):
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        labels = (('component', component), ('cache', cache), ('counter', counter))
+                        values.append(f'app_component_stat{_label_text(labels)} {_number(value)}')
+
+                    # Hit rate for every <x>hits / <x>misses pair
+                    misses = counters.get(counter[:-4] + 'misses') if counter.endswith('hits') else None
+                    if isinstance(misses, int) and value + misses > 0:
+                        labels = (('component', component), ('cache', cache), ('counter', counter))
+                        ratios.append(f'app_cache_hit_ratio{_label_text(labels)} {value / (value + misses):.6f}')
+
+        yield '# HELP app_component_stat Cache, store and model counters reported by each component.'
+        yield '# TYPE app_component_stat gauge'
+        yield from values
+        yield '# HELP app_cache_hit_ratio Hits / (hits + misses) for each cache.'
+        yield '# TYPE app_cache_hit_ratio gauge'
+        yield from ratios
+
+    def render(self):
+        with self._lock:
+            lines = [line for family in (self.request_seconds, self.requests, self.stage_seconds,
+                                         self.upload_bytes, self.upload_rows, self.profiles)
+                     for line in family.lines()]
+        lines.extend(self._collected_lines())
+        return '\n'.join(lines) + '\n'
+
+
+# Shared metrics for the whole process
+metrics = Metrics()
+
+
+# ─── Timing one stage of a request: with stage('ml', 'predict'): ... ───
+@contextmanager
+def stage(route, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe_stage(route, name, time.perf_counter() - start)
+
+
+# ─── Sampled profiling of slow requests ───
+def _profiler_kind(app):
+    kind = app.config.get('PROFILE_BACKEND', 'cprofile')
+    if kind == 'pyinstrument' and importlib.util.find_spec('pyinstrument') is None:
+        return 'cprofile'
+    return kind
+
+
+def _start_profile(app):
+    if _profiler_kind(app) == 'pyinstrument':
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def _dump_profile(app, profiler, endpoint, seconds):
+    folder = app.config['PROFILE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    name = re.sub(r'[^\w.-]', '_', endpoint)
+    stem = f"{name}_{time.strftime('%Y%m%d-%H%M%S')}_{int(seconds * 1000)}ms"
+    if isinstance(profiler, cProfile.Profile):
+        profiler.dump_stats(os.path.join(folder, f'{stem}.prof'))
+    else:
+        with open(os.path.join(folder, f'{stem}.html'), 'w') as fh:
+            fh.write(profiler.output_html())
+
+
+def _stop_profile(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+def init_metrics(app):
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        if rate and request.endpoint != 'metrics.export' and random.random() < rate:
+            g.profiler = _start_profile(app)
+
+    @app.after_request
+    def _record(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        seconds = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe_request(endpoint, response.status_code, seconds)
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            _stop_profile(profiler)
+            if seconds >= app.config.get('PROFILE_SLOW_SECONDS', 1.0):
+                try:
+                    _dump_profile(app, profiler, endpoint, seconds)
+                    metrics.count_profile(endpoint)
+                except Exception as e:
+                    print("Profile dump failed:", e)
+        return response
+
+    app.register_blueprint(metrics_bp)
+
+
+# ─── Prometheus text exposition ───
+@metrics_bp.route('/metrics')
+def export():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
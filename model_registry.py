@@ -0,0 +1,227 @@
+#########################################################################
+# Title  : Model Registry
+# Purpose: Holds the named GPA models (HGBR, KNN) for the whole process.
+#          Models load lazily or via preload() before workers fork, get a
+#          warm-up prediction, and are swapped atomically when the file on
+#          disk changes. Exported .npz tree models load without scikit-learn;
+#          an export whose recorded pickle digest no longer matches the
+#          pickle is re-exported (or the pickle served) instead.
+#########################################################################
+
+# Importing necessary libraries
+import hashlib
+import os
+import threading
+import time
+
+
+# ─── Resident set size of this process (Linux), used to estimate model footprint ───
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ─── Reading a bundle: exported tree arrays (.npz) or a pickled estimator ───
+def load_bundle(path):
+    # Imported here so the registry costs nothing until a model is needed
+    if path.endswith('.npz'):
+        import tree_model
+
+        return tree_model.load_bundle(path)
+    import joblib
+
+    return joblib.load(path)
+
+
+# ─── Content digest of a model file: identifies the model version across processes ───
+def file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ─── Feature columns stored alongside a model in its bundle ───
+def bundle_subject_cols(bundle):
+    return [c for c in bundle.get('subject_cols', []) if c != 'GPA']
+
+
+# ─── File to serve for a pickle with a compiled .npz export: the export, refreshed if stale ───
+def _compiled_path(name, path, compiled, digest):
+    import tree_model
+
+    if tree_model.source_digest(compiled) == digest:
+        return compiled
+    try:
+        tree_model.export_pickle(path, compiled, digest)
+    except Exception as e:
+        print(f"Model '{name}': {compiled} does not match {path} and could not be re-exported "
+              f"({e}); serving the pickle")
+        return path
+    return compiled
+
+
+class ModelEntry:
+    """One named model file (and optional compiled export) and the bundle currently loaded from it."""
+
+    def __init__(self, name, path, warmup=True, required=True, compiled=None):
+        self.name = name
+        self.path = path
+        self.compiled = compiled
+        self.serving = None
+        self.warmup = warmup
+        self.required = required
+        self.bundle = None
+        self.version = None
+        self.digest = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.memory_bytes = None
+        self.file_bytes = None
+        self.reloads = 0
+        self.error = None
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'serving': self.serving,
+            'loaded': self.bundle is not None,
+            'digest': self.digest,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'memory_bytes': self.memory_bytes,
+            'file_bytes': self.file_bytes,
+            'reloads': self.reloads,
+            'error': self.error,
+        }
+
+
+class ModelRegistry:
+    """Process-wide registry of named model bundles with hot reload."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path, warmup=True, required=True, compiled=None):
+        self._entries[name] = ModelEntry(name, path, warmup=warmup, required=required, compiled=compiled)
+
+    def names(self):
+        return list(self._entries)
+
+    def paths(self):
+        return {name: (entry.path, entry.compiled) for name, entry in self._entries.items()}
+
+    # ─── Returning the bundle for a model, (re)loading it if the file changed ───
+    def get(self, name):
+        entry = self._entries[name]
+        version = self._version(entry)
+
+        # Fast path: bundle is swapped in a single assignment, so no lock needed
+        bundle = entry.bundle
+        if bundle is not None and entry.version == version:
+            return bundle
+
+        with self._lock:
+            if entry.bundle is None or entry.version != version:
+                self._load(entry, version)
+            if entry.bundle is None:
+                raise RuntimeError(f"Model '{name}' could not be loaded: {entry.error}")
+            return entry.bundle
+
+    def model(self, name):
+        return self.get(name)['model']
+
+    # Digest of the pickle the current bundle was loaded (or exported) from
+    def digest(self, name):
+        self.get(name)
+        return self._entries[name].digest
+
+    # ─── Loading every registered model now (call before workers fork) ───
+    def preload(self, names=None):
+        for name in names or self.names():
+            entry = self._entries[name]
+            try:
+                self.get(name)
+            except Exception:
+                if entry.required:
+                    raise
+                print(f"Optional model '{name}' not loaded:", entry.error)
+
+    def stats(self):
+        return {name: entry.stats() for name, entry in self._entries.items()}
+
+    @staticmethod
+    def _file_version(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    # Pickle version, plus the export's when there is one (a missing export is a version too)
+    def _version(self, entry):
+        version = self._file_version(entry.path)
+        if entry.compiled is None:
+            return version
+        try:
+            return version + self._file_version(entry.compiled)
+        except OSError:
+            return version + (None, None)
+
+    # ─── Loading a bundle fully before swapping it in, keeping the old one on failure ───
+    def _load(self, entry, version):
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            # Hashed before loading: if the file is swapped in between, the digest is
+            # the older one and the changed mtime triggers another reload
+            digest = file_digest(entry.path)
+            serving = entry.path
+            if entry.compiled is not None:
+                serving = _compiled_path(entry.name, entry.path, entry.compiled, digest)
+                # A re-export rewrote the .npz, so take its new version
+                version = self._version(entry)
+            bundle = load_bundle(serving)
+            load_seconds = time.perf_counter() - start
+            warmup_seconds = self._warm_up(bundle) if entry.warmup else None
+        except Exception as e:
+            entry.error = str(e)
+            # A failed reload keeps serving the previous model
+            if entry.bundle is not None:
+                entry.version = version
+            return
+
+        rss_after = _rss_bytes()
+        if entry.bundle is not None:
+            entry.reloads += 1
+
+        entry.load_seconds = load_seconds
+        entry.warmup_seconds = warmup_seconds
+        entry.memory_bytes = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        entry.file_bytes = os.path.getsize(serving)
+        entry.loaded_at = time.time()
+        entry.error = None
+        entry.version = version
+        entry.digest = digest
+        entry.serving = serving
+        entry.bundle = bundle
+
+    # ─── Predicting once on a synthetic all-average row so the first request is fast ───
+    @staticmethod
+    def _warm_up(bundle):
+        import numpy as np
+        import pandas as pd
+
+        cols = bundle_subject_cols(bundle)
+        row = pd.DataFrame(np.zeros((1, len(cols)), dtype=np.float32), columns=cols)
+        start = time.perf_counter()
+        bundle['model'].predict(row)
+        return time.perf_counter() - start
+
+
+# Shared registry for the whole process
+registry = ModelRegistry()
@@ -1,129 +1,294 @@
-#########################################################################
-# Title  : Program Overview - Subject & Plan Mapping Module
-# Author : Kevin Ryan Noronha
-# Editor : Disha Khurana 
-# Updated: 1 June 2025 
-# Updates: Cleaned subject and plan data, created overview of student pathways, 
-#          added clickable course links, beautified table display, 
-#          incorporated comments for clarity, and added conditional back button.
-#########################################################################
-
-# Importing necessary libraries 
-import os
-import pandas as pd
-from flask import Blueprint, render_template, current_app, url_for, flash
-
-# Creating Flask blueprint for the pathway section
-pathway_bp = Blueprint('pathway', __name__, template_folder='templates')
-
-@pathway_bp.route('/')
-def home():
-    # Define the path to the Excel data file in the 'data' folder
-    data_folder = os.path.join(current_app.root_path, 'data')
-    file_path = os.path.join(data_folder, 'CourseDetails.xlsx')
-
-    # Checking if the file exists
-    if not os.path.exists(file_path):
-        flash("CourseDetails.xlsx not found in the data/ folder.", 'error')
-        return render_template('pathway_overview.html', table_html=None, title='Pathway Overview')
-
-    # Loading the Excel sheet named 'PathwayOverview'
-    xls = pd.ExcelFile(file_path)
-    df = pd.read_excel(xls, 'PathwayOverview').fillna('')
-
-    # Keeping original course code and course name for hyperlinking
-    df['code_raw'] = df['Course_Code'].astype(str)
-    df['name_raw'] = df['Final_Course'].astype(str)
-
-    # Making course code a clickable link
-    df['Course_Code'] = df['code_raw'].apply(
-        lambda code: f'<a href="{url_for("pathway.course_details", code=code)}">{code}</a>'
-    )
-
-    # Making final course name a clickable link (if available)
-    def build_name_link(row):
-        code = row["code_raw"]
-        name = row["name_raw"]
-        if name.strip():
-            return f'<a href="{url_for("pathway.course_details", code=code)}">{name}</a>'
-        return ''
-    
-    df['Final_Course'] = df.apply(build_name_link, axis=1)
-
-    # Selecting and renaming only the relevant columns for display
-    display_df = df[['Course_Code', 'Final_Course']]
-    display_df.columns = display_df.columns.str.replace('_', ' ')
-
-    # Converting DataFrame to HTML table
-    table_html = display_df.to_html(index=False, classes='table table-bordered data-table', escape=False)
-    return render_template('pathway_overview.html', table_html=table_html, title='Pathway Overview')
-
-@pathway_bp.route('/course/<code>')
-def course_details(code):
-    # Loading course data
-    data_folder = os.path.join(current_app.root_path, 'data')
-    file_path = os.path.join(data_folder, 'CourseDetails.xlsx')
-    xls = pd.ExcelFile(file_path)
-
-    courses = pd.read_excel(xls, 'Courses').fillna('')
-    df = courses[courses['Parent_Program_Code'].astype(str) == code]
-
-    # Error message if no data found for the course code
-    if df.empty:
-        flash(f"No pathway details for {code}.", 'error')
-        return render_template('pathway_overview.html', table_html=None, title=f'Courses under {code}', show_back_button=True)
-
-    # Making course code and course name clickable to show subject details
-    df['Program_Code'] = df['Program_Code'].apply(
-        lambda c: f'<a href="{url_for("pathway.subject_details", code=c)}">{c}</a>'
-    )
-    df['Course_Name'] = df['Course_Name'].apply(
-        lambda c: f'<a href="{url_for("pathway.subject_details", code=code)}">{c}</a>'
-    )
-
-    # Selecting and renaming relevant columns
-    display_df = df[['Program_Code', 'Course_Name', 'Years', 'Credits_Transferred']]
-    display_df.columns = display_df.columns.str.replace('_', ' ')
-
-    table_html = display_df.to_html(index=False, classes='table table-bordered data-table', escape=False)
-    return render_template('pathway_overview.html', table_html=table_html, title=f'Courses under {code}', show_back_button=True)
-
-@pathway_bp.route('/course/<code>/subjects')
-def subject_details(code):
-    # Loading subject mapping data
-    data_folder = os.path.join(current_app.root_path, 'data')
-    file_path = os.path.join(data_folder, 'CourseDetails.xlsx')
-    xls = pd.ExcelFile(file_path)
-
-    cs = pd.read_excel(xls, 'CourseSubjects').fillna('')
-    sub = pd.read_excel(xls, 'Subjects').fillna('')
-    df = cs[cs['Program_Code'].astype(str) == code]
-
-    # Error message if no subjects are mapped to the program
-    if df.empty:
-        flash(f"No subjects found for {code}.", 'error')
-        return render_template('pathway_overview.html', table_html=None, title=f'Subjects for {code}', show_back_button=True)
-
-    # Merging subject details with mapping
-    df = df.merge(
-        sub[['Subject_Code', 'Subject_Title', 'CreditPoints', 'Hours', 'Campus']],
-        on='Subject_Code', how='left'
-    )
-
-    # Renaming column for display
-    df.rename(columns={'Subject_Title': 'Subject_Name'}, inplace=True)
-
-    # Selecting and renaming final columns to be shown
-    display_df = df[['Subject_Code', 'Subject_Name', 'CreditPoints', 'Hours', 'Core_YN', 'Elective_YN', 'Campus']]
-    display_df.rename(columns={
-        'Subject_Code': 'Subject Code',
-        'Subject_Name': 'Subject Name',
-        'CreditPoints': 'Credit Points',
-        'Hours': 'Hours',
-        'Core_YN': 'Core (Y/N)',
-        'Elective_YN': 'Elective (Y/N)',
-        'Campus': 'Campus'
-    }, inplace=True)
-
-    table_html = display_df.to_html(index=False, classes='table table-bordered data-table', escape=False)
-    return render_template('pathway_overview.html', table_html=table_html, title=f'Subjects for {code}', show_back_button=True)
+#########################################################################
+# Title  : Program Overview - Subject & Plan Mapping Module
+# Author : Kevin Ryan Noronha
+# Editor : Disha Khurana 
+# Updated: 1 June 2025 
+# Updates: Cleaned subject and plan data, created overview of student pathways, 
+#          added clickable course links, beautified table display, 
+#          incorporated comments for clarity, and added conditional back button.
+#########################################################################
+
+# Importing necessary libraries 
+# (pandas-backed helpers are imported on first use so the app starts without pandas)
+import os
+from flask import Blueprint, render_template, current_app, flash, jsonify, request, url_for
+from metrics import stage
+
+# Creating Flask blueprint for the pathway section
+pathway_bp = Blueprint('pathway', __name__, template_folder='templates')
+
+# Returning the shared workbook store for the 'data' folder
+def course_store():
+    from course_data import get_store
+
+    file_path = current_app.config.get('COURSE_DETAILS_PATH') or os.path.join(current_app.root_path, 'data', 'CourseDetails.xlsx')
+    return get_store(file_path, snapshot_dir=current_app.config.get('COURSE_SNAPSHOT_DIR'))
+
+# ─── Display frames (HTML-safe cells) cached per data version as TableViews ───
+def overview_view(idx):
+    import pandas as pd
+    from datatables import TableView
+    from table_render import build_links
+
+    cache_key = ('overview-view', request.script_root)
+    view = idx.fragments.get(cache_key)
+    if view is None:
+        df = idx.frames['PathwayOverview']
+
+        # Making course code and final course name (if available) clickable links;
+        # searching and sorting use the plain codes and names
+        view = TableView(pd.DataFrame({
+            'Course Code': build_links(df['Course_Code'], 'pathway.course_details'),
+            'Final Course': build_links(df['Course_Code'], 'pathway.course_details', text=df['Final_Course']),
+        }), text=pd.DataFrame({
+            'Course Code': df['Course_Code'],
+            'Final Course': df['Final_Course'],
+        }))
+        idx.fragments.put(cache_key, view)
+    return view
+
+def courses_view(idx, code):
+    import pandas as pd
+    from datatables import TableView
+    from table_render import build_links, escape_series
+
+    df = idx.courses_for(code)
+    if df is None:
+        return None
+
+    cache_key = ('courses-view', request.script_root, code)
+    view = idx.fragments.get(cache_key)
+    if view is None:
+        # Making course code and course name clickable to show subject details
+        view = TableView(pd.DataFrame({
+            'Program Code': build_links(df['Program_Code'], 'pathway.subject_details'),
+            'Course Name': build_links(pd.Series(code, index=df.index), 'pathway.subject_details', text=df['Course_Name']),
+            'Years': escape_series(df['Years']),
+            'Credits Transferred': escape_series(df['Credits_Transferred']),
+        }), text=df[['Program_Code', 'Course_Name', 'Years', 'Credits_Transferred']])
+        idx.fragments.put(cache_key, view)
+    return view
+
+def subjects_view(idx, code):
+    from datatables import TableView
+    from table_render import escape_series
+
+    df = idx.subjects_for(code)
+    if df is None:
+        return None
+
+    cache_key = ('subjects-view', code)
+    view = idx.fragments.get(cache_key)
+    if view is None:
+        # Selecting and renaming final columns to be shown
+        display_df = df[['Subject_Code', 'Subject_Name', 'CreditPoints', 'Hours', 'Core_YN', 'Elective_YN', 'Campus']]
+        display_df = display_df.rename(columns={
+            'Subject_Code': 'Subject Code',
+            'Subject_Name': 'Subject Name',
+            'CreditPoints': 'Credit Points',
+            'Hours': 'Hours',
+            'Core_YN': 'Core (Y/N)',
+            'Elective_YN': 'Elective (Y/N)',
+            'Campus': 'Campus'
+        })
+        view = TableView(display_df.apply(escape_series), text=display_df)
+        idx.fragments.put(cache_key, view)
+    return view
+
+def programs_view(idx, code):
+    import pandas as pd
+    from datatables import TableView
+    from table_render import build_links, escape_series
+
+    found = idx.graph().programs_with_subject(code)
+    if found is None:
+        return None
+
+    cache_key = ('programs-view', request.script_root, code)
+    view = idx.fragments.get(cache_key)
+    if view is None:
+        # Programs that include the subject, linked to their subject lists
+        df = pd.DataFrame(found['programs'], columns=['code', 'name', 'pathways', 'core', 'elective', 'course_year'])
+        text = pd.DataFrame({
+            'Program Code': df['code'],
+            'Course Name': df['name'],
+            'Pathways': df['pathways'].str.join(', '),
+            'Course Year': df['course_year'],
+            'Core (Y/N)': df['core'].map({True: 'Y', False: 'N'}),
+            'Elective (Y/N)': df['elective'].map({True: 'Y', False: 'N'}),
+        })
+        view = TableView(text.assign(**{
+            'Program Code': build_links(df['code'], 'pathway.subject_details'),
+            'Course Name': build_links(df['code'], 'pathway.subject_details', text=df['name']),
+            'Pathways': escape_series(text['Pathways']),
+            'Course Year': escape_series(text['Course Year']),
+        }), text=text)
+        idx.fragments.put(cache_key, view)
+    return view
+
+# ─── Rendering a pathway page: full table, or header only with server-side paging ───
+def render_pathway_page(idx, view, page_key, data_url, **context):
+    from table_render import render_table
+
+    if len(view) > current_app.config.get('SERVER_SIDE_ROWS', 2000):
+        table_html = render_table(view.df.iloc[:0], raw_columns=view.columns)
+        return render_template('pathway_overview.html', table_html=table_html, data_url=data_url, **context)
+
+    # Reusing the rendered table when this page was viewed before
+    cache_key = ('html', request.script_root) + page_key
+    table_html = idx.fragments.get(cache_key)
+    if table_html is None:
+        with stage('pathway', 'table'):
+            table_html = render_table(view.df, raw_columns=view.columns)
+        idx.fragments.put(cache_key, table_html)
+    return render_template('pathway_overview.html', table_html=table_html, **context)
+
+@pathway_bp.route('/')
+def home():
+    # Loading the cached workbook index (file must exist in the data/ folder)
+    try:
+        with stage('pathway', 'load'):
+            idx = course_store().index()
+    except FileNotFoundError:
+        flash("CourseDetails.xlsx not found in the data/ folder.", 'error')
+        return render_template('pathway_overview.html', table_html=None, title='Pathway Overview')
+
+    with stage('pathway', 'view'):
+        view = overview_view(idx)
+    return render_pathway_page(idx, view, ('home',), url_for('pathway.home_data'),
+                               title='Pathway Overview')
+
+@pathway_bp.route('/course/<code>')
+def course_details(code):
+    # Looking up the courses under this parent program in the cached index
+    with stage('pathway', 'load'):
+        idx = course_store().index()
+    with stage('pathway', 'view'):
+        view = courses_view(idx, code)
+
+    # Error message if no data found for the course code
+    if view is None:
+        flash(f"No pathway details for {code}.", 'error')
+        return render_template('pathway_overview.html', table_html=None, title=f'Courses under {code}', show_back_button=True)
+
+    return render_pathway_page(idx, view, ('courses', code), url_for('pathway.course_data', code=code),
+                               title=f'Courses under {code}', show_back_button=True)
+
+@pathway_bp.route('/course/<code>/subjects')
+def subject_details(code):
+    # Looking up the pre-joined subjects of this program in the cached index
+    with stage('pathway', 'load'):
+        idx = course_store().index()
+    with stage('pathway', 'view'):
+        view = subjects_view(idx, code)
+
+    # Error message if no subjects are mapped to the program
+    if view is None:
+        flash(f"No subjects found for {code}.", 'error')
+        return render_template('pathway_overview.html', table_html=None, title=f'Subjects for {code}', show_back_button=True)
+
+    return render_pathway_page(idx, view, ('subjects', code), url_for('pathway.subject_data', code=code),
+                               title=f'Subjects for {code}', show_back_button=True)
+
+@pathway_bp.route('/subject/<code>')
+def subject_programs(code):
+    # Looking up the programs that include this subject in the pathway graph
+    with stage('pathway', 'load'):
+        idx = course_store().index()
+    with stage('pathway', 'view'):
+        view = programs_view(idx, code)
+
+    # Error message if the subject is not in the workbook
+    if view is None:
+        flash(f"No programs found for subject {code}.", 'error')
+        return render_template('pathway_overview.html', table_html=None, title=f'Programs including {code}', show_back_button=True)
+
+    return render_pathway_page(idx, view, ('programs', code), url_for('pathway.subject_programs_data', code=code),
+                               title=f'Programs including {code}', show_back_button=True)
+
+# ─── Server-side DataTables endpoints (cells are already HTML-safe) ───
+@pathway_bp.route('/data')
+def home_data():
+    from datatables import datatables_response
+
+    return datatables_response(overview_view(course_store().index()), request.args, escape=False)
+
+@pathway_bp.route('/course/<code>/data')
+def course_data(code):
+    from datatables import datatables_response
+
+    view = courses_view(course_store().index(), code)
+    if view is None:
+        return jsonify({'error': f'No pathway details for {code}.'}), 404
+    return datatables_response(view, request.args, escape=False)
+
+@pathway_bp.route('/course/<code>/subjects/data')
+def subject_data(code):
+    from datatables import datatables_response
+
+    view = subjects_view(course_store().index(), code)
+    if view is None:
+        return jsonify({'error': f'No subjects found for {code}.'}), 404
+    return datatables_response(view, request.args, escape=False)
+
+@pathway_bp.route('/subject/<code>/data')
+def subject_programs_data(code):
+    from datatables import datatables_response
+
+    view = programs_view(course_store().index(), code)
+    if view is None:
+        return jsonify({'error': f'No programs found for subject {code}.'}), 404
+    return datatables_response(view, request.args, escape=False)
+
+# ─── Search and autocomplete over pathway / program codes, course names and subject titles ───
+# Pages a result opens: a pathway's courses, a program's subjects, a subject's programs
+RESULT_ENDPOINTS = {
+    'pathway': 'pathway.course_details',
+    'program': 'pathway.subject_details',
+    'subject': 'pathway.subject_programs',
+}
+
+def graph_results(lookup):
+    from course_graph import KINDS, MAX_RESULTS
+
+    query = request.args.get('q', '')
+    kind = request.args.get('kind') or None
+    if kind is not None and kind not in KINDS:
+        return jsonify({'error': f"Unknown kind {kind!r}; use one of {', '.join(KINDS)}"}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_RESULTS)
+
+    found = lookup(course_store().index().graph(), query, kind, limit)
+    for item in found:
+        item['url'] = url_for(RESULT_ENDPOINTS[item['kind']], code=item['code'])
+    return jsonify({'query': query, 'results': found})
+
+@pathway_bp.route('/search')
+def search():
+    return graph_results(lambda graph, query, kind, limit: graph.search(query, kind, limit))
+
+@pathway_bp.route('/autocomplete')
+def autocomplete():
+    return graph_results(lambda graph, query, kind, limit: graph.autocomplete(query, kind, limit))
+
+# ─── Reverse lookup: the programs (and their pathways) that include a subject ───
+@pathway_bp.route('/subject/<code>/programs')
+def programs_with_subject(code):
+    found = course_store().index().graph().programs_with_subject(code)
+    if found is None:
+        return jsonify({'error': f'No subject {code}.'}), 404
+    return jsonify(found)
+
+# ─── Precomputed totals: credit points, hours and core / elective counts ───
+# A code can be both a pathway and one of its own programs, so both summaries are returned
+@pathway_bp.route('/course/<code>/summary')
+def course_summary(code):
+    graph = course_store().index().graph()
+    pathway, program = graph.pathway_summary(code), graph.program_summary(code)
+    if pathway is None and program is None:
+        return jsonify({'error': f'No pathway or program {code}.'}), 404
+    return jsonify({'code': code, 'pathway': pathway, 'program': program})
+
+# ─── Workbook cache counters (hits / misses / reloads) ───
+@pathway_bp.route('/cache-stats')
+def cache_stats():
+    return jsonify(course_store().stats())
@@ -0,0 +1,167 @@
+#########################################################################
+# Title  : Result Store
+# Purpose: Keeps recent result frames (continuing matches, GPA predictions)
+#          under a random result id, so follow-up requests such as table
+#          paging and downloads can be answered without re-uploading.
+#          Every result is also written to the result folder when it is
+#          stored, so any worker process can answer for it (gunicorn runs
+#          several); recent results stay in memory and everything expires
+#          after a TTL.
+#########################################################################
+
+# Importing necessary libraries
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Number of result frames kept in memory per process
+MAX_RESULTS = 64
+
+# Seconds a result stays available (in memory or on disk)
+RESULT_TTL = 3600
+
+# Result ids are hex uuids, or prefixed ids such as 'job:<id>'
+_ID_PATTERN = re.compile(r'^[\w:-]{1,80}$')
+
+
+class ResultStore:
+    """Thread-safe LRU of TableViews keyed by result id, written through to
+    disk when a spill directory is configured and read back on a miss."""
+
+    def __init__(self, max_results=MAX_RESULTS, spill_dir=None, ttl=RESULT_TTL):
+        self.max_results = max_results
+        self.spill_dir = spill_dir
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.restores = 0
+
+    def configure(self, spill_dir=None, ttl=RESULT_TTL):
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+        self.ttl = ttl
+
+    # ─── Disk file of one result (ids are sanitised for the filesystem) ───
+    def _file_path(self, result_id):
+        return os.path.join(self.spill_dir, re.sub(r'[^\w-]', '_', result_id) + '.pkl')
+
+    def _write(self, result_id, kind, view, created):
+        if not self.spill_dir:
+            return
+        path = self._file_path(result_id)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'wb') as fh:
+                pickle.dump((kind, created, view.df), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self.writes += 1
+        except OSError as e:
+            print(f"Result write failed: {e}")
+
+    def _restore(self, result_id):
+        from datatables import TableView
+
+        if not self.spill_dir:
+            return None
+        path = self._file_path(result_id)
+        try:
+            with open(path, 'rb') as fh:
+                kind, created, df = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        if time.time() - created > self.ttl:
+            self._remove_file(result_id)
+            return None
+        self.restores += 1
+        return kind, created, TableView(df)
+
+    def _remove_file(self, result_id):
+        if self.spill_dir:
+            try:
+                os.remove(self._file_path(result_id))
+            except OSError:
+                pass
+
+    # ─── Adding an item to the in-memory LRU (the disk copy outlives eviction) ───
+    def _insert(self, result_id, item):
+        with self._lock:
+            self._items[result_id] = item
+            self._items.move_to_end(result_id)
+            while len(self._items) > self.max_results:
+                self._items.popitem(last=False)
+
+    # ─── Storing a result in memory and on disk, where other workers can read it ───
+    def put(self, kind, df, result_id=None):
+        from datatables import TableView
+
+        self.purge()
+        result_id = result_id or uuid.uuid4().hex
+        created, view = time.time(), TableView(df)
+        self._write(result_id, kind, view, created)
+        self._insert(result_id, (kind, created, view))
+        return result_id
+
+    # ─── Returning the stored view, or None if expired / unknown / of another kind ───
+    def get(self, result_id, kind=None):
+        if not result_id or not _ID_PATTERN.match(result_id):
+            return None
+
+        with self._lock:
+            item = self._items.get(result_id)
+            if item is not None:
+                self._items.move_to_end(result_id)
+
+        # Stored by another worker, or evicted from this one
+        if item is None:
+            item = self._restore(result_id)
+            if item is None:
+                return None
+            self._insert(result_id, item)
+
+        item_kind, created, view = item
+        if time.time() - created > self.ttl:
+            self.discard(result_id)
+            return None
+        if kind is not None and item_kind != kind:
+            return None
+        return view
+
+    def discard(self, result_id):
+        with self._lock:
+            self._items.pop(result_id, None)
+        self._remove_file(result_id)
+
+    # ─── Dropping expired results from memory and disk ───
+    def purge(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [rid for rid, (_, created, _) in self._items.items() if created < cutoff]
+            for rid in expired:
+                del self._items[rid]
+        removed = len(expired)
+        if self.spill_dir and os.path.isdir(self.spill_dir):
+            for name in os.listdir(self.spill_dir):
+                path = os.path.join(self.spill_dir, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self):
+        with self._lock:
+            in_memory = len(self._items)
+        on_disk = len(os.listdir(self.spill_dir)) if self.spill_dir and os.path.isdir(self.spill_dir) else 0
+        return {'in_memory': in_memory, 'on_disk': on_disk, 'writes': self.writes, 'restores': self.restores}
+
+
+# Shared store for the whole process
+results = ResultStore()
@@ -0,0 +1,260 @@
+#########################################################################
+# Title  : Term Snapshot Retention
+# Purpose: Compares many term snapshots of enrolled students in one pass.
+#          Each snapshot's student IDs are encoded once into a sorted array
+#          of integer ids over a dictionary shared by every snapshot, and
+#          cached by content hash so adding a term only reads and encodes
+#          that term. Continuing / dropped / new counts for every adjacent
+#          pair, and how much of the first term's cohort is still enrolled
+#          later, come from one boolean membership matrix.
+#########################################################################
+
+# Importing necessary libraries
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from metrics import metrics
+from uploads import mapped
+
+# Columns tried, in order, as a snapshot's student ID
+ID_COLUMNS = ['Student No', 'rmit_student_id', 'Student ID', 'Emplid']
+
+# Encoded snapshots kept per process
+CACHE_ENTRIES = 64
+
+# Distinct IDs the shared dictionary holds before it starts over (dropping the cache)
+MAX_IDS = 5_000_000
+
+
+class SnapshotError(ValueError):
+    """A problem with the uploaded snapshots that is shown to the user as is."""
+
+
+# ─── Distinct IDs of one column: integral numbers as int64, anything else as stripped text ───
+# (so 3812345, 3812345.0 and ' 3812345' from different exports are the same student)
+def student_keys(col: pd.Series):
+    if pd.api.types.is_integer_dtype(col):
+        return np.unique(col.to_numpy(dtype=np.int64)), np.empty(0, dtype=object), 0
+
+    text = col.astype('string').str.strip()
+    present = text.notna() & (text != '')
+    text = text[present]
+    nums = pd.to_numeric(text, errors='coerce')
+    integral = (nums.notna() & (nums % 1 == 0)).fillna(False).to_numpy(dtype=bool)
+    ints = np.unique(nums.to_numpy(dtype=np.float64, na_value=0.0)[integral].astype(np.int64))
+    texts = pd.unique(text.to_numpy(dtype=object)[~integral])
+    return ints, texts, int((~present).sum())
+
+
+class Snapshot:
+    """One term: its label, the sorted dictionary ids of its students and row counts."""
+
+    def __init__(self, label, ids, rows, missing, id_column, generation):
+        self.label = label
+        self.ids = ids
+        self.rows = rows
+        self.missing = missing
+        self.id_column = id_column
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class SnapshotStore:
+    """Shared ID dictionary plus an LRU of encoded snapshots keyed by content hash."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_ids=MAX_IDS):
+        self.max_entries = max_entries
+        self.max_ids = max_ids
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._reset()
+
+    def _reset(self):
+        # Position in each index -> dictionary id; ints and text keys kept apart
+        self._keys = {
+            'int': (pd.Index([], dtype=np.int64), np.empty(0, dtype=np.int64)),
+            'text': (pd.Index([], dtype=object), np.empty(0, dtype=np.int64)),
+        }
+        self.size = 0
+        self._items.clear()
+        self.generation += 1
+
+    # ─── Dictionary ids for distinct keys, adding the unseen ones at the end ───
+    def _encode(self, kind, keys):
+        index, ids = self._keys[kind]
+        if not len(keys):
+            return np.empty(0, dtype=np.int64)
+        pos = index.get_indexer(keys)
+        unseen = pos < 0
+        codes = np.empty(len(keys), dtype=np.int64)
+        codes[~unseen] = ids[pos[~unseen]]
+        codes[unseen] = np.arange(self.size, self.size + int(unseen.sum()))
+        self.size += int(unseen.sum())
+        if unseen.any():
+            self._keys[kind] = (index.append(pd.Index(keys[unseen], dtype=index.dtype)),
+                                np.concatenate([ids, codes[unseen]]))
+        return codes
+
+    # Dictionary ids the batch's keys would add (each distinct key counted once)
+    def _unseen(self, read):
+        ints, texts = self._batch_keys(read)
+        return (int((self._keys['int'][0].get_indexer(ints) < 0).sum())
+                + int((self._keys['text'][0].get_indexer(texts) < 0).sum()))
+
+    @staticmethod
+    def _batch_keys(read):
+        ints = np.unique(np.concatenate([r[0] for r in read.values()] or [np.empty(0, dtype=np.int64)]))
+        texts = pd.unique(np.concatenate([r[1] for r in read.values()] or [np.empty(0, dtype=object)]))
+        return ints, texts
+
+    # ─── One snapshot's distinct keys and row counts, read from a path, bytes or upload ───
+    @staticmethod
+    def _read(source, label):
+        from ingest import read_upload
+
+        df = read_upload(source, usecols=ID_COLUMNS, label='continuing_snapshot')
+        df.columns = [str(c).strip() for c in df.columns]
+        id_column = next((c for c in ID_COLUMNS if c in df.columns), None)
+        if id_column is None:
+            raise SnapshotError(f"{label} has no student ID column ({', '.join(ID_COLUMNS)}).")
+        ints, texts, missing = student_keys(df[id_column])
+        return ints, texts, len(df), missing, id_column
+
+    # ─── Every snapshot encoded against the same dictionary; only cache misses are read ───
+    def load_many(self, sources):
+        digests = []
+        for source, _ in sources:
+            with mapped(source) as data:
+                digests.append(hashlib.blake2b(data, digest_size=16).hexdigest())
+
+        # Sheets not cached in the current dictionary are read without holding the lock
+        with self._lock:
+            generation = self.generation
+            cached = {i for i, digest in enumerate(digests) if (digest, generation) in self._items}
+        read = {i: self._read(*sources[i]) for i in range(len(sources)) if i not in cached}
+
+        # The whole batch is encoded in one hold, so no other batch can start the dictionary over
+        # midway. Snapshots dropped since the check above are read again here, which only
+        # happens when another batch started over or the LRU evicted them meanwhile
+        with self._lock:
+            for i, digest in enumerate(digests):
+                if i not in read and (digest, self.generation) not in self._items:
+                    read[i] = self._read(*sources[i])
+
+            if self.size + self._unseen(read) > self.max_ids:
+                # Starting over drops every cached snapshot, so the whole batch is encoded afresh,
+                # and a batch too large for an empty dictionary is refused rather than retried
+                for i in range(len(sources)):
+                    if i not in read:
+                        read[i] = self._read(*sources[i])
+                n_ids = sum(len(keys) for keys in self._batch_keys(read))
+                if n_ids > self.max_ids:
+                    raise SnapshotError(f'These snapshots hold {n_ids:,} distinct student IDs; '
+                                        f'at most {self.max_ids:,} can be compared at once.')
+                self._reset()
+
+            self.hits += len(sources) - len(read)
+            self.misses += len(read)
+            snapshots = []
+            for i, ((_, label), digest) in enumerate(zip(sources, digests)):
+                key = (digest, self.generation)
+                if i in read:
+                    ints, texts, rows, missing, id_column = read[i]
+                    ids = np.sort(np.concatenate([self._encode('int', ints), self._encode('text', texts)]))
+                    self._items[key] = (ids, rows, missing, id_column, self.generation)
+                self._items.move_to_end(key)
+                ids, rows, missing, id_column, generation = self._items[key]
+                snapshots.append(Snapshot(label, ids, rows, missing, id_column, generation))
+
+            # Trimmed after the batch, so none of its own snapshots is evicted before it is used
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return snapshots
+
+    def stats(self):
+        return {
+            'entries': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'dictionary_ids': self.size,
+            'generation': self.generation,
+        }
+
+
+# Shared store for the whole process
+store = SnapshotStore()
+
+
+class RetentionResult:
+    """Per-term and adjacent-pair counts for an ordered list of snapshots."""
+
+    def __init__(self, snapshots, present):
+        self.labels = [s.label for s in snapshots]
+        before, after = present[:-1], present[1:]
+        self.students = present.sum(axis=1)
+        self.continuing = (before & after).sum(axis=1)
+        self.dropped = (before & ~after).sum(axis=1)
+        self.new = (~before & after).sum(axis=1)
+
+        # The first term's cohort: still enrolled in each term, and in every term up to it
+        self.cohort_retained = (present[0] & present).sum(axis=1)
+        self.cohort_unbroken = np.logical_and.accumulate(present, axis=0).sum(axis=1)
+
+        self.ever = int(present.any(axis=0).sum())
+        self.every_term = int(present.all(axis=0).sum())
+        self.rows = [s.rows for s in snapshots]
+        self.missing = [s.missing for s in snapshots]
+
+    @staticmethod
+    def _percent(part, whole):
+        return np.round(np.divide(part * 100.0, whole, out=np.zeros(len(part)), where=whole > 0), 1)
+
+    def pairs(self):
+        return pd.DataFrame({
+            'From Term': self.labels[:-1],
+            'To Term': self.labels[1:],
+            'Students (From)': self.students[:-1],
+            'Continuing': self.continuing,
+            'Dropped': self.dropped,
+            'New': self.new,
+            'Retention %': self._percent(self.continuing, self.students[:-1]),
+        })
+
+    def terms(self):
+        cohort = self.students[0]
+        return pd.DataFrame({
+            'Term': self.labels,
+            'Rows': self.rows,
+            'Rows Without ID': self.missing,
+            'Students': self.students,
+            'First Cohort Enrolled': self.cohort_retained,
+            'First Cohort %': self._percent(self.cohort_retained, np.full(len(self.labels), cohort)),
+            'Enrolled Every Term So Far': self.cohort_unbroken,
+        })
+
+    def counts(self):
+        return {'terms': len(self.labels), 'ever': self.ever, 'every_term': self.every_term}
+
+
+# ─── One membership matrix over the students in any of these snapshots ───
+def compare_snapshots(snapshots) -> RetentionResult:
+    if len(snapshots) < 2:
+        raise SnapshotError('Upload at least two term snapshots to compare.')
+
+    # Compacting the dictionary ids to the students that appear here; each row marks one term
+    universe, columns = np.unique(np.concatenate([s.ids for s in snapshots]), return_inverse=True)
+    rows = np.repeat(np.arange(len(snapshots)), [len(s) for s in snapshots])
+    present = np.zeros((len(snapshots), len(universe)), dtype=bool)
+    present[rows, columns] = True
+    return RetentionResult(snapshots, present)
+
+
+# Snapshot cache counters on /metrics once the snapshot page has imported this module
+metrics.register_collector('snapshots', lambda: {'snapshot_cache': store.stats()})
@@ -0,0 +1,69 @@
+// ─── Upload forms run as background jobs ───
+// A form with data-job-url is posted there instead of to the page; the job's
+// progress is polled and the browser moves to data-result-url (with __job__
+// replaced by the job id) once it is done. Without fetch the form posts as before.
+(function () {
+  var POLL_MS = 1000;
+
+  function showError(box, message) {
+    box.querySelector('.progress').classList.add('d-none');
+    var alert = box.querySelector('.alert');
+    alert.textContent = message;
+    alert.classList.remove('d-none');
+  }
+
+  function showProgress(box, stage, fraction) {
+    var bar = box.querySelector('.progress-bar');
+    bar.style.width = Math.round(fraction * 100) + '%';
+    bar.textContent = stage;
+  }
+
+  function poll(form, box, statusUrl) {
+    fetch(statusUrl)
+      .then(function (response) { return response.json(); })
+      .then(function (job) {
+        if (job.status === 'done') {
+          window.location = form.dataset.resultUrl.replace('__job__', job.id);
+        } else if (job.status === 'failed') {
+          showError(box, job.error || 'The job failed.');
+          form.querySelector('[type=submit]').disabled = false;
+        } else {
+          showProgress(box, job.stage, job.progress);
+          setTimeout(function () { poll(form, box, statusUrl); }, POLL_MS);
+        }
+      })
+      .catch(function () { setTimeout(function () { poll(form, box, statusUrl); }, POLL_MS); });
+  }
+
+  document.querySelectorAll('form[data-job-url]').forEach(function (form) {
+    form.addEventListener('submit', function (event) {
+      if (!window.fetch || !window.FormData) {
+        return;
+      }
+      event.preventDefault();
+
+      var box = document.getElementById(form.dataset.progress);
+      var button = form.querySelector('[type=submit]');
+      button.disabled = true;
+      box.classList.remove('d-none');
+      box.querySelector('.alert').classList.add('d-none');
+      box.querySelector('.progress').classList.remove('d-none');
+      showProgress(box, 'uploading', 0.05);
+
+      fetch(form.dataset.jobUrl, { method: 'POST', body: new FormData(form) })
+        .then(function (response) {
+          return response.json().then(function (body) {
+            if (!response.ok) {
+              throw new Error(body.error || 'Upload failed.');
+            }
+            return body;
+          });
+        })
+        .then(function (body) { poll(form, box, body.status_url); })
+        .catch(function (error) {
+          showError(box, error.message);
+          button.disabled = false;
+        });
+    });
+  });
+})();
@@ -0,0 +1,102 @@
+#########################################################################
+# Title  : Student Matching Engine
+# Purpose: Matches current and future student sheets on student ID in a
+#          single pass. IDs are normalised once into compact integer codes,
+#          the join runs on those codes, and the continuing / non-continuing
+#          / union counts and unmatched rows come out of the same pass.
+#########################################################################
+
+# Importing necessary libraries
+import numpy as np
+import pandas as pd
+
+
+# ─── Converting one ID column to int64 if every value is an integral number ───
+def _as_int_ids(col: pd.Series):
+    if pd.api.types.is_integer_dtype(col):
+        return col.to_numpy(dtype=np.int64), np.ones(len(col), dtype=bool)
+
+    text = col.astype('string').str.strip()
+    present = (text.notna() & (text != '')).to_numpy(dtype=bool)
+    nums = pd.to_numeric(text, errors='coerce')
+    valid = nums.notna().to_numpy(dtype=bool)
+    if not (valid == present).all():
+        return None, present
+
+    values = nums.to_numpy(dtype=np.float64, na_value=0.0)
+    if not np.all(np.mod(values[valid], 1) == 0):
+        return None, present
+    return values.astype(np.int64), present
+
+
+# ─── Normalising both ID columns into shared dense codes (-1 = missing ID) ───
+def normalise_ids(left: pd.Series, right: pd.Series):
+    left_ints, left_present = _as_int_ids(left)
+    right_ints, right_present = _as_int_ids(right)
+
+    if left_ints is not None and right_ints is not None:
+        keys = np.concatenate([left_ints, right_ints])
+    else:
+        # Mixed or non-numeric IDs fall back to stripped text keys
+        keys = np.concatenate([
+            left.astype('string').str.strip().to_numpy(dtype=object),
+            right.astype('string').str.strip().to_numpy(dtype=object),
+        ])
+
+    codes, uniques = pd.factorize(keys, use_na_sentinel=True)
+    codes = codes.astype(np.int64)
+    present = np.concatenate([left_present, right_present])
+    codes[~present] = -1
+
+    n_left = len(left)
+    return codes[:n_left], codes[n_left:], len(uniques)
+
+
+class MatchResult:
+    """Joined rows plus the counts and unmatched rows from one matching pass."""
+
+    def __init__(self, merged, continuing, union, unmatched_left, unmatched_right):
+        self.merged = merged
+        self.continuing = continuing
+        self.union = union
+        self.non_continuing = union - continuing
+        self.unmatched_left = unmatched_left
+        self.unmatched_right = unmatched_right
+
+    def counts(self):
+        return {
+            'continuing': self.continuing,
+            'non_continuing': self.non_continuing,
+            'union': self.union,
+            'unmatched_current_rows': len(self.unmatched_left),
+            'unmatched_future_rows': len(self.unmatched_right),
+        }
+
+
+# ─── Inner join of both sheets on the normalised ID, with counts from the same codes ───
+def match_students(df1: pd.DataFrame, df2: pd.DataFrame, key='rmit_student_id') -> MatchResult:
+    codes1, codes2, n_codes = normalise_ids(df1[key], df2[key])
+
+    # Which distinct IDs appear on each side
+    seen1 = np.zeros(n_codes + 1, dtype=bool)
+    seen2 = np.zeros(n_codes + 1, dtype=bool)
+    seen1[codes1] = True
+    seen2[codes2] = True
+    seen1[-1] = seen2[-1] = False  # slot for missing IDs never counts
+
+    both = seen1 & seen2
+    continuing = int(both.sum())
+    union = int((seen1 | seen2).sum())
+
+    # Rows whose ID has no partner on the other side
+    matched1 = both[codes1]
+    matched2 = both[codes2]
+
+    # Joining on the integer codes; the left ID column is dropped in favour of the right one
+    left = df1.loc[matched1].drop(columns=[key])
+    left.insert(0, '_match_key', codes1[matched1])
+    right = df2.loc[matched2].copy()
+    right.insert(0, '_match_key', codes2[matched2])
+    merged = left.merge(right, how='inner', on='_match_key', sort=False).drop(columns=['_match_key'])
+
+    return MatchResult(merged, continuing, union, df1.loc[~matched1], df2.loc[~matched2])
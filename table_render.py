@@ -0,0 +1,100 @@
+#########################################################################
+# Title  : Table Rendering Helper
+# Purpose: Builds hyperlink columns with vectorised string operations and
+#          assembles the HTML table from whole-column string ops joined in
+#          chunks of rows, replacing row-wise apply/url_for lambdas and
+#          DataFrame.to_html(escape=False) on the pathway pages. The table
+#          is returned as one string (it is cached and placed in the page
+#          template); nothing is streamed to the client.
+#########################################################################
+
+# Importing necessary libraries
+from urllib.parse import quote
+import pandas as pd
+from flask import url_for
+
+# Placeholder substituted into url_for so the URL prefix is resolved once per column
+_URL_PLACEHOLDER = '__TABLE_RENDER_VALUE__'
+
+# Rows joined into one string at a time while the table is built
+CHUNK_ROWS = 500
+
+
+# ─── Escaping a whole column of cell text in one pass ───
+def escape_series(values: pd.Series) -> pd.Series:
+    text = values.fillna('').astype(str)
+    return (
+        text
+        .str.replace('&', '&amp;', regex=False)
+        .str.replace('<', '&lt;', regex=False)
+        .str.replace('>', '&gt;', regex=False)
+        .str.replace('"', '&quot;', regex=False)
+        .str.replace("'", '&#x27;', regex=False)
+    )
+
+
+# ─── Widening float32 columns for export so 2.448 is not written as 2.4479999542 ───
+def widen_floats(df: pd.DataFrame, decimals=6) -> pd.DataFrame:
+    narrow = [c for c in df.columns if df[c].dtype == 'float32']
+    if not narrow:
+        return df
+    return df.assign(**{c: df[c].astype('float64').round(decimals) for c in narrow})
+
+
+# ─── Resolving an endpoint URL once and splitting it around the variable part ───
+def url_template(endpoint, param='code', **values):
+    url = url_for(endpoint, **{param: _URL_PLACEHOLDER}, **values)
+    prefix, suffix = url.split(_URL_PLACEHOLDER, 1)
+    return prefix, suffix
+
+
+# ─── Building <a> tags for a column of codes without calling url_for per row ───
+def build_links(codes: pd.Series, endpoint, text: pd.Series = None, param='code') -> pd.Series:
+    prefix, suffix = url_template(endpoint, param=param)
+    codes = codes.fillna('').astype(str)
+
+    # Percent-encoding only the codes that actually need it (url_for does the same)
+    needs_quote = codes.str.contains(r'[^A-Za-z0-9_.~-]', regex=True)
+    path = codes.copy()
+    if needs_quote.any():
+        path[needs_quote] = codes[needs_quote].map(lambda c: quote(c, safe=''))
+
+    label = escape_series(codes if text is None else text)
+    anchors = '<a href="' + prefix + escape_series(path) + suffix + '">' + label + '</a>'
+
+    # Leaving the cell blank when there is no link text to show
+    blank = label.str.strip() == ''
+    return anchors.mask(blank, '')
+
+
+# ─── The HTML table as string pieces: the header, then chunks of joined rows ───
+def iter_table(df: pd.DataFrame, classes='table table-bordered data-table', table_id=None,
+               raw_columns=(), chunk_rows=CHUNK_ROWS):
+    id_attr = f' id="{table_id}"' if table_id else ''
+    yield f'<table border="1" class="dataframe {classes}"{id_attr}>\n'
+
+    headers = ''.join(f'<th>{h}</th>' for h in escape_series(pd.Series(df.columns, dtype=object)))
+    yield f'<thead>\n<tr style="text-align: right;">{headers}</tr>\n</thead>\n<tbody>\n'
+
+    if len(df):
+        # Escaping each column once, leaving columns that already hold HTML untouched
+        cells = [
+            df[col].astype(str) if col in raw_columns else escape_series(df[col])
+            for col in df.columns
+        ]
+
+        # Concatenating all cells of every row with vectorised string ops
+        rows = '<tr><td>' + cells[0]
+        for col in cells[1:]:
+            rows = rows + '</td><td>' + col
+        rows = (rows + '</td></tr>\n').tolist()
+
+        for start in range(0, len(rows), chunk_rows):
+            yield ''.join(rows[start:start + chunk_rows])
+
+    yield '</tbody>\n</table>'
+
+
+# ─── The whole table as one string, for the fragment cache and the page template ───
+def render_table(df: pd.DataFrame, **kwargs) -> str:
+    return ''.join(iter_table(df, **kwargs))
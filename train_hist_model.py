@@ -1,47 +1,201 @@
+#########################################################################
+# Title  : GPA Model Training
+# Purpose: Trains the HistGradientBoostingRegressor behind the GPA predictor.
+#          Term exports are ingested into a persistent feature store so only
+#          the students they touch are re-pivoted; the model is then refit
+#          (or warm-started with extra boosting iterations) and written as a
+#          versioned bundle with its training metrics, plus the .npz tree
+#          export the app serves without scikit-learn.
+# Usage  : python train_hist_model.py                      # student_records.xlsx
+#          python train_hist_model.py exports/term3.xlsx --warm-start
+#          python train_hist_model.py --rebuild
+#          python train_hist_model.py --export-only         # .npz of the current model
+#########################################################################
+
+# Importing necessary libraries
+import argparse
+import datetime
+import json
+import os
+import re
+import shutil
+import time
+import cloudpickle
 import pandas as pd
+import sklearn
 from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.model_selection import train_test_split
-import cloudpickle
-import os
+from feature_store import FeatureStore
+from gpa_features import subject_means, normalise
+from tree_model import export_hgbr
+from model_registry import file_digest
+
+MODEL_DIR = "Machine Learning"
+STORE_DIR = os.path.join(MODEL_DIR, "feature_store")
+VERSIONS_DIR = os.path.join(MODEL_DIR, "models")
+SERVING_PATH = os.path.join(MODEL_DIR, "gpa_hist_model_cp.pkl")
+SERVING_NPZ_PATH = os.path.join(MODEL_DIR, "gpa_hist_model.npz")
+
+# Boosting iterations added on each warm start
+WARM_START_ITER = 50
+
 
-# --- Load the student dataset ---
-df = pd.read_excel("student_records.xlsx")
+# ─── Versioned bundles: Machine Learning/models/gpa_hist_model_v<N>.pkl ───
+def bundle_versions():
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    found = (re.fullmatch(r'gpa_hist_model_v(\d+)\.pkl', name) for name in os.listdir(VERSIONS_DIR))
+    return sorted(int(m.group(1)) for m in found if m)
 
-# --- Prepare the data ---
-df = df[['Emplid', 'Name', 'Program Status', 'Course', 'Mark']].drop_duplicates()
-df['Emplid'] = df['Emplid'].astype(str)
-df['Mark'] = pd.to_numeric(df['Mark'], errors='coerce')
 
-# --- Pivot to get one row per student ---
-pivot = df.pivot_table(index=['Emplid', 'Name'], columns='Course', values='Mark', aggfunc='first').reset_index()
+def version_path(version, ext='pkl'):
+    return os.path.join(VERSIONS_DIR, f'gpa_hist_model_v{version}.{ext}')
 
-# --- Identify subject columns ---
-subject_cols = [col for col in pivot.columns if col not in ['Emplid', 'Name']]
 
-# --- TEMP GPA Calculation before normalization ---
-pivot['GPA'] = (pivot[subject_cols].sum(axis=1) / (pivot[subject_cols].notna().sum(axis=1) * 25)).clip(upper=4.0)
+def load_bundle(path):
+    with open(path, 'rb') as f:
+        return cloudpickle.load(f)
 
-# --- Now normalize the features only ---
-for col in subject_cols:
-    mu = pivot[col].dropna().mean()
-    pivot[col] = pivot[col].fillna(mu)
-    pivot[col] = (pivot[col] - mu) / mu
 
-# --- Train/test split ---
-X = pivot[subject_cols]
-y = pivot['GPA']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+# ─── Previous model to continue from, or None when a full fit is needed ───
+def warm_start_base(subject_cols):
+    versions = bundle_versions()
+    if not versions:
+        return None, 'no previous versioned bundle'
+    previous = load_bundle(version_path(versions[-1]))
+    if list(previous['subject_cols']) != list(subject_cols):
+        return None, 'subject columns changed since the previous bundle'
+    return previous, None
 
-# --- Train the model ---
-model = HistGradientBoostingRegressor(random_state=42)
-model.fit(X_train, y_train)
 
-# --- Save the model using cloudpickle ---
-os.makedirs("Machine Learning", exist_ok=True)
-with open("Machine Learning/gpa_hist_model_cp.pkl", "wb") as f:
-    cloudpickle.dump({
+# ─── Fitting: a fresh model, or the previous one with WARM_START_ITER more trees ───
+def fit_model(X_train, y_train, previous=None):
+    if previous is None:
+        model = HistGradientBoostingRegressor(random_state=42)
+    else:
+        model = previous['model']
+        model.set_params(warm_start=True, max_iter=model.n_iter_ + WARM_START_ITER)
+    model.fit(X_train, y_train)
+    return model
+
+
+def train(store, warm_start=False):
+    X_raw, y, subject_cols = store.training_data()
+
+    previous, reason = warm_start_base(subject_cols) if warm_start else (None, None)
+    if reason:
+        print(f"Full fit instead of warm start: {reason}")
+
+    # Warm starts keep the previous normalisation so the existing trees stay valid
+    means = previous['subject_means'] if previous is not None else subject_means(X_raw)
+    X = pd.DataFrame(normalise(X_raw.copy(), means), columns=subject_cols)
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    start = time.perf_counter()
+    model = fit_model(X_train, y_train, previous)
+    train_seconds = time.perf_counter() - start
+
+    pred = model.predict(X_test)
+    metrics = {
+        'r2': round(float(r2_score(y_test, pred)), 6),
+        'mae': round(float(mean_absolute_error(y_test, pred)), 6),
+        'n_students': int(len(y)),
+        'n_train': int(len(y_train)),
+        'n_test': int(len(y_test)),
+        'n_features': len(subject_cols),
+        'n_iter': int(model.n_iter_),
+        'warm_start': previous is not None,
+        'base_version': previous.get('version') if previous is not None else None,
+        'train_seconds': round(train_seconds, 3),
+        'store_version': store.version,
+        'ingests': [entry['digest'] for entry in store.manifest['ingests']],
+        'sklearn': sklearn.__version__,
+    }
+    bundle = {
         'model': model,
-        'subject_cols': subject_cols
-    }, f)
+        'subject_cols': subject_cols,
+        'subject_means': means,
+        'mark_median': store.mark_median(),
+    }
+    return bundle, metrics
+
+
+# ─── Tree arrays for the NumPy evaluator (see tree_model.py) ───
+# (recording the digest of the pickle it came from, which the model registry checks)
+def export_npz(bundle, path, source_path):
+    export_hgbr(bundle['model'], path, bundle['subject_cols'],
+                subject_means=bundle.get('subject_means'), mark_median=bundle.get('mark_median'),
+                source_digest=file_digest(source_path))
+
+
+# ─── Writing the next version, then swapping it in for the running app ───
+def save_bundle(bundle, metrics):
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    version = (bundle_versions() or [0])[-1] + 1
+    bundle = dict(bundle, version=version, metrics=metrics,
+                  trained_at=datetime.datetime.now().isoformat(timespec='seconds'))
+
+    path = version_path(version)
+    with open(path, 'wb') as f:
+        cloudpickle.dump(bundle, f)
+    with open(version_path(version, 'json'), 'w') as f:
+        json.dump({'version': version, 'trained_at': bundle['trained_at'], **metrics}, f, indent=2)
+
+    export_npz(bundle, version_path(version, 'npz'), path)
+
+    # The model registry hot-reloads on the file changing, so replace both in one step each
+    tmp = f'{SERVING_PATH}.tmp'
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, SERVING_PATH)
+    export_npz(bundle, SERVING_NPZ_PATH, SERVING_PATH)
+    return version, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the GPA HistGradientBoosting model')
+    parser.add_argument('exports', nargs='*', default=['student_records.xlsx'],
+                        help='mark exports (Emplid, Name, Course, Mark) to ingest')
+    parser.add_argument('--store', default=STORE_DIR, help='feature store folder')
+    parser.add_argument('--rebuild', action='store_true', help='empty the feature store before ingesting')
+    parser.add_argument('--warm-start', action='store_true',
+                        help='add boosting iterations to the latest bundle instead of refitting')
+    parser.add_argument('--force', action='store_true', help='retrain even when no export was new')
+    parser.add_argument('--export-only', action='store_true',
+                        help='only write the .npz tree export of the current model')
+    args = parser.parse_args()
+
+    if args.export_only:
+        export_npz(load_bundle(SERVING_PATH), SERVING_NPZ_PATH, SERVING_PATH)
+        print(f"✅ Exported {SERVING_PATH} to {SERVING_NPZ_PATH}")
+        return
+
+    if args.rebuild and os.path.isdir(args.store):
+        shutil.rmtree(args.store)
+    store = FeatureStore(args.store)
+
+    # --- Ingest exports; files already in the manifest are skipped ---
+    new = 0
+    for path in args.exports:
+        entry = store.ingest(path)
+        if entry is None:
+            print(f"Skipped {path}: already ingested")
+            continue
+        new += 1
+        print(f"Ingested {path}: {entry['rows']} rows, {entry['students_affected']} students updated "
+              f"({entry['students_total']} total) in {entry['seconds']:.2f}s")
+    store.save()
+
+    if not new and not args.force:
+        print("No new exports; model left unchanged (use --force to retrain)")
+        return
+
+    # --- Train and save the next model version ---
+    bundle, metrics = train(store, warm_start=args.warm_start)
+    version, path = save_bundle(bundle, metrics)
+    print(f"✅ Model v{version} saved to {path} (R² {metrics['r2']:.4f}, MAE {metrics['mae']:.4f}, "
+          f"{'warm start' if metrics['warm_start'] else 'full fit'} in {metrics['train_seconds']:.2f}s)")
+
 
-print("✅ Model retrained and saved successfully!")
+if __name__ == '__main__':
+    main()
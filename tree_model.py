@@ -0,0 +1,228 @@
+#########################################################################
+# Title  : Compiled GPA Tree Evaluator
+# Purpose: Flattens a fitted HistGradientBoostingRegressor into plain arrays
+#          (sorted split thresholds, leaf bitmasks, leaf values) saved as an
+#          uncompressed .npz that is memory-mapped on load, and evaluates them
+#          with NumPy alone, so serving the GPA model needs neither
+#          scikit-learn nor unpickling the estimator.
+#########################################################################
+
+# Importing necessary libraries
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+# Rows evaluated together; bounds the (rows x trees) mask array
+BLOCK_ROWS = 2048
+
+# One bit per leaf: uint32 masks cover HGBR's default of 31 leaves, uint64 up to 64
+MAX_LEAVES = 64
+
+
+# ─── Leaves of one tree numbered left to right, with the leaf bits of each subtree ───
+def _leaf_order(nodes):
+    leaf_ids, subtree_bits = {}, {}
+
+    def walk(i):
+        if nodes['is_leaf'][i]:
+            leaf_ids[i] = len(leaf_ids)
+            subtree_bits[i] = 1 << leaf_ids[i]
+        else:
+            walk(nodes['left'][i])
+            walk(nodes['right'][i])
+            subtree_bits[i] = subtree_bits[nodes['left'][i]] | subtree_bits[nodes['right'][i]]
+
+    walk(0)
+    return leaf_ids, subtree_bits
+
+
+# ─── Export: trees compiled to per-feature threshold tables of leaf bitmasks ───
+# A split whose test fails (x > threshold, or missing sent right) rules out every
+# leaf of its left subtree. Sorting each feature's thresholds turns "all failed
+# splits on feature f" into a prefix, so masks[k] holds the AND of the first k
+# splits' masks per tree. The leftmost leaf still set after all features is the
+# exit leaf, exactly as a root-to-leaf walk would find it.
+def export_hgbr(model, path, subject_cols, subject_means=None, mark_median=None, source_digest=None):
+    if getattr(model, 'is_categorical_', None) is not None and np.any(model.is_categorical_):
+        raise ValueError("Categorical splits are not supported by the tree evaluator")
+    if model.n_trees_per_iteration_ != 1:
+        raise ValueError("Only single-output regressors can be exported")
+
+    trees = [predictors[0].nodes for predictors in model._predictors]
+    n_trees, n_features = len(trees), len(subject_cols)
+    max_leaves = max(int(nodes['is_leaf'].sum()) for nodes in trees)
+    if max_leaves > MAX_LEAVES:
+        raise ValueError(f"Trees with more than {MAX_LEAVES} leaves are not supported")
+    mask_dtype = np.uint32 if max_leaves <= 32 else np.uint64
+    all_leaves = np.iinfo(mask_dtype).max
+
+    leaf_values = np.zeros((n_trees, max_leaves), dtype=np.float64)
+    splits = [[] for _ in range(n_features)]
+    for t, nodes in enumerate(trees):
+        leaf_ids, subtree_bits = _leaf_order(nodes)
+        for i, leaf in leaf_ids.items():
+            leaf_values[t, leaf] = nodes['value'][i]
+        for i in np.flatnonzero(~nodes['is_leaf'].astype(bool)):
+            mask = all_leaves & ~subtree_bits[nodes['left'][i]]
+            splits[nodes['feature_idx'][i]].append(
+                (nodes['num_threshold'][i], t, mask, bool(nodes['missing_go_to_left'][i])))
+
+    # Per feature: sorted thresholds, then n+1 prefix rows and one row for missing values
+    thresholds, tables, threshold_offsets, mask_offsets = [], [], [0], []
+    for feature_splits in splits:
+        feature_splits.sort(key=lambda s: s[0])
+        table = np.full((len(feature_splits) + 2, n_trees), all_leaves, dtype=mask_dtype)
+        for k, (threshold, t, mask, missing_left) in enumerate(feature_splits):
+            table[k + 1:-1, t] &= mask
+            if not missing_left:
+                table[-1, t] &= mask
+        mask_offsets.append(sum(len(tbl) for tbl in tables))
+        tables.append(table)
+        thresholds.extend(s[0] for s in feature_splits)
+        threshold_offsets.append(len(thresholds))
+
+    arrays = {
+        'format_version': np.array(FORMAT_VERSION),
+        'thresholds': np.asarray(thresholds, dtype=np.float64),
+        'threshold_offsets': np.asarray(threshold_offsets, dtype=np.int64),
+        'masks': np.concatenate(tables),
+        'mask_offsets': np.asarray(mask_offsets, dtype=np.int64),
+        'leaf_values': leaf_values,
+        'baseline': np.asarray(model._baseline_prediction, dtype=np.float64).ravel()[:1],
+        'subject_cols': np.asarray(list(subject_cols), dtype=str),
+    }
+    if subject_means is not None:
+        arrays['subject_means'] = np.asarray(subject_means, dtype=np.float32)
+    if mark_median is not None:
+        arrays['mark_median'] = np.array(mark_median, dtype=np.float64)
+
+    # Digest of the pickle this was exported from, so a stale export can be detected
+    if source_digest is not None:
+        arrays['source_digest'] = np.array(source_digest)
+
+    # Uncompressed so every member can be memory-mapped; replaced in one step for hot reload
+    # (the temp name is per process, as several workers may re-export at once)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as fh:
+        np.savez(fh, **arrays)
+    os.replace(tmp, path)
+
+
+# ─── Exporting a pickled bundle (needs scikit-learn), recording the pickle's digest ───
+def export_pickle(src_path, path, source_digest):
+    import joblib
+
+    bundle = joblib.load(src_path)
+    export_hgbr(bundle['model'], path, [c for c in bundle['subject_cols'] if c != 'GPA'],
+                subject_means=bundle.get('subject_means'), mark_median=bundle.get('mark_median'),
+                source_digest=source_digest)
+
+
+# ─── Digest of the pickle an export was made from (None for older exports or no file) ───
+def source_digest(path):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return str(data['source_digest']) if 'source_digest' in data.files else None
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+# ─── Memory-mapping each member of an uncompressed .npz ───
+def load_npz(path, mmap=True):
+    if not mmap:
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as fh:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename} is compressed and cannot be memory-mapped")
+            # Local header: 30 fixed bytes, then the file name and extra field
+            fh.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(fh.read(4), dtype='<u2')
+            fh.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+
+            read_header = (np.lib.format.read_array_header_1_0 if np.lib.format.read_magic(fh) == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran, dtype = read_header(fh)
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if dtype.hasobject:
+                raise ValueError(f"{name} holds Python objects")
+            arrays[name] = np.memmap(fh, dtype=dtype, mode='r', shape=shape,
+                                     order='F' if fortran else 'C', offset=fh.tell())
+    return arrays
+
+
+class TreeEnsemble:
+    """Gradient-boosted regression trees evaluated with NumPy; predict() mirrors the estimator."""
+
+    def __init__(self, arrays):
+        if int(arrays['format_version']) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree format {int(arrays['format_version'])}")
+        self.thresholds = arrays['thresholds']
+        self.threshold_offsets = arrays['threshold_offsets']
+        self.masks = arrays['masks']
+        self.mask_offsets = arrays['mask_offsets']
+        self.leaf_values = arrays['leaf_values']
+        self.baseline = float(arrays['baseline'][0])
+        self.feature_names_in_ = np.asarray(arrays['subject_cols'])
+        self.n_features_in_ = len(self.feature_names_in_)
+
+        # Only features some tree splits on take part in evaluation
+        counts = np.diff(self.threshold_offsets)
+        self._split_features = [int(f) for f in np.flatnonzero(counts)]
+
+    @property
+    def n_trees(self):
+        return len(self.leaf_values)
+
+    def _check(self, X):
+        if isinstance(X, pd.DataFrame):
+            if list(X.columns) != list(self.feature_names_in_):
+                raise ValueError("Feature names must match those the model was exported with")
+            X = X.to_numpy()
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the model expects {self.n_features_in_}")
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+        return X
+
+    def _predict_block(self, X):
+        alive = np.full((len(X), self.n_trees), np.iinfo(self.masks.dtype).max, dtype=self.masks.dtype)
+        for f in self._split_features:
+            lo, hi = self.threshold_offsets[f], self.threshold_offsets[f + 1]
+            x = X[:, f]
+            # Number of thresholds below x = how many of this feature's splits send x right
+            k = np.searchsorted(self.thresholds[lo:hi], x, side='left')
+            k[np.isnan(x)] = hi - lo + 1
+            alive &= self.masks[self.mask_offsets[f] + k]
+
+        # Leftmost surviving leaf: lowest set bit
+        exit_leaf = np.log2(alive & (~alive + alive.dtype.type(1))).astype(np.intp)
+        values = self.leaf_values[np.arange(self.n_trees), exit_leaf]
+
+        # Adding tree outputs in order after the baseline, as the estimator does
+        values = np.concatenate([np.full((len(X), 1), self.baseline), values], axis=1)
+        return np.cumsum(values, axis=1)[:, -1]
+
+    def predict(self, X):
+        X = self._check(X)
+        if len(X) <= BLOCK_ROWS:
+            return self._predict_block(X)
+        return np.concatenate([self._predict_block(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)])
+
+
+# ─── Loading an exported model as a registry bundle (same keys as the pickled bundle) ───
+def load_bundle(path, mmap=True):
+    arrays = load_npz(path, mmap=mmap)
+    bundle = {'model': TreeEnsemble(arrays), 'subject_cols': [str(c) for c in arrays['subject_cols']]}
+    if 'subject_means' in arrays:
+        bundle['subject_means'] = np.asarray(arrays['subject_means'])
+    if 'mark_median' in arrays:
+        bundle['mark_median'] = float(arrays['mark_median'])
+    return bundle
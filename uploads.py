@@ -0,0 +1,249 @@
+#########################################################################
+# Title  : Upload Handling
+# Purpose: Each uploaded file is spooled to its own anonymous temp file once
+#          it passes a threshold, so many large uploads at once sit on disk
+#          instead of in worker memory. Files over the per-file limit are
+#          rejected while they stream in (MAX_CONTENT_LENGTH rejects whole
+#          requests from the header). Parsers read the spooled file through
+#          a read-only memory map instead of a copied buffer, a semaphore
+#          bounds how many uploads are parsed at once, and spool files are
+#          closed (and so deleted) when the request ends.
+#########################################################################
+
+# Importing necessary libraries
+import io
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from flask import Request, current_app, flash, jsonify, redirect, request, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Uploaded files up to this size stay in memory; larger ones go to a temp file
+SPOOL_BYTES = 1024 * 1024
+
+# Largest single uploaded file (0 leaves only MAX_CONTENT_LENGTH)
+MAX_FILE_BYTES = 256 * 1024 * 1024
+
+# Uploads parsed at the same time per process
+PARSE_CONCURRENCY = 2
+
+# Read-ahead buffer when a parser streams from a memory map
+READ_BUFFER_BYTES = 1024 * 1024
+
+# Paths whose clients expect JSON errors rather than a flashed message
+JSON_PATH_PREFIXES = ('/ml/api/', '/jobs/')
+
+
+def _megabytes(size):
+    return f'{size / 2**20:.0f} MB'
+
+
+class SpooledUpload(tempfile.SpooledTemporaryFile):
+    """One uploaded file: in memory up to the threshold, then an anonymous temp file; stops at the limit."""
+
+    def __init__(self, spooler, max_size, limit, dir=None):
+        super().__init__(max_size=max_size, mode='w+b', dir=dir)
+        self.spooler = spooler
+        self.limit = limit
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self.limit and self.size > self.limit:
+            self.spooler.count_rejected()
+            raise RequestEntityTooLarge(f"Each uploaded file is limited to {_megabytes(self.limit)}.")
+        return super().write(data)
+
+    def rollover(self):
+        if not self._rolled:
+            self.spooler.count_spooled()
+        super().rollover()
+
+
+class UploadRequest(Request):
+    """Flask request whose file parts go to the shared spooler."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spooler.open(content_length)
+
+
+class UploadSpooler:
+    """Spool settings, the parse semaphore and upload counters for the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, spool_bytes=SPOOL_BYTES, max_file_bytes=MAX_FILE_BYTES, spool_dir=None,
+                  parse_concurrency=PARSE_CONCURRENCY):
+        self.spool_bytes = spool_bytes
+        self.max_file_bytes = max_file_bytes
+        self.spool_dir = spool_dir
+        self.parse_concurrency = parse_concurrency
+        self._slots = threading.BoundedSemaphore(parse_concurrency) if parse_concurrency > 0 else None
+        self.spooled = 0
+        self.rejected = 0
+        self.parsing = 0
+        self.waiting = 0
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+
+    # ─── A new spool file, refused up front when the part declares an oversized length ───
+    def open(self, content_length=None):
+        if self.max_file_bytes and content_length and content_length > self.max_file_bytes:
+            self.count_rejected()
+            raise RequestEntityTooLarge(f"Each uploaded file is limited to {_megabytes(self.max_file_bytes)}.")
+        return SpooledUpload(self, self.spool_bytes, self.max_file_bytes, self.spool_dir)
+
+    def count_spooled(self):
+        with self._lock:
+            self.spooled += 1
+
+    def count_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    # ─── At most parse_concurrency uploads parsed at once; the rest wait their turn ───
+    @contextmanager
+    def parse_slot(self):
+        if self._slots is None:
+            yield
+            return
+        with self._lock:
+            self.waiting += 1
+        self._slots.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.parsing += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.parsing -= 1
+            self._slots.release()
+
+    def stats(self):
+        return {
+            'spool_bytes': self.spool_bytes,
+            'max_file_bytes': self.max_file_bytes,
+            'spooled_to_disk': self.spooled,
+            'rejected': self.rejected,
+            'parse_concurrency': self.parse_concurrency,
+            'parsing': self.parsing,
+            'waiting': self.waiting,
+        }
+
+
+# Shared spooler for the whole process
+spooler = UploadSpooler()
+
+
+# ─── Upload contents as a buffer without copying: a read-only map of the file on disk ───
+# Paths and spooled uploads are mapped; bytes and small in-memory uploads are used
+# as they are. The map is closed when the block ends, so nothing may keep it.
+@contextmanager
+def mapped(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield source
+        return
+    if isinstance(source, str):
+        with open(source, 'rb') as fh, _map(fh.fileno()) as buf:
+            yield buf
+        return
+
+    stream = getattr(source, 'stream', source)
+    fileno = _fileno(stream)
+    if fileno is None:
+        data = stream.read()
+        stream.seek(0)
+        yield data
+        return
+    stream.flush()
+    with _map(fileno) as buf:
+        yield buf
+
+
+def _fileno(stream):
+    # Asking an in-memory SpooledTemporaryFile for its fileno would write it to disk
+    if isinstance(stream, tempfile.SpooledTemporaryFile) and not stream._rolled:
+        return None
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+@contextmanager
+def _map(fileno):
+    if os.fstat(fileno).st_size == 0:
+        yield b''
+        return
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mm:
+        yield mm
+
+
+class _MappedReader(io.RawIOBase):
+    """Seekable binary file over a memory map (mmap itself lacks readable/seekable)."""
+
+    def __init__(self, mm):
+        self._mm = mm
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._mm.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._mm.seek(offset, whence)
+        return self._mm.tell()
+
+    def tell(self):
+        return self._mm.tell()
+
+
+# ─── A file object for pandas / openpyxl over a buffer from mapped() ───
+def open_buffer(buf):
+    if isinstance(buf, mmap.mmap):
+        buf.seek(0)
+        return io.BufferedReader(_MappedReader(buf), buffer_size=READ_BUFFER_BYTES)
+    return io.BytesIO(buf)
+
+
+# ─── Oversized uploads: JSON for API clients, a flashed message for the HTML forms ───
+def _too_large(e):
+    message = e.description
+    if message == RequestEntityTooLarge.description and request.max_content_length:
+        message = f"Uploads are limited to {_megabytes(request.max_content_length)} per request."
+    if request.path.startswith(JSON_PATH_PREFIXES) or request.is_json:
+        return jsonify({'error': message}), 413
+    flash(message, 'error')
+    return redirect(_form_page())
+
+
+# ─── Page to show the flashed message on: this URL if it answers GET, else the blueprint's home ───
+# (POST-only form targets such as /ml/stream would answer the redirect with 405)
+def _form_page():
+    rule = request.url_rule
+    if rule is not None and 'GET' in rule.methods:
+        return request.url
+    home = f'{request.blueprint}.home'
+    return url_for(home) if request.blueprint and home in current_app.view_functions else '/'
+
+
+def init_uploads(app):
+    spooler.configure(
+        spool_bytes=app.config['UPLOAD_SPOOL_BYTES'],
+        max_file_bytes=app.config['UPLOAD_MAX_FILE_BYTES'],
+        spool_dir=app.config['UPLOAD_SPOOL_FOLDER'],
+        parse_concurrency=app.config['UPLOAD_PARSE_CONCURRENCY'],
+    )
+    app.request_class = UploadRequest
+    app.register_error_handler(RequestEntityTooLarge, _too_large)